@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import Index, create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -24,4 +24,16 @@ def get_db():
         db.close()
 
 def create_tables():
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    Base.metadata.create_all(bind=engine)
+    create_indexes()
+
+def create_indexes():
+    """
+    Create indexes that tables created by earlier versions lack; create_all doesn't add them to existing tables.
+    """
+    from app.models.models import Evaluation
+    # Job rankings filter on job_id and order by overall_score, so they stay an index range scan
+    # however many evaluations a job has, also right after a re-weighting UPDATE
+    Index("ix_evaluations_job_id_overall_score", Evaluation.job_id, Evaluation.overall_score).create(
+        bind=engine, checkfirst=True
+    )
\ No newline at end of file
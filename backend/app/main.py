@@ -3,6 +3,8 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from app.database.config import create_tables
 from app.routes import auth, jobs, evaluations, users
+from app.services.document_processor import shutdown_extraction_pool
+from app.services.process_lock import ProcessLockError, acquire_process_lock
 from app.utils.error_handlers import setup_exception_handlers
 from app.utils.logging_config import setup_logging, get_logger
 from app.utils.middleware import RequestLoggingMiddleware, UserContextMiddleware
@@ -88,9 +90,20 @@ setup_exception_handlers(app)
 @app.on_event("startup")
 async def startup_event():
     logger.info("CV-Align API starting up...")
+    try:
+        acquire_process_lock(os.getenv("APP_LOCK_PATH", "./database/cvalign.lock"), "The evaluation task queue")
+    except ProcessLockError:
+        logger.error("Evaluation tasks are kept in memory, so the API must run as a single worker process")
+        raise
     create_tables()
     logger.info("CV-Align API startup completed")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    logger.info("CV-Align API shutting down...")
+    evaluations.evaluation_queue.shutdown(wait=False)
+    shutdown_extraction_pool(wait=False)
+
 @app.get("/")
 async def root():
     return {"message": "CV-Align API is running"}
@@ -1,26 +1,60 @@
 import os
+import json
 import uuid
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+import shutil
+import asyncio
+import zipfile
+from tempfile import SpooledTemporaryFile
+from typing import BinaryIO, Dict, List, Optional, Tuple
+from fastapi import APIRouter, BackgroundTasks, Body, Depends, HTTPException, status, UploadFile, File, Form, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from app.database.config import get_db
-from app.models.models import Evaluation, Job, User
-from app.models.schemas import Evaluation as EvaluationSchema, CVUploadResponse
+from app.database.config import get_db, SessionLocal
+from app.models.models import Company, Evaluation, Job, User
+from app.models.schemas import Evaluation as EvaluationSchema
 from app.auth.auth import get_current_user, require_role
 from app.services.document_processor import DocumentProcessor
 from app.services.rag_engine import RAGEngine
+from app.services.vector_store import ShardKey, candidate_id_for_text, get_vector_store
+from app.services.cv_store import file_hash
+from app.services.prescreen import PrescreenPolicy, get_provisional_store
+from app.services.evaluation_weights import EvaluationWeights, job_weight_overrides, settings_with_weights, weights_from_settings
+from app.services.evaluation_queue import EvaluationQueue, TaskStatus
+from app.services.batch_pipeline import BatchEvaluationPipeline, BatchItem, JobTarget, MultiJobEvaluationPipeline
+from app.utils.logging_config import get_logger
 
 router = APIRouter()
+logger = get_logger(__name__)
 document_processor = DocumentProcessor()
 rag_engine = RAGEngine(embedding_model_name="embeddinggemma:300m", generation_model_name="gemma:4b")
+evaluation_queue = EvaluationQueue()
+batch_pipeline = BatchEvaluationPipeline(rag_engine, document_processor)
+multi_job_pipeline = MultiJobEvaluationPipeline(rag_engine)
 
-@router.post("/{job_id}/upload", response_model=CVUploadResponse)
+TASK_STREAM_INTERVAL = float(os.getenv("TASK_STREAM_INTERVAL", "0.5"))
+MAX_BATCH_FILES = int(os.getenv("MAX_BATCH_FILES", "500"))
+MAX_REEVALUATION_JOBS = int(os.getenv("MAX_REEVALUATION_JOBS", "50"))
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", "1048576"))  # 1MB
+UPLOAD_SPOOL_MAX_MEMORY = int(os.getenv("UPLOAD_SPOOL_MAX_MEMORY", "2097152"))  # 2MB
+
+class JobCandidate(EvaluationSchema):
+    # Only a pre-screen score so far; ranked by it until the LLM evaluation runs (see /promote)
+    is_provisional: bool = False
+
+@router.post("/{job_id}/upload", status_code=status.HTTP_202_ACCEPTED)
 async def upload_and_evaluate_cv(
     job_id: int,
     file: UploadFile = File(...),
+    bypass_cache: bool = Query(False, description="Regenerate LLM scores even if a cached response exists"),
     current_user: User = Depends(require_role(["admin", "recruiter", "hiring_manager"])),
     db: Session = Depends(get_db)
 ):
+    """
+    Accept a CV upload and queue it for evaluation.
+
+    Returns a task id immediately; poll GET /tasks/{task_id} or stream
+    GET /tasks/{task_id}/stream to follow the evaluation.
+    """
     job = db.query(Job).filter(
         Job.id == job_id,
         Job.company_id == current_user.company_id
@@ -32,86 +66,658 @@ async def upload_and_evaluate_cv(
             detail="Job not found"
         )
     
-    file_extension = os.path.splitext(file.filename)[1].lower()
-    if file_extension not in document_processor.supported_formats:
+    max_file_size = int(os.getenv("MAX_FILE_SIZE", "10485760"))  # 10MB
+    cv_file = await _spool_upload(file, max_file_size)
+    
+    task = evaluation_queue.submit(
+        job_id, current_user.company_id, file.filename, _process_cv_upload,
+        current_user.company_id, job_id, cv_file, file.filename, job.description, job.requirements,
+        use_cache=not bypass_cache
+    )
+    
+    return {
+        "message": "CV uploaded and queued for evaluation",
+        "task_id": task.id,
+        "status": task.status
+    }
+
+@router.post("/{job_id}/upload/batch", status_code=status.HTTP_202_ACCEPTED)
+async def upload_and_evaluate_cv_batch(
+    job_id: int,
+    files: List[UploadFile] = File(...),
+    bypass_cache: bool = Query(False, description="Regenerate LLM scores even if a cached response exists"),
+    prescreen_top_n: Optional[int] = Query(None, ge=0, description="Pre-screen the batch and LLM-evaluate at most this many CVs"),
+    prescreen_threshold: Optional[float] = Query(None, ge=0, le=100, description="Pre-screen the batch and LLM-evaluate only CVs scoring at least this"),
+    current_user: User = Depends(require_role(["admin", "recruiter", "hiring_manager"])),
+    db: Session = Depends(get_db)
+):
+    """
+    Accept several CVs (individual files and/or .zip archives) and evaluate them as one batch.
+
+    Returns a batch task id plus one task id per CV; each can be polled or streamed like a
+    single upload.
+    
+    With prescreen_top_n and/or prescreen_threshold, every CV first gets an embedding-only score
+    (weighted like the job's overall scores) and only the selected ones get the LLM evaluation. The others are saved with their provisional
+    score and can be promoted later.
+    """
+    job = db.query(Job).filter(
+        Job.id == job_id,
+        Job.company_id == current_user.company_id
+    ).first()
+    
+    if not job:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Unsupported file format. Supported formats: {', '.join(document_processor.supported_formats)}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
         )
     
     max_file_size = int(os.getenv("MAX_FILE_SIZE", "10485760"))  # 10MB
-    file_content = await file.read()
-    if len(file_content) > max_file_size:
+    upload_dir = os.getenv("UPLOAD_DIR", "./uploads")
+    os.makedirs(upload_dir, exist_ok=True)
+    
+    # Files are staged on disk because the extraction workers open them by path
+    cv_files = []
+    try:
+        for upload in files:
+            if os.path.splitext(upload.filename)[1].lower() == '.zip':
+                archive_file = await _spool_upload(upload, int(os.getenv("MAX_ARCHIVE_SIZE", str(max_file_size * 10))),
+                                                   check_format=False)
+                with archive_file:
+                    cv_files.extend(_extract_zip_members(archive_file, upload_dir, max_file_size,
+                                                         MAX_BATCH_FILES - len(cv_files)))
+            else:
+                file_path = os.path.join(upload_dir, f"{uuid.uuid4()}_{os.path.basename(upload.filename)}")
+                cv_files.append((file_path, upload.filename))
+                with await _spool_upload(upload, max_file_size) as cv_file, open(file_path, "wb") as buffer:
+                    shutil.copyfileobj(cv_file, buffer, UPLOAD_CHUNK_SIZE)
+            
+            if len(cv_files) > MAX_BATCH_FILES:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"Too many files in batch. Maximum is {MAX_BATCH_FILES}"
+                )
+        
+        if not cv_files:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No CV files found in upload"
+            )
+    except Exception:
+        for file_path, _ in cv_files:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+        raise
+    
+    file_tasks = []
+    for file_path, filename in cv_files:
+        task = evaluation_queue.register(job_id, current_user.company_id, filename)
+        file_tasks.append((task.id, file_path, filename))
+    
+    prescreen = None
+    if prescreen_top_n is not None or prescreen_threshold is not None:
+        prescreen = PrescreenPolicy(top_n=prescreen_top_n, threshold=prescreen_threshold,
+                                    weights=_job_weights(db, job_id))
+    
+    batch_task = evaluation_queue.submit(
+        job_id, current_user.company_id, f"{len(file_tasks)} files", _process_cv_batch,
+        current_user.company_id, job_id, file_tasks, job.description, job.requirements,
+        use_cache=not bypass_cache, prescreen=prescreen
+    )
+    
+    return {
+        "message": f"{len(file_tasks)} CVs uploaded and queued for evaluation",
+        "task_id": batch_task.id,
+        "status": batch_task.status,
+        "tasks": [{"task_id": task_id, "filename": filename} for task_id, _, filename in file_tasks]
+    }
+
+@router.post("/{evaluation_id}/reevaluate", status_code=status.HTTP_202_ACCEPTED)
+async def reevaluate_candidate(
+    evaluation_id: int,
+    job_ids: List[int] = Body(..., embed=True, description="Jobs to evaluate the candidate against"),
+    bypass_cache: bool = Query(False, description="Regenerate LLM scores even if a cached response exists"),
+    current_user: User = Depends(require_role(["admin", "recruiter", "hiring_manager"])),
+    db: Session = Depends(get_db)
+):
+    """
+    Evaluate the candidate of an existing evaluation against other jobs, without uploading the CV again.
+
+    The stored CV text, sections and chunk embeddings are reused, so each extra job only costs its
+    LLM scoring calls. Returns a task id for the whole request plus one task id per job; each can be
+    polled or streamed like an upload.
+    """
+    evaluation = db.query(Evaluation).join(Job).filter(
+        Evaluation.id == evaluation_id,
+        Job.company_id == current_user.company_id
+    ).first()
+    
+    if not evaluation:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Evaluation not found"
+        )
+    
+    job_ids = list(dict.fromkeys(job_ids))
+    if not job_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No job ids given"
+        )
+    if len(job_ids) > MAX_REEVALUATION_JOBS:
         raise HTTPException(
             status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail="File size too large"
+            detail=f"Too many jobs. Maximum is {MAX_REEVALUATION_JOBS}"
         )
     
-    upload_dir = os.getenv("UPLOAD_DIR", "./uploads")
-    os.makedirs(upload_dir, exist_ok=True)
+    jobs = {job.id: job for job in db.query(Job).filter(
+        Job.id.in_(job_ids),
+        Job.company_id == current_user.company_id
+    )}
+    missing = [job_id for job_id in job_ids if job_id not in jobs]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Jobs not found: {', '.join(map(str, missing))}"
+        )
+    
+    targets = []
+    job_tasks = []
+    for job_id in job_ids:
+        job = jobs[job_id]
+        task = evaluation_queue.register(job_id, current_user.company_id, evaluation.cv_filename)
+        targets.append(JobTarget(job_id=job_id, job_description=job.description, job_requirements=job.requirements))
+        job_tasks.append(task.id)
     
-    file_id = str(uuid.uuid4())
-    file_path = os.path.join(upload_dir, f"{file_id}_{file.filename}")
+    candidate_info = {'name': evaluation.candidate_name, 'email': evaluation.candidate_email}
+    reevaluation_task = evaluation_queue.submit(
+        evaluation.job_id, current_user.company_id, f"{evaluation.cv_filename} x {len(targets)} jobs",
+        _process_reevaluation, current_user.company_id, evaluation.cv_text, evaluation.cv_filename, candidate_info,
+        targets, job_tasks, use_cache=not bypass_cache
+    )
+    
+    return {
+        "message": f"Candidate queued for evaluation against {len(targets)} jobs",
+        "task_id": reevaluation_task.id,
+        "status": reevaluation_task.status,
+        "tasks": [{"task_id": task_id, "job_id": target.job_id} for task_id, target in zip(job_tasks, targets)]
+    }
+
+def _check_cv_file(filename: str, max_file_size: int, size: Optional[int] = None):
+    file_extension = os.path.splitext(filename)[1].lower()
+    if file_extension not in document_processor.supported_formats:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported file format for {filename}. Supported formats: {', '.join(document_processor.supported_formats)}"
+        )
+    if size is not None and size > max_file_size:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File size too large: {filename}"
+        )
+
+async def _spool_upload(upload: UploadFile, max_file_size: int, check_format: bool = True) -> SpooledTemporaryFile:
+    """
+    Copy an upload into a spooled temporary file in fixed-size chunks.
+
+    The size limit is enforced as bytes arrive, so an oversized upload is rejected without
+    being read in full. Small files stay in memory; larger ones roll over to a temp file.
+    """
+    if check_format:
+        _check_cv_file(upload.filename, max_file_size, upload.size)
+    elif upload.size is not None and upload.size > max_file_size:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File size too large: {upload.filename}"
+        )
     
-    with open(file_path, "wb") as buffer:
-        buffer.write(file_content)
+    spool = SpooledTemporaryFile(max_size=UPLOAD_SPOOL_MAX_MEMORY)
+    try:
+        size = 0
+        while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            if size > max_file_size:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"File size too large: {upload.filename}"
+                )
+            spool.write(chunk)
+    except Exception:
+        spool.close()
+        raise
     
+    spool.seek(0)
+    return spool
+
+def _extract_zip_members(archive_file: BinaryIO, upload_dir: str, max_file_size: int,
+                         max_files: int) -> List[Tuple[str, str]]:
+    """
+    Write the supported CV files in a zip archive to upload_dir. Other members are skipped.
+
+    Returns:
+        List of (file_path, filename) pairs
+    """
     try:
-        cv_text = await document_processor.extract_text_from_file(file_path)
-        cv_sections = document_processor.extract_cv_sections(cv_text)
-        candidate_info = document_processor.extract_candidate_info(cv_text)
-        
-        # Chunk the CV sections for better RAG processing using LangChain
-        cv_chunks = document_processor.chunk_cv_sections_with_langchain(cv_sections)
+        archive = zipfile.ZipFile(archive_file)
+    except zipfile.BadZipFile:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid zip archive"
+        )
+    
+    members = []
+    try:
+        with archive:
+            for info in archive.infolist():
+                # Keep only the base name so archive paths can't escape the upload directory
+                filename = os.path.basename(info.filename)
+                if info.is_dir() or not filename or filename.startswith('.'):
+                    continue
+                if os.path.splitext(filename)[1].lower() not in document_processor.supported_formats:
+                    continue
+                if len(members) >= max_files:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"Too many files in batch. Maximum is {MAX_BATCH_FILES}"
+                    )
+                _check_cv_file(filename, max_file_size, info.file_size)
+                
+                file_path = os.path.join(upload_dir, f"{uuid.uuid4()}_{filename}")
+                members.append((file_path, filename))
+                # Declared sizes can lie, so the limit is enforced on the decompressed bytes too
+                with archive.open(info) as source, open(file_path, "wb") as buffer:
+                    size = 0
+                    while chunk := source.read(UPLOAD_CHUNK_SIZE):
+                        size += len(chunk)
+                        if size > max_file_size:
+                            raise HTTPException(
+                                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                                detail=f"File size too large: {filename}"
+                            )
+                        buffer.write(chunk)
+    except Exception:
+        for file_path, _ in members:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+        raise
+    return members
+
+def _process_cv_batch(task_id: str, company_id: int, job_id: int, file_tasks: List[Tuple[str, str, str]],
+                      job_description: str, job_requirements: str, use_cache: bool = True,
+                      prescreen: Optional[PrescreenPolicy] = None):
+    """
+    Worker-side batch evaluation. Per-file progress is reported on each file's own task.
+    """
+    items = [BatchItem(file_path=file_path, filename=filename) for _, file_path, filename in file_tasks]
+    item_tasks = {id(item): file_task[0] for item, file_task in zip(items, file_tasks)}
+    
+    def on_stage(item: BatchItem, stage: str):
+        evaluation_queue.update(item_tasks[id(item)], status=TaskStatus.PROCESSING, stage=stage)
+    
+    def on_scored(item: BatchItem):
+        db = SessionLocal()
+        try:
+            db_evaluation = _save_evaluation(db, job_id, item.filename, item.cv_text, item.candidate_info, item.result)
+            if item.provisional:
+                get_provisional_store().add(db_evaluation.id, job_id, db_evaluation.overall_score)
+            evaluation_queue.update(
+                item_tasks[id(item)], status=TaskStatus.COMPLETED, stage=None,
+                evaluation_id=db_evaluation.id, overall_score=db_evaluation.overall_score,
+                provisional=item.provisional
+            )
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+    
+    def on_error(item: BatchItem):
+        evaluation_queue.update(item_tasks[id(item)], status=TaskStatus.FAILED,
+                                error=f"Error processing CV: {item.error}")
+    
+    try:
+        batch_pipeline.run(
+            items, ShardKey(company_id=company_id, job_id=job_id), job_description, job_requirements,
+            on_stage=on_stage, on_scored=on_scored, on_error=on_error, use_cache=use_cache, prescreen=prescreen
+        )
+    except Exception as e:
+        # Don't leave per-file tasks stuck if the batch itself breaks
+        for file_task_id, _, _ in file_tasks:
+            task = evaluation_queue.get(file_task_id)
+            if task and task.status not in TaskStatus.TERMINAL:
+                evaluation_queue.update(file_task_id, status=TaskStatus.FAILED, error=f"Error processing CV: {str(e)}")
+        raise
+    finally:
+        for _, file_path, _ in file_tasks:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+    
+    return {}
+
+def _process_cv_upload(task_id: str, company_id: int, job_id: int, cv_file: BinaryIO, filename: str,
+                       job_description: str, job_requirements: str, use_cache: bool = True):
+    """
+    Worker-side CV evaluation. Runs on the evaluation queue's thread pool, so it
+    uses its own database session instead of the request-scoped one.
+    """
+    db = SessionLocal()
+    try:
+        evaluation_queue.update(task_id, stage="extracting")
+        parsed = _parse_cv_upload(cv_file, filename)
+        cv_text = parsed['cv_text']
+        cv_sections = parsed['cv_sections']
+        candidate_info = parsed['candidate_info']
         
-        # Add chunks to the RAG engine for retrieval if needed
-        rag_engine.add_cv_chunks(cv_chunks)
+        # Chunk the CV sections with LangChain and add them to the job's shard for retrieval
+        evaluation_queue.update(task_id, stage="indexing")
+        partition = ShardKey(company_id=company_id, job_id=job_id)
+        candidate_id = candidate_id_for_text(cv_text)
+        rag_engine.add_cv_sections(cv_sections, partition, candidate_id)
         
-        evaluation_result = rag_engine.evaluate_cv_with_rag_context(
-            cv_sections, job.description, job.requirements
-        )
+        evaluation_queue.update(task_id, stage="scoring")
+        evaluation_result = asyncio.run(rag_engine.evaluate_cv_with_rag_context_async(
+            cv_sections, job_description, job_requirements, partition, candidate_id, use_cache=use_cache
+        ))
         
-        # Ensure candidate_name is not None
-        candidate_name = candidate_info.get('name')
-        if not candidate_name or candidate_name.strip() == '':
-            candidate_name = 'Unknown Candidate'
+        db_evaluation = _save_evaluation(db, job_id, filename, cv_text, candidate_info, evaluation_result)
         
-        db_evaluation = Evaluation(
-            job_id=job_id,
-            candidate_name=candidate_name,
-            candidate_email=candidate_info.get('email'),
-            cv_filename=file.filename,
-            cv_text=cv_text,
-            overall_score=evaluation_result.overall_score,
-            skills_score=evaluation_result.skills_score,
-            experience_score=evaluation_result.experience_score,
-            education_score=evaluation_result.education_score,
-            feedback=evaluation_result.feedback,
-            strengths='\n'.join(evaluation_result.strengths),
-            weaknesses='\n'.join(evaluation_result.weaknesses),
-            recommendations='\n'.join(evaluation_result.recommendations)
+        return {
+            "evaluation_id": db_evaluation.id,
+            "overall_score": db_evaluation.overall_score
+        }
+    
+    except Exception as e:
+        db.rollback()
+        raise Exception(f"Error processing CV: {str(e)}")
+    finally:
+        db.close()
+        cv_file.close()
+
+def _process_reevaluation(task_id: str, company_id: int, cv_text: str, filename: str, candidate_info: dict,
+                          targets: List[JobTarget], job_tasks: List[str], use_cache: bool = True):
+    """
+    Worker-side evaluation of a stored CV against several jobs. Per-job progress is reported on
+    each job's own task.
+    """
+    target_tasks = {id(target): job_task_id for target, job_task_id in zip(targets, job_tasks)}
+    
+    def on_stage(target: JobTarget, stage: str):
+        evaluation_queue.update(target_tasks[id(target)], status=TaskStatus.PROCESSING, stage=stage)
+    
+    def on_scored(target: JobTarget):
+        db = SessionLocal()
+        try:
+            db_evaluation = _save_evaluation(db, target.job_id, filename, cv_text, candidate_info, target.result)
+            evaluation_queue.update(
+                target_tasks[id(target)], status=TaskStatus.COMPLETED, stage=None,
+                evaluation_id=db_evaluation.id, overall_score=db_evaluation.overall_score
+            )
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+    
+    def on_error(target: JobTarget):
+        evaluation_queue.update(target_tasks[id(target)], status=TaskStatus.FAILED,
+                                error=f"Error evaluating CV: {target.error}")
+    
+    try:
+        # Sections were stored when the CV was uploaded; older evaluations are re-sectioned from the text
+        parsed = rag_engine.cv_store.get_text(cv_text) if rag_engine.cv_store is not None else None
+        cv_sections = parsed['cv_sections'] if parsed else document_processor.extract_cv_sections(cv_text)
+        multi_job_pipeline.run(
+            cv_sections, candidate_id_for_text(cv_text), company_id, targets,
+            on_stage=on_stage, on_scored=on_scored, on_error=on_error, use_cache=use_cache
         )
+    except Exception as e:
+        for job_task_id in job_tasks:
+            task = evaluation_queue.get(job_task_id)
+            if task and task.status not in TaskStatus.TERMINAL:
+                evaluation_queue.update(job_task_id, status=TaskStatus.FAILED, error=f"Error evaluating CV: {str(e)}")
+        raise
+    
+    return {}
+
+def _parse_cv_upload(cv_file: BinaryIO, filename: str) -> dict:
+    """
+    Extract text, sections and candidate info from an upload, or reuse them if the file
+    (or a file with the same text) was parsed before.
+    """
+    cv_store = rag_engine.cv_store
+    upload_hash = None
+    if cv_store is not None:
+        upload_hash = file_hash(cv_file, filename)
+        parsed = cv_store.get_file(upload_hash)
+        if parsed is not None:
+            return parsed
+    
+    cv_text = asyncio.run(document_processor.extract_text_from_stream(cv_file, filename))
+    parsed = {
+        'cv_text': cv_text,
+        'cv_sections': document_processor.extract_cv_sections(cv_text),
+        'candidate_info': document_processor.extract_candidate_info(cv_text)
+    }
+    return cv_store.put(upload_hash, parsed) if cv_store is not None else parsed
+
+def _save_evaluation(db: Session, job_id: int, filename: str, cv_text: str, candidate_info: dict,
+                     evaluation_result) -> Evaluation:
+    # Ensure candidate_name is not None
+    candidate_name = candidate_info.get('name')
+    if not candidate_name or candidate_name.strip() == '':
+        candidate_name = 'Unknown Candidate'
+    
+    db_evaluation = Evaluation(
+        job_id=job_id,
+        candidate_name=candidate_name,
+        candidate_email=candidate_info.get('email'),
+        cv_filename=filename,
+        cv_text=cv_text,
+        **_result_fields(evaluation_result, _job_weights(db, job_id))
+    )
+    
+    db.add(db_evaluation)
+    db.commit()
+    db.refresh(db_evaluation)
+    return db_evaluation
+
+def _result_fields(evaluation_result, weights: EvaluationWeights) -> dict:
+    # The overall score is recomputed from the rounded section scores, as re-ranking does in SQL
+    return {
+        'overall_score': weights.overall_score(evaluation_result.skills_score, evaluation_result.experience_score,
+                                               evaluation_result.education_score),
+        'skills_score': evaluation_result.skills_score,
+        'experience_score': evaluation_result.experience_score,
+        'education_score': evaluation_result.education_score,
+        'feedback': evaluation_result.feedback,
+        'strengths': '\n'.join(evaluation_result.strengths),
+        'weaknesses': '\n'.join(evaluation_result.weaknesses),
+        'recommendations': '\n'.join(evaluation_result.recommendations)
+    }
+
+def _job_weights(db: Session, job_id: int) -> EvaluationWeights:
+    """
+    Weights of the job's overall scores: its own, else its company's, else the defaults.
+    """
+    settings = db.query(Company.settings).join(Job, Job.company_id == Company.id).filter(Job.id == job_id).scalar()
+    return weights_from_settings(settings, job_id)
+
+def _rescore_evaluations(db: Session, job_ids, weights: EvaluationWeights) -> int:
+    """
+    Recompute the overall score of every evaluation of the jobs from its stored section scores,
+    in a single UPDATE. No evaluation is run again.
+
+    Args:
+        db: Session; the caller commits
+        job_ids: Job ids, or a select of them
+        weights: Weights to apply
+
+    Returns:
+        Number of evaluations updated
+    """
+    return db.query(Evaluation).filter(Evaluation.job_id.in_(job_ids)).update(
+        {Evaluation.overall_score: weights.score_expression(
+            Evaluation.skills_score, Evaluation.experience_score, Evaluation.education_score
+        )},
+        synchronize_session=False
+    )
+
+def _process_promotion(task_id: str, company_id: int, evaluation_id: int, job_id: int, cv_text: str,
+                       job_description: str, job_requirements: str, use_cache: bool = True):
+    """
+    Worker-side LLM evaluation of a provisional evaluation. The evaluation is updated in place.
+    """
+    db = SessionLocal()
+    try:
+        evaluation_queue.update(task_id, stage="indexing")
+        parsed = rag_engine.cv_store.get_text(cv_text) if rag_engine.cv_store is not None else None
+        cv_sections = parsed['cv_sections'] if parsed else document_processor.extract_cv_sections(cv_text)
+        partition = ShardKey(company_id=company_id, job_id=job_id)
+        candidate_id = candidate_id_for_text(cv_text)
+        # Pre-screened CVs are already indexed; this only matters if the shard was rebuilt since
+        rag_engine.add_cv_sections(cv_sections, partition, candidate_id)
+        
+        evaluation_queue.update(task_id, stage="scoring")
+        evaluation_result = asyncio.run(rag_engine.evaluate_cv_with_rag_context_async(
+            cv_sections, job_description, job_requirements, partition, candidate_id, use_cache=use_cache
+        ))
         
-        db.add(db_evaluation)
+        db_evaluation = db.query(Evaluation).filter(Evaluation.id == evaluation_id).first()
+        if not db_evaluation:
+            raise Exception("Evaluation was deleted")
+        for name, value in _result_fields(evaluation_result, _job_weights(db, job_id)).items():
+            setattr(db_evaluation, name, value)
         db.commit()
-        db.refresh(db_evaluation)
+        get_provisional_store().remove(evaluation_id)
         
-        return CVUploadResponse(
-            message="CV uploaded and evaluated successfully",
-            evaluation_id=db_evaluation.id,
-            overall_score=db_evaluation.overall_score
-        )
+        return {
+            "evaluation_id": evaluation_id,
+            "overall_score": db_evaluation.overall_score
+        }
     
     except Exception as e:
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        db.rollback()
+        raise Exception(f"Error evaluating CV: {str(e)}")
+    finally:
+        db.close()
+
+def _get_company_task(task_id: str, current_user: User):
+    task = evaluation_queue.get(task_id)
+    if not task or task.company_id != current_user.company_id:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error processing CV: {str(e)}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Evaluation task not found"
         )
-    finally:
-        if os.path.exists(file_path):
-            os.remove(file_path)
+    return task
+
+@router.get("/tasks/{task_id}")
+async def get_evaluation_task(
+    task_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    return _get_company_task(task_id, current_user).to_dict()
+
+@router.get("/tasks/{task_id}/stream")
+async def stream_evaluation_task(
+    task_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Stream task status changes as server-sent events until the task finishes.
+    """
+    _get_company_task(task_id, current_user)
+    
+    async def event_stream():
+        last_version = -1
+        while True:
+            task = evaluation_queue.get(task_id)
+            if not task:
+                break
+            if task.version != last_version:
+                last_version = task.version
+                yield f"data: {json.dumps(task.to_dict())}\n\n"
+            if task.status in TaskStatus.TERMINAL:
+                break
+            await asyncio.sleep(TASK_STREAM_INTERVAL)
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+@router.get("/weights")
+async def get_evaluation_weights(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    The company's evaluation weights and the jobs that override them.
+    """
+    company = db.query(Company).filter(Company.id == current_user.company_id).first()
+    return {
+        "evaluation_weights": weights_from_settings(company.settings).to_dict(),
+        "job_evaluation_weights": job_weight_overrides(company.settings)
+    }
+
+@router.put("/weights")
+async def update_evaluation_weights(
+    weights: Dict[str, float] = Body(..., embed=True, description="Weight per dimension (skills, experience, education)"),
+    current_user: User = Depends(require_role(["admin"])),
+    db: Session = Depends(get_db)
+):
+    """
+    Change the company's evaluation weights and re-rank its evaluations.
+
+    Overall scores of every job without its own weights are recomputed from the stored section
+    scores in one UPDATE; no CV is evaluated again. Weights are normalized to sum to 1.
+    """
+    try:
+        new_weights = EvaluationWeights.from_dict(weights)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    company = db.query(Company).filter(Company.id == current_user.company_id).first()
+    company.settings = settings_with_weights(company.settings, new_weights)
+    job_ids = db.query(Job.id).filter(
+        Job.company_id == company.id,
+        Job.id.notin_(list(job_weight_overrides(company.settings)))
+    ).scalar_subquery()
+    updated = _rescore_evaluations(db, job_ids, new_weights)
+    db.commit()
+    
+    return {"evaluation_weights": new_weights.to_dict(), "updated_evaluations": updated}
+
+@router.put("/job/{job_id}/weights")
+async def update_job_evaluation_weights(
+    job_id: int,
+    weights: Optional[Dict[str, float]] = Body(None, embed=True, description="Weight per dimension; null to use the company's"),
+    current_user: User = Depends(require_role(["admin"])),
+    db: Session = Depends(get_db)
+):
+    """
+    Give a job its own evaluation weights, or go back to the company's with null, and re-rank
+    the job's evaluations in one UPDATE.
+    """
+    job = db.query(Job).filter(
+        Job.id == job_id,
+        Job.company_id == current_user.company_id
+    ).first()
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    
+    try:
+        new_weights = EvaluationWeights.from_dict(weights) if weights is not None else None
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    company = db.query(Company).filter(Company.id == job.company_id).first()
+    company.settings = settings_with_weights(company.settings, new_weights, job_id)
+    effective = weights_from_settings(company.settings, job_id)
+    updated = _rescore_evaluations(db, [job_id], effective)
+    db.commit()
+    
+    return {"evaluation_weights": effective.to_dict(), "updated_evaluations": updated}
 
 @router.get("/{evaluation_id}", response_model=EvaluationSchema)
 async def get_evaluation(
@@ -132,7 +738,7 @@ async def get_evaluation(
     
     return evaluation
 
-@router.get("/job/{job_id}/candidates", response_model=List[EvaluationSchema])
+@router.get("/job/{job_id}/candidates", response_model=List[JobCandidate])
 async def get_job_candidates(
     job_id: int,
     current_user: User = Depends(get_current_user),
@@ -149,15 +755,104 @@ async def get_job_candidates(
             detail="Job not found"
         )
     
+    # Served by the (job_id, overall_score) index
     evaluations = db.query(Evaluation).filter(
         Evaluation.job_id == job_id
     ).order_by(Evaluation.overall_score.desc()).all()
     
+    # Pre-screen scores aren't comparable to LLM scores, so the list says which is which
+    provisional_ids = {row['evaluation_id'] for row in get_provisional_store().list_job(job_id)}
+    for evaluation in evaluations:
+        evaluation.is_provisional = evaluation.id in provisional_ids
+    
     return evaluations
 
+@router.get("/job/{job_id}/provisional")
+async def get_job_provisional_evaluations(
+    job_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Evaluations of the job that only have a pre-screen score, best first.
+    """
+    job = db.query(Job).filter(
+        Job.id == job_id,
+        Job.company_id == current_user.company_id
+    ).first()
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    
+    return get_provisional_store().list_job(job_id)
+
+@router.post("/{evaluation_id}/promote", status_code=status.HTTP_202_ACCEPTED)
+async def promote_evaluation(
+    evaluation_id: int,
+    bypass_cache: bool = Query(False, description="Regenerate LLM scores even if a cached response exists"),
+    current_user: User = Depends(require_role(["admin", "recruiter", "hiring_manager"])),
+    db: Session = Depends(get_db)
+):
+    """
+    Queue the full LLM evaluation of a pre-screened candidate. The evaluation keeps its id and is
+    updated in place once scored.
+    """
+    evaluation = db.query(Evaluation).join(Job).filter(
+        Evaluation.id == evaluation_id,
+        Job.company_id == current_user.company_id
+    ).first()
+    
+    if not evaluation:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Evaluation not found"
+        )
+    
+    if not get_provisional_store().is_provisional(evaluation_id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Evaluation already has a full evaluation"
+        )
+    
+    job = db.query(Job).filter(Job.id == evaluation.job_id).first()
+    task = evaluation_queue.submit(
+        evaluation.job_id, current_user.company_id, evaluation.cv_filename, _process_promotion,
+        current_user.company_id, evaluation_id, evaluation.job_id, evaluation.cv_text, job.description,
+        job.requirements, use_cache=not bypass_cache
+    )
+    
+    return {
+        "message": "Candidate queued for full evaluation",
+        "task_id": task.id,
+        "status": task.status
+    }
+
+def _delete_candidate_chunks(company_id: int, job_id: int, cv_text: str):
+    """
+    Remove a CV's chunks from the job's shard of the vector store.
+    """
+    try:
+        get_vector_store().delete(ShardKey(company_id=company_id, job_id=job_id), [candidate_id_for_text(cv_text)])
+    except Exception as e:
+        logger.warning(f"Could not delete vector store chunks for job {job_id}: {e}")
+
+def _delete_stored_cv(cv_text: str):
+    """
+    Remove a CV's stored text, candidate details and chunk embeddings from the CV content store.
+    """
+    try:
+        if rag_engine.cv_store is not None:
+            rag_engine.cv_store.delete(cv_text)
+    except Exception as e:
+        logger.warning(f"Could not delete stored CV: {e}")
+
 @router.delete("/{evaluation_id}")
 async def delete_evaluation(
     evaluation_id: int,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(require_role(["admin", "recruiter"])),
     db: Session = Depends(get_db)
 ):
@@ -172,7 +867,19 @@ async def delete_evaluation(
             detail="Evaluation not found"
         )
     
+    job_id, cv_text = evaluation.job_id, evaluation.cv_text
     db.delete(evaluation)
     db.commit()
+    get_provisional_store().remove(evaluation_id)
+    
+    # Chunks are shared by every evaluation of the same CV for the job; drop them with the last one
+    if cv_text and not db.query(Evaluation.id).filter(
+        Evaluation.job_id == job_id,
+        Evaluation.cv_text == cv_text
+    ).first():
+        background_tasks.add_task(_delete_candidate_chunks, current_user.company_id, job_id, cv_text)
+        # The stored parse is shared by every job; keep it while any evaluation still uses the CV
+        if not db.query(Evaluation.id).filter(Evaluation.cv_text == cv_text).first():
+            background_tasks.add_task(_delete_stored_cv, cv_text)
     
     return {"message": "Evaluation deleted successfully"}
\ No newline at end of file
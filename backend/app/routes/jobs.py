@@ -1,17 +1,44 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.database.config import get_db
 from app.models.models import Job, User
 from app.models.schemas import JobCreate, Job as JobSchema
 from app.auth.auth import get_current_user, require_role
 from app.utils.exceptions import NotFoundException, AuthorizationException
+from app.utils.logging_config import get_logger
+from app.services.job_embeddings import get_job_embedding_store, refresh_job_embeddings
+from app.services.vector_store import ShardKey, get_vector_store
+from app.services.prescreen import get_provisional_store
 
 router = APIRouter()
+logger = get_logger(__name__)
+
+def _refresh_job_embeddings(job_id: int, description: str, requirements: str):
+    """
+    Precompute the job's retrieval query embeddings so uploads don't embed the job again.
+    """
+    try:
+        refresh_job_embeddings(job_id, description, requirements)
+    except Exception as e:
+        # Not fatal: evaluations compute and store them on first use
+        logger.warning(f"Could not precompute embeddings for job {job_id}: {e}")
+
+def _delete_job_vectors(company_id: int, job_id: int):
+    """
+    Delete the job's shard of the vector store, its precomputed embeddings and its provisional evaluations.
+    """
+    try:
+        get_vector_store().delete(ShardKey(company_id=company_id, job_id=job_id))
+        get_job_embedding_store().invalidate(job_id)
+        get_provisional_store().remove_job(job_id)
+    except Exception as e:
+        logger.warning(f"Could not delete vector store chunks for job {job_id}: {e}")
 
 @router.post("/", response_model=JobSchema, summary="Create a new job posting")
 async def create_job(
     job_data: JobCreate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(require_role(["admin", "recruiter", "hiring_manager"])),
     db: Session = Depends(get_db)
 ):
@@ -26,6 +53,7 @@ async def create_job(
     
     Only admin, recruiter, and hiring_manager roles can create jobs.
     Job will be associated with the current user's company.
+    The job's retrieval query embeddings are computed in the background after the response.
     """
     db_job = Job(
         title=job_data.title,
@@ -41,6 +69,8 @@ async def create_job(
     db.commit()
     db.refresh(db_job)
     
+    background_tasks.add_task(_refresh_job_embeddings, db_job.id, db_job.description, db_job.requirements)
+    
     return db_job
 
 @router.get("/", response_model=List[JobSchema], summary="Get all jobs for current user's company")
@@ -92,6 +122,7 @@ async def get_job(
 async def update_job(
     job_id: int,
     job_data: JobCreate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(require_role(["admin", "recruiter", "hiring_manager"])),
     db: Session = Depends(get_db)
 ):
@@ -103,6 +134,7 @@ async def update_job(
     
     Only admin, recruiter, and hiring_manager roles can update jobs.
     User can only update jobs that belong to their company.
+    Previously computed job embeddings are discarded and recomputed in the background.
     """
     job = db.query(Job).filter(
         Job.id == job_id,
@@ -121,11 +153,16 @@ async def update_job(
     db.commit()
     db.refresh(job)
     
+    # Embeddings of the previous texts must not be used for the new ones
+    get_job_embedding_store().invalidate(job.id)
+    background_tasks.add_task(_refresh_job_embeddings, job.id, job.description, job.requirements)
+    
     return job
 
 @router.delete("/{job_id}", summary="Delete a job posting")
 async def delete_job(
     job_id: int,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(require_role(["admin", "recruiter"])),
     db: Session = Depends(get_db)
 ):
@@ -138,7 +175,8 @@ async def delete_job(
     User can only delete jobs that belong to their company.
     
     Note: This is a soft delete - the job is marked as inactive
-    but not permanently removed from the database.
+    but not permanently removed from the database. The CV chunks
+    indexed for the job are deleted from the vector store.
     """
     job = db.query(Job).filter(
         Job.id == job_id,
@@ -151,4 +189,6 @@ async def delete_job(
     job.is_active = False
     db.commit()
     
+    background_tasks.add_task(_delete_job_vectors, job.company_id, job.id)
+    
     return {"message": "Job deleted successfully"}
\ No newline at end of file
@@ -0,0 +1,280 @@
+import os
+import asyncio
+from concurrent.futures import as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+from .document_processor import DocumentProcessor, discard_extraction_pool, get_extraction_pool, parse_cv_file
+from .rag_engine import RAGEngine, EvaluationResult
+from .vector_store import ShardKey, candidate_id_for_text
+from .cv_store import file_hash_for_path
+from .prescreen import PrescreenPolicy
+
+
+@dataclass
+class BatchItem:
+    file_path: str
+    filename: str
+    file_hash: Optional[str] = None
+    cv_text: Optional[str] = None
+    cv_sections: Optional[Dict[str, str]] = None
+    candidate_info: Optional[Dict[str, Optional[str]]] = None
+    candidate_id: Optional[str] = None
+    result: Optional[EvaluationResult] = None
+    # Set when result is a pre-screen score that skipped the LLM evaluation
+    provisional: bool = False
+    error: Optional[str] = None
+
+
+class BatchEvaluationPipeline:
+    """
+    Staged evaluation of many CVs uploaded for the same job.
+
+    1. Extraction runs in a process pool. Files already in the CV store are not parsed again.
+    2. CVs not yet in the job's shard are chunked, their new chunks are embedded together, and
+       everything is written to the shard in one call.
+    3. Optionally, every CV is pre-screened with embedding similarity only, and only the CVs
+       chosen by the PrescreenPolicy go on. The others keep their provisional result.
+    4. Scoring runs with at most scoring_concurrency CVs in flight.
+
+    A failure in one file only fails that file. Progress is reported per file through callbacks.
+    """
+
+    def __init__(self, rag_engine: RAGEngine, document_processor: DocumentProcessor,
+                 scoring_concurrency: Optional[int] = None):
+        self.rag_engine = rag_engine
+        self.document_processor = document_processor
+        self.scoring_concurrency = scoring_concurrency or int(os.getenv("BATCH_SCORING_CONCURRENCY", "4"))
+
+    def run(self, items: List[BatchItem], partition: ShardKey, job_description: str, job_requirements: str,
+            on_stage: Optional[Callable[[BatchItem, str], None]] = None,
+            on_scored: Optional[Callable[[BatchItem], None]] = None,
+            on_error: Optional[Callable[[BatchItem], None]] = None,
+            use_cache: bool = True, prescreen: Optional[PrescreenPolicy] = None) -> List[BatchItem]:
+        """
+        Evaluate every item in the batch.
+
+        Args:
+            items: Files to evaluate
+            partition: Company/job shard the CVs are indexed in
+            job_description: Job description
+            job_requirements: Job requirements
+            on_stage: Called with (item, stage) when an item enters a new stage
+            on_scored: Called once an item has been scored; may persist the result
+            on_error: Called once an item has failed; item.error holds the reason
+            use_cache: Set to False to force fresh generations even if the response cache is enabled
+            prescreen: Pre-screen the batch and only LLM-score the CVs the policy selects
+
+        Returns:
+            The items, with either result or error set
+        """
+        on_stage = on_stage or (lambda item, stage: None)
+        on_scored = on_scored or (lambda item: None)
+        on_error = on_error or (lambda item: None)
+
+        def fail(item: BatchItem, error: Exception):
+            item.error = str(error)
+            on_error(item)
+
+        extracted = self._extract(items, on_stage, fail)
+
+        try:
+            for item in extracted:
+                on_stage(item, "indexing")
+            self.rag_engine.add_cv_sections_batch([(item.candidate_id, item.cv_sections) for item in extracted],
+                                                  partition)
+        except Exception as e:
+            for item in extracted:
+                fail(item, e)
+            return items
+
+        if prescreen is not None and extracted:
+            extracted = self._prescreen(extracted, partition, job_description, job_requirements, prescreen,
+                                        on_stage, on_scored, fail)
+
+        asyncio.run(self._score(extracted, partition, job_description, job_requirements,
+                                on_stage, on_scored, fail, use_cache))
+        return items
+
+    def _prescreen(self, items: List[BatchItem], partition: ShardKey, job_description: str, job_requirements: str,
+                   prescreen: PrescreenPolicy, on_stage, on_scored, fail) -> List[BatchItem]:
+        """
+        Give the items the policy doesn't select their provisional result.
+
+        Returns:
+            The items to evaluate fully
+        """
+        for item in items:
+            on_stage(item, "prescreening")
+        try:
+            results = self.rag_engine.prescreen(partition, job_description, job_requirements,
+                                                [(item.candidate_id, item.cv_sections) for item in items])
+        except Exception:
+            # Pre-screening only saves LLM calls; without it every CV is evaluated fully
+            return items
+
+        selected = prescreen.select([
+            prescreen.weights.overall_score(result.skills_score, result.experience_score, result.education_score)
+            for result in results
+        ])
+        remaining = []
+        for index, (item, result) in enumerate(zip(items, results)):
+            if index in selected:
+                remaining.append(item)
+                continue
+            item.result = result
+            item.provisional = True
+            try:
+                on_scored(item)
+            except Exception as e:
+                fail(item, e)
+        return remaining
+
+    def _extract(self, items: List[BatchItem], on_stage, fail) -> List[BatchItem]:
+        cv_store = self.rag_engine.cv_store
+        pool = get_extraction_pool()
+        futures = {}
+        extracted = []
+        for item in items:
+            on_stage(item, "extracting")
+            if cv_store is not None:
+                try:
+                    item.file_hash = file_hash_for_path(item.file_path, item.filename)
+                    parsed = cv_store.get_file(item.file_hash)
+                except Exception as e:
+                    fail(item, e)
+                    continue
+                if parsed is not None:
+                    self._set_parsed(item, parsed)
+                    extracted.append(item)
+                    continue
+            futures[pool.submit(parse_cv_file, item.file_path, self.document_processor.extraction_timeout)] = item
+
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                parsed = future.result()
+                if cv_store is not None:
+                    parsed = cv_store.put(item.file_hash, parsed)
+                self._set_parsed(item, parsed)
+                extracted.append(item)
+            except Exception as e:
+                if isinstance(e, BrokenProcessPool):
+                    discard_extraction_pool(pool)
+                fail(item, e)
+
+        # Keep upload order for indexing and scoring
+        order = {id(item): index for index, item in enumerate(items)}
+        return sorted(extracted, key=lambda item: order[id(item)])
+
+    @staticmethod
+    def _set_parsed(item: BatchItem, parsed: Dict):
+        item.cv_text = parsed['cv_text']
+        item.cv_sections = parsed['cv_sections']
+        item.candidate_info = parsed['candidate_info']
+        item.candidate_id = candidate_id_for_text(item.cv_text)
+
+    async def _score(self, items: List[BatchItem], partition: ShardKey, job_description: str,
+                     job_requirements: str, on_stage, on_scored, fail, use_cache: bool):
+        semaphore = asyncio.Semaphore(self.scoring_concurrency)
+
+        async def score(item: BatchItem):
+            async with semaphore:
+                try:
+                    on_stage(item, "scoring")
+                    item.result = await self.rag_engine.evaluate_cv_with_rag_context_async(
+                        item.cv_sections, job_description, job_requirements, partition, item.candidate_id,
+                        use_cache=use_cache
+                    )
+                    await asyncio.to_thread(on_scored, item)
+                except Exception as e:
+                    await asyncio.to_thread(fail, item, e)
+
+        await asyncio.gather(*(score(item) for item in items))
+
+
+@dataclass
+class JobTarget:
+    job_id: int
+    job_description: str
+    job_requirements: str
+    result: Optional[EvaluationResult] = None
+    error: Optional[str] = None
+
+
+class MultiJobEvaluationPipeline:
+    """
+    Evaluation of one already-extracted CV against several jobs of the same company.
+
+    1. The CV is added to each job's shard that doesn't hold it yet. Chunks and embeddings come from
+       the CV store, so at most the first job needs an embedding call.
+    2. Retrieval for every job runs as one batched search over the candidate's chunks, with the
+       jobs' stored query embeddings.
+    3. Scoring for all jobs shares one limit of max_llm_concurrency generation calls in flight.
+
+    A failure while scoring one job only fails that job. Progress is reported per job through callbacks.
+    """
+
+    def __init__(self, rag_engine: RAGEngine):
+        self.rag_engine = rag_engine
+
+    def run(self, cv_sections: Dict[str, str], candidate_id: str, company_id: int, targets: List[JobTarget],
+            on_stage: Optional[Callable[[JobTarget, str], None]] = None,
+            on_scored: Optional[Callable[[JobTarget], None]] = None,
+            on_error: Optional[Callable[[JobTarget], None]] = None,
+            use_cache: bool = True) -> List[JobTarget]:
+        """
+        Evaluate the CV against every target job.
+
+        Args:
+            cv_sections: Sections of the CV
+            candidate_id: Candidate id of the CV text
+            company_id: Company the jobs belong to
+            targets: Jobs to evaluate against
+            on_stage: Called with (target, stage) when a job enters a new stage
+            on_scored: Called once a job has been scored; may persist the result
+            on_error: Called once a job has failed; target.error holds the reason
+            use_cache: Set to False to force fresh generations even if the response cache is enabled
+
+        Returns:
+            The targets, with either result or error set
+        """
+        on_stage = on_stage or (lambda target, stage: None)
+        on_scored = on_scored or (lambda target: None)
+        on_error = on_error or (lambda target: None)
+
+        def fail(target: JobTarget, error: Exception):
+            target.error = str(error)
+            on_error(target)
+
+        jobs = [(ShardKey(company_id=company_id, job_id=target.job_id), target.job_description,
+                 target.job_requirements) for target in targets]
+        try:
+            for target, (partition, _, _) in zip(targets, jobs):
+                on_stage(target, "indexing")
+                self.rag_engine.add_cv_sections(cv_sections, partition, candidate_id)
+            contexts = self.rag_engine.retrieve_rag_contexts(cv_sections, jobs, candidate_id)
+        except Exception as e:
+            for target in targets:
+                fail(target, e)
+            return targets
+
+        asyncio.run(self._score(cv_sections, targets, contexts, on_stage, on_scored, fail, use_cache))
+        return targets
+
+    async def _score(self, cv_sections: Dict[str, str], targets: List[JobTarget], contexts, on_stage, on_scored,
+                     fail, use_cache: bool):
+        semaphore = asyncio.Semaphore(self.rag_engine.max_llm_concurrency)
+
+        async def score(target: JobTarget, rag_context):
+            try:
+                on_stage(target, "scoring")
+                target.result = await self.rag_engine.score_with_context_async(
+                    cv_sections, target.job_description, target.job_requirements, rag_context, semaphore,
+                    use_cache=use_cache
+                )
+                await asyncio.to_thread(on_scored, target)
+            except Exception as e:
+                await asyncio.to_thread(fail, target, e)
+
+        await asyncio.gather(*(score(target, rag_context) for target, rag_context in zip(targets, contexts)))
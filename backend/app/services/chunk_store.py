@@ -0,0 +1,253 @@
+import json
+from array import array
+from typing import Callable, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+# Metadata keys stored as typed columns: (metadata key, column name, dtype). String values are
+# stored as codes into vocabularies kept by the owner of the columns (see CODED_KEYS).
+METADATA_COLUMNS = (
+    ('section', 'sections', 'int16'),
+    ('chunk_id', 'chunk_ids', 'int32'),
+    ('total_chunks', 'total_chunks', 'int32'),
+    ('candidate_id', 'candidate_codes', 'int32'),
+    ('company_id', 'company_ids', 'int64'),
+    ('job_id', 'job_ids', 'int64'),
+)
+CODED_KEYS = ('section', 'candidate_id')
+# Every column, including the bitmask of which METADATA_COLUMNS keys a row's metadata has
+COLUMNS = tuple((name, dtype) for _, name, dtype in METADATA_COLUMNS) + (('fields', 'uint8'),)
+# Column value of a key that is None or absent; the fields bitmask tells the two apart
+MISSING = -1
+TYPECODES = {'int16': 'h', 'int32': 'i', 'int64': 'q', 'uint8': 'B', 'uint64': 'Q'}
+WRITE_BLOCK_BYTES = 16 * 1024 * 1024
+
+
+def _encode(document: Dict, encoders: Dict[str, Callable[[str], int]]) -> Tuple[bytes, List[int], bytes]:
+    """
+    Split a document into its UTF-8 text, column values (ending with the fields bitmask) and
+    a JSON record of the metadata that doesn't fit a column (empty if there is none).
+    """
+    metadata = document['metadata']
+    values = []
+    fields = 0
+    extra = {}
+    for bit, (key, _, dtype) in enumerate(METADATA_COLUMNS):
+        value = MISSING
+        if key in metadata:
+            raw = metadata[key]
+            if raw is None:
+                fields |= 1 << bit
+            elif key in CODED_KEYS and isinstance(raw, str):
+                value = encoders[key](raw)
+                fields |= 1 << bit
+            elif (key not in CODED_KEYS and type(raw) is int and raw != MISSING
+                  and np.iinfo(dtype).min <= raw <= np.iinfo(dtype).max):
+                value = raw
+                fields |= 1 << bit
+            else:
+                extra[key] = raw
+        values.append(value)
+    values.append(fields)
+
+    column_keys = {key for key, _, _ in METADATA_COLUMNS}
+    extra.update((key, value) for key, value in metadata.items() if key not in column_keys)
+    extra_record = json.dumps(extra, separators=(',', ':')).encode('utf-8') if extra else b''
+    return document['text'].encode('utf-8'), values, extra_record
+
+
+def _map(path: str, dtype: str, length: int) -> np.ndarray:
+    # np.memmap refuses empty files. Mapped arrays are used as plain ndarray views, which
+    # index much faster than the memmap subclass.
+    if length == 0:
+        return np.empty(0, dtype=dtype)
+    return np.asarray(np.memmap(path, dtype=dtype, mode='r', shape=(length,)))
+
+
+def _take_blob(blob, offsets, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Records of the given sorted rows from a blob, with their new offsets.
+    """
+    starts, ends = offsets[rows].astype('int64'), offsets[rows + 1].astype('int64')
+    new_offsets = np.zeros(len(rows) + 1, dtype='uint64')
+    np.cumsum(ends - starts, out=new_offsets[1:])
+    # Runs of consecutive rows are copied as one slice
+    breaks = np.flatnonzero(np.diff(rows) != 1) + 1
+    runs = zip(np.concatenate([[0], breaks]), np.concatenate([breaks, [len(rows)]])) if len(rows) else []
+    parts = [np.asarray(blob[starts[first]:ends[last - 1]]) for first, last in runs]
+    return (np.concatenate(parts) if parts else np.empty(0, dtype='uint8')), new_offsets
+
+
+def _blocks(data) -> Iterable[bytes]:
+    step = WRITE_BLOCK_BYTES // max(data.itemsize, 1)
+    for start in range(0, len(data), step):
+        yield np.asarray(data[start:start + step]).tobytes()
+
+
+class ChunkColumns:
+    """
+    Chunk documents ({'text', 'metadata'}) stored column-wise.
+
+    Texts are concatenated into one UTF-8 blob addressed by an offsets array, and the metadata
+    keys in METADATA_COLUMNS are typed integer columns, so a chunk costs a few dozen bytes
+    besides its text and filters are array comparisons. Metadata that doesn't fit a column is
+    kept as JSON records in a second blob. The arrays of a checkpoint are memory-mapped.
+    """
+
+    def __init__(self, text, text_offsets, columns: Dict, extra, extra_offsets):
+        self.text = text
+        self.text_offsets = text_offsets
+        self.columns = columns
+        self.extra = extra
+        self.extra_offsets = extra_offsets
+
+    @classmethod
+    def empty(cls) -> "ChunkColumns":
+        return cls(np.empty(0, dtype='uint8'), np.zeros(1, dtype='uint64'),
+                   {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS},
+                   np.empty(0, dtype='uint8'), np.zeros(1, dtype='uint64'))
+
+    @classmethod
+    def open(cls, prefix: str, rows: int) -> "ChunkColumns":
+        """
+        Map the columns written by write_chunk_columns to files starting with prefix.
+        """
+        text_offsets = _map(f"{prefix}.text_offsets", 'uint64', rows + 1)
+        extra_offsets = _map(f"{prefix}.extra_offsets", 'uint64', rows + 1)
+        return cls(_map(f"{prefix}.text", 'uint8', int(text_offsets[-1])), text_offsets,
+                   {name: _map(f"{prefix}.{name}", dtype, rows) for name, dtype in COLUMNS},
+                   _map(f"{prefix}.extra", 'uint8', int(extra_offsets[-1])), extra_offsets)
+
+    def __len__(self) -> int:
+        return len(self.text_offsets) - 1
+
+    def column(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def rows_where(self, name: str, value: int) -> np.ndarray:
+        """
+        Ids of the rows whose column equals value.
+        """
+        return np.flatnonzero(self.column(name) == value)
+
+    def take(self, rows: np.ndarray) -> "ChunkColumns":
+        """
+        Copy of the given sorted rows as NumPy-backed ChunkColumns.
+        """
+        text, text_offsets = _take_blob(self.text, np.asarray(self.text_offsets), rows)
+        extra, extra_offsets = _take_blob(self.extra, np.asarray(self.extra_offsets), rows)
+        return ChunkColumns(text, text_offsets, {name: self.column(name)[rows] for name, _ in COLUMNS},
+                            extra, extra_offsets)
+
+    def document(self, row: int, vocabularies: Dict[str, List[str]]) -> Dict:
+        """
+        Rebuild a row's document.
+
+        Args:
+            row: Row number
+            vocabularies: Strings of each key in CODED_KEYS, indexed by code
+        """
+        text = bytes(self.text[int(self.text_offsets[row]):int(self.text_offsets[row + 1])]).decode('utf-8')
+        fields = int(self.columns['fields'][row])
+        metadata = {}
+        for bit, (key, name, _) in enumerate(METADATA_COLUMNS):
+            if not fields >> bit & 1:
+                continue
+            value = int(self.columns[name][row])
+            if value == MISSING:
+                metadata[key] = None
+            elif key in CODED_KEYS:
+                metadata[key] = vocabularies[key][value]
+            else:
+                metadata[key] = value
+
+        extra = bytes(self.extra[int(self.extra_offsets[row]):int(self.extra_offsets[row + 1])])
+        if extra:
+            metadata.update(json.loads(extra))
+        return {'text': text, 'metadata': metadata}
+
+
+class ChunkColumnsBuilder(ChunkColumns):
+    """
+    Appendable ChunkColumns, backed by compact array-module buffers.
+    """
+
+    def __init__(self):
+        super().__init__(bytearray(), array('Q', [0]), {name: array(TYPECODES[dtype]) for name, dtype in COLUMNS},
+                         bytearray(), array('Q', [0]))
+        # NumPy copies of the columns, valid until the next append or discard
+        self._arrays: Dict[str, np.ndarray] = {}
+
+    def append(self, documents: List[Dict], encoders: Dict[str, Callable[[str], int]]):
+        """
+        Add documents as new rows.
+
+        Args:
+            documents: Documents to add
+            encoders: Function returning the code of a string, for each key in CODED_KEYS
+        """
+        for document in documents:
+            text, values, extra = _encode(document, encoders)
+            self.text += text
+            self.text_offsets.append(len(self.text))
+            for (name, _), value in zip(COLUMNS, values):
+                self.columns[name].append(value)
+            self.extra += extra
+            self.extra_offsets.append(len(self.extra))
+        self._arrays.clear()
+
+    def column(self, name: str) -> np.ndarray:
+        values = self._arrays.get(name)
+        if values is None:
+            values = self._arrays[name] = np.frombuffer(self.columns[name], dtype=dict(COLUMNS)[name]).copy()
+        return values
+
+    def snapshot(self) -> ChunkColumns:
+        """
+        Copy of the current rows as NumPy-backed ChunkColumns.
+        """
+        return ChunkColumns(np.frombuffer(self.text, dtype='uint8').copy(),
+                            np.frombuffer(self.text_offsets, dtype='uint64').copy(),
+                            {name: self.column(name).copy() for name, _ in COLUMNS},
+                            np.frombuffer(self.extra, dtype='uint8').copy(),
+                            np.frombuffer(self.extra_offsets, dtype='uint64').copy())
+
+    def discard(self, count: int):
+        """
+        Drop the first count rows (once they are part of a checkpoint).
+        """
+        text_start, extra_start = self.text_offsets[count], self.extra_offsets[count]
+        self.text = self.text[text_start:]
+        self.text_offsets = array('Q', (offset - text_start for offset in self.text_offsets[count:]))
+        self.extra = self.extra[extra_start:]
+        self.extra_offsets = array('Q', (offset - extra_start for offset in self.extra_offsets[count:]))
+        self.columns = {name: values[count:] for name, values in self.columns.items()}
+        self._arrays.clear()
+
+
+def write_chunk_columns(parts: List[ChunkColumns], prefix: str,
+                        write: Callable[[str, Iterable[bytes]], None]):
+    """
+    Write the rows of parts, one after another, as the files ChunkColumns.open maps.
+
+    Args:
+        parts: Columns to concatenate
+        prefix: File name prefix, e.g. "checkpoint-3"
+        write: Function writing a file from its name and blocks of bytes
+    """
+    for blob, offsets in (('text', 'text_offsets'), ('extra', 'extra_offsets')):
+        write(f"{prefix}.{blob}", (block for part in parts
+                                   for block in _blocks(getattr(part, blob)[:int(getattr(part, offsets)[-1])])))
+
+        def offset_blocks(offsets=offsets):
+            total = 0
+            for part in parts:
+                part_offsets = np.asarray(getattr(part, offsets), dtype='uint64')
+                yield (part_offsets[:-1] + np.uint64(total)).tobytes()
+                total += int(part_offsets[-1])
+            yield np.array([total], dtype='uint64').tobytes()
+
+        write(f"{prefix}.{offsets}", offset_blocks())
+
+    for name, _ in COLUMNS:
+        write(f"{prefix}.{name}", (block for part in parts for block in _blocks(part.column(name))))
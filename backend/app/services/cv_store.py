@@ -0,0 +1,227 @@
+import os
+import json
+import hashlib
+import sqlite3
+import threading
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .embedding_cache import normalize_text
+from .vector_store import candidate_id_for_text
+
+# Bump when text extraction, section detection, candidate info or chunking change, so stored
+# results are recomputed
+CV_STORE_VERSION = 1
+
+FILE_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_hash(stream: BinaryIO, filename: str) -> str:
+    """
+    Hash of an uploaded file's bytes and extension, read in chunks. The stream is rewound afterwards.
+
+    The extension is part of the hash because it selects the parser.
+    """
+    digest = hashlib.sha256(os.path.splitext(filename)[1].lower().encode('utf-8') + b'\x00')
+    stream.seek(0)
+    while chunk := stream.read(FILE_HASH_CHUNK_SIZE):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+def file_hash_for_path(file_path: str, filename: Optional[str] = None) -> str:
+    with open(file_path, 'rb') as stream:
+        return file_hash(stream, filename or file_path)
+
+
+def cv_text_hash(cv_text: str) -> str:
+    """
+    Hash of the normalized CV text, so extractions that differ only in whitespace share an entry.
+    """
+    return hashlib.sha256(normalize_text(cv_text).encode('utf-8')).hexdigest()
+
+
+class CVContentStore:
+    """
+    Content-addressed SQLite store of parsed CVs, so a CV uploaded again is neither parsed nor embedded again.
+
+    - cv_files maps a file hash to the normalized text hash of its extracted text.
+    - cv_documents holds the extracted text, sections and candidate info per normalized text hash. The
+      first extraction of a text is kept, so every upload of the same CV gets the same cv_text and thus
+      the same candidate id.
+    - cv_chunks holds a candidate's chunks and their normalized embeddings per embedding model.
+
+    Rows written by another CV_STORE_VERSION are treated as absent. Everything stored for a CV, which
+    includes the candidate's personal details, is removed with delete() once no evaluation uses it.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("CV_STORE_PATH", "./database/cv_store.db")
+        self._lock = threading.Lock()
+
+        self.file_hits = 0
+        self.text_hits = 0
+        self.chunk_hits = 0
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS cv_files (file_hash TEXT PRIMARY KEY, text_hash TEXT NOT NULL)"
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS cv_documents (text_hash TEXT PRIMARY KEY, version INTEGER NOT NULL, "
+            "cv_text TEXT NOT NULL, cv_sections TEXT NOT NULL, candidate_info TEXT NOT NULL)"
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS cv_chunks (candidate_id TEXT NOT NULL, model TEXT NOT NULL, "
+            "version INTEGER NOT NULL, chunks TEXT NOT NULL, vectors BLOB NOT NULL, "
+            "PRIMARY KEY (candidate_id, model))"
+        )
+        self._connection.commit()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'file_hits': self.file_hits,
+            'text_hits': self.text_hits,
+            'chunk_hits': self.chunk_hits
+        }
+
+    def get_file(self, file_hash: str) -> Optional[Dict]:
+        """
+        Parsed CV ('cv_text', 'cv_sections', 'candidate_info') of a file seen before, or None.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT d.version, d.cv_text, d.cv_sections, d.candidate_info FROM cv_files f "
+                "JOIN cv_documents d ON d.text_hash = f.text_hash WHERE f.file_hash = ?",
+                (file_hash,)
+            ).fetchone()
+            if row is None or row[0] != CV_STORE_VERSION:
+                return None
+            self.file_hits += 1
+        return self._parsed(row[1:])
+
+    def get_text(self, cv_text: str) -> Optional[Dict]:
+        """
+        Stored parse of a CV text (compared after normalization), or None.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT version, cv_text, cv_sections, candidate_info FROM cv_documents WHERE text_hash = ?",
+                (cv_text_hash(cv_text),)
+            ).fetchone()
+            if row is None or row[0] != CV_STORE_VERSION:
+                return None
+            self.text_hits += 1
+        return self._parsed(row[1:])
+
+    def put(self, file_hash: Optional[str], parsed: Dict) -> Dict:
+        """
+        Record a freshly parsed CV under its file hash.
+
+        Returns:
+            The stored parse of the same normalized text if there is one, otherwise parsed
+        """
+        text_hash = cv_text_hash(parsed['cv_text'])
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT version, cv_text, cv_sections, candidate_info FROM cv_documents WHERE text_hash = ?",
+                (text_hash,)
+            ).fetchone()
+            if row is not None and row[0] == CV_STORE_VERSION:
+                self.text_hits += 1
+                parsed = self._parsed(row[1:])
+            else:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO cv_documents (text_hash, version, cv_text, cv_sections, candidate_info) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (text_hash, CV_STORE_VERSION, parsed['cv_text'], json.dumps(parsed['cv_sections']),
+                     json.dumps(parsed['candidate_info']))
+                )
+            if file_hash is not None:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO cv_files (file_hash, text_hash) VALUES (?, ?)", (file_hash, text_hash)
+                )
+            self._connection.commit()
+        return parsed
+
+    def get_chunks(self, candidate_id: str, model: str) -> Optional[Tuple[List[Dict], np.ndarray]]:
+        """
+        Stored chunks of a candidate's CV and their normalized float32 embeddings, or None.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT version, chunks, vectors FROM cv_chunks WHERE candidate_id = ? AND model = ?",
+                (candidate_id, model)
+            ).fetchone()
+            if row is None or row[0] != CV_STORE_VERSION:
+                return None
+            self.chunk_hits += 1
+        chunks = json.loads(row[1])
+        return chunks, np.frombuffer(row[2], dtype='float32').reshape(len(chunks), -1)
+
+    def put_chunks(self, candidate_id: str, model: str, chunks: List[Dict], vectors: np.ndarray):
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO cv_chunks (candidate_id, model, version, chunks, vectors) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (candidate_id, model, CV_STORE_VERSION, json.dumps(chunks),
+                 np.ascontiguousarray(vectors, dtype='float32').tobytes())
+            )
+            self._connection.commit()
+
+    def delete(self, cv_text: str) -> bool:
+        """
+        Forget a CV: its stored parse, the file hashes that map to it and its chunk embeddings.
+
+        Args:
+            cv_text: CV text; every text with the same normalized form is forgotten
+
+        Returns:
+            Whether anything was stored for it
+        """
+        text_hash = cv_text_hash(cv_text)
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT cv_text FROM cv_documents WHERE text_hash = ?", (text_hash,)
+            ).fetchone()
+            # Chunks are keyed by the exact text's candidate id; the stored text is the one uploads reuse
+            candidate_ids = {candidate_id_for_text(cv_text)}
+            if row is not None:
+                candidate_ids.add(candidate_id_for_text(row[0]))
+            deleted = self._connection.execute("DELETE FROM cv_files WHERE text_hash = ?", (text_hash,)).rowcount
+            deleted += self._connection.execute("DELETE FROM cv_documents WHERE text_hash = ?", (text_hash,)).rowcount
+            deleted += self._connection.executemany(
+                "DELETE FROM cv_chunks WHERE candidate_id = ?", [(candidate_id,) for candidate_id in candidate_ids]
+            ).rowcount
+            self._connection.commit()
+        return deleted > 0
+
+    @staticmethod
+    def _parsed(row) -> Dict:
+        cv_text, cv_sections, candidate_info = row
+        return {
+            'cv_text': cv_text,
+            'cv_sections': json.loads(cv_sections),
+            'candidate_info': json.loads(candidate_info)
+        }
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_cv_store() -> CVContentStore:
+    """
+    Process-wide CV content store.
+    """
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = CVContentStore()
+        return _default_store
@@ -1,13 +1,212 @@
+import io
 import os
 import re
-from typing import Dict, List, Optional
+import signal
+import asyncio
+import tempfile
+import threading
+import multiprocessing
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from functools import partial
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
 from PyPDF2 import PdfReader
 from docx import Document
 import aiofiles
 
+
+class ExtractionTimeout(Exception):
+    pass
+
+
+# Header keywords of each CV section, as words separated by \s+. When a line contains keywords
+# of several sections, the section listed first wins; at the same position, the keyword listed
+# first wins.
+SECTION_KEYWORDS = {
+    'experience': (r'experience', r'work\s+history', r'employment', r'professional\s+experience'),
+    'education': (r'education', r'academic', r'qualification', r'academic\s+background'),
+    'skills': (r'skills', r'technical\s+skills', r'competencies', r'core\s+competencies'),
+    'summary': (r'summary', r'profile', r'objective', r'professional\s+summary'),
+    'certifications': (r'certification', r'certificate', r'license', r'certifications'),
+}
+SECTION_PRIORITY = {section: priority for priority, section in enumerate(SECTION_KEYWORDS)}
+# Section of each keyword, by its position in SECTION_KEYWORDS
+_KEYWORD_SECTIONS = [section for section, keywords in SECTION_KEYWORDS.items() for _ in keywords]
+
+
+def _compile_header_scanner(whitespace: str, flags: int = 0):
+    """
+    Compile one regex matching the keywords of every section.
+
+    The keywords are merged into a trie, so the regex engine reads each character once per
+    position instead of once per keyword, and every keyword ends in an empty group named
+    k<index>, so match.lastgroup tells which keyword matched. Branches are tried in order of the
+    first keyword they lead to, which keeps the preference of a plain alternation. A leading
+    lookahead on the keywords' first letters lets the engine skip other positions quickly.
+    """
+    trie: Dict = {}
+    for index, keyword in enumerate(kw for keywords in SECTION_KEYWORDS.values() for kw in keywords):
+        node = trie
+        for token in re.findall(r'\\s\+|.', keyword):
+            node = node.setdefault(token, {})
+        node[None] = index
+
+    def first_index(node) -> int:
+        return min(value if token is None else first_index(value) for token, value in node.items())
+
+    def emit(node) -> str:
+        alternatives = []
+        for token, child in sorted(node.items(), key=lambda item: item[1] if item[0] is None else first_index(item[1])):
+            if token is None:
+                alternatives.append(f'(?P<k{child}>)')
+            else:
+                alternatives.append((whitespace if token == r'\s+' else re.escape(token)) + emit(child))
+        return alternatives[0] if len(alternatives) == 1 else '(?:' + '|'.join(alternatives) + ')'
+
+    first_letters = ''.join(sorted({keyword[0] for keywords in SECTION_KEYWORDS.values() for keyword in keywords}))
+    return re.compile(rf'(?=[{first_letters}])\b{emit(trie)}\b', flags)
+
+
+# Keywords within a line of lowercased text, and anywhere in text of any case
+_LINE_HEADER_SCANNER = _compile_header_scanner(r'[^\S\n]+')
+_TEXT_HEADER_SCANNER = _compile_header_scanner(r'\s+', re.IGNORECASE)
+
+
+def _keyword_section(match) -> str:
+    return _KEYWORD_SECTIONS[int(match.lastgroup[1:])]
+
+
+def _header_lines(text: str) -> Dict[int, str]:
+    """
+    Section started by each header line of text, by line number.
+    """
+    lowered = text.lower()
+    header_lines: Dict[int, str] = {}
+    line, position = 0, 0
+    for match in _LINE_HEADER_SCANNER.finditer(lowered):
+        line += lowered.count('\n', position, match.start())
+        position = match.start()
+        section = _keyword_section(match)
+        current = header_lines.get(line)
+        if current is None or SECTION_PRIORITY[section] < SECTION_PRIORITY[current]:
+            header_lines[line] = section
+    return header_lines
+
+
+_extraction_pool = None
+_extraction_pool_lock = threading.Lock()
+
+
+def get_extraction_pool() -> ProcessPoolExecutor:
+    """
+    Process pool shared by every DocumentProcessor for CPU-bound PDF and DOCX parsing.
+    """
+    global _extraction_pool
+    with _extraction_pool_lock:
+        if _extraction_pool is None:
+            max_workers = int(os.getenv("EXTRACTION_WORKERS", "0")) or os.cpu_count()
+            # Spawned workers avoid inheriting the server's threads and open connections
+            _extraction_pool = ProcessPoolExecutor(
+                max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _extraction_pool
+
+
+def discard_extraction_pool(pool: ProcessPoolExecutor):
+    """
+    Drop a pool whose worker died (e.g. killed for memory) so the next extraction starts a fresh one.
+    """
+    global _extraction_pool
+    with _extraction_pool_lock:
+        if _extraction_pool is pool:
+            _extraction_pool = None
+    pool.shutdown(wait=False)
+
+
+def shutdown_extraction_pool(wait: bool = True):
+    global _extraction_pool
+    with _extraction_pool_lock:
+        if _extraction_pool is not None:
+            _extraction_pool.shutdown(wait=wait)
+            _extraction_pool = None
+
+
+@contextmanager
+def _time_limit(seconds: Optional[float]):
+    """
+    Abort the enclosed block with ExtractionTimeout after the given number of seconds.
+
+    Relies on SIGALRM, so it only applies on the main thread of a Unix process (which is where
+    pool workers run tasks); elsewhere the block runs unbounded.
+    """
+    if (not seconds or not hasattr(signal, "SIGALRM")
+            or threading.current_thread() is not threading.main_thread()):
+        yield
+        return
+
+    def on_alarm(signum, frame):
+        raise ExtractionTimeout(f"Extraction timed out after {seconds:g}s")
+
+    previous = signal.signal(signal.SIGALRM, on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _open_source(source: Union[str, bytes]):
+    # Extractors accept either a file path or the raw bytes of an upload
+    return io.BytesIO(source) if isinstance(source, bytes) else source
+
+
+def _extract_pdf_pages(source: Union[str, bytes], start: int = 0, end: Optional[int] = None,
+                       timeout: Optional[float] = None) -> Tuple[str, int]:
+    """
+    Text of pages [start, end) and the document's page count, from a single parse.
+
+    Only the requested pages are read and extracted; the reader loads page objects on access.
+    """
+    with _time_limit(timeout):
+        pages = PdfReader(_open_source(source)).pages
+        page_count = len(pages)
+        end = page_count if end is None else min(end, page_count)
+        return "".join([pages[i].extract_text() + "\n" for i in range(start, end)]), page_count
+
+
+@contextmanager
+def _source_path(source: Union[str, bytes], suffix: str):
+    """
+    A path to the document, so several pool tasks open the same file instead of each being sent the bytes.
+    """
+    if not isinstance(source, bytes):
+        yield source
+        return
+    handle, path = tempfile.mkstemp(suffix=suffix, prefix="cvalign-upload-")
+    try:
+        with os.fdopen(handle, "wb") as f:
+            f.write(source)
+        yield path
+    finally:
+        os.remove(path)
+
+
+def _extract_docx(source: Union[str, bytes], timeout: Optional[float] = None) -> str:
+    with _time_limit(timeout):
+        doc = Document(_open_source(source))
+        return "".join([paragraph.text + "\n" for paragraph in doc.paragraphs])
+
+
 class DocumentProcessor:
-    def __init__(self):
+    def __init__(self, extraction_timeout: Optional[float] = None, pdf_pages_per_task: Optional[int] = None):
         self.supported_formats = ['.pdf', '.docx', '.txt']
+        # PDF and DOCX parsing is CPU-bound, so it runs in a process pool instead of on the event loop
+        self.extraction_timeout = extraction_timeout or float(os.getenv("EXTRACTION_TIMEOUT", "60"))
+        # Long PDFs are split into page ranges that are extracted in parallel
+        self.pdf_pages_per_task = pdf_pages_per_task or int(os.getenv("PDF_PAGES_PER_TASK", "20"))
     
     async def extract_text_from_file(self, file_path: str) -> str:
         file_extension = os.path.splitext(file_path)[1].lower()
@@ -21,24 +220,80 @@ class DocumentProcessor:
         else:
             raise ValueError(f"Unsupported file format: {file_extension}")
     
-    async def _extract_from_pdf(self, file_path: str) -> str:
-        text = ""
+    async def extract_text_from_stream(self, stream: BinaryIO, filename: str) -> str:
+        """
+        Extract text from an open upload (e.g. a spooled temporary file) without writing it to disk.
+
+        Args:
+            stream: Binary stream positioned at the start of the document
+            filename: Original file name, used to pick the extractor
+        """
+        file_extension = os.path.splitext(filename)[1].lower()
+        
+        if file_extension == '.pdf':
+            return await self._extract_from_pdf(stream.read())
+        elif file_extension == '.docx':
+            return await self._extract_from_docx(stream.read())
+        elif file_extension == '.txt':
+            try:
+                text = stream.read().decode('utf-8')
+            except Exception as e:
+                raise Exception(f"Error reading text file: {str(e)}")
+            return self._clean_text(text)
+        else:
+            raise ValueError(f"Unsupported file format: {file_extension}")
+    
+    def extract_text_from_file_sync(self, file_path: str) -> str:
+        """
+        Extract text in the calling process. Used by pool workers, which must not submit nested work.
+        """
+        file_extension = os.path.splitext(file_path)[1].lower()
+        
         try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = PdfReader(file)
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
+            if file_extension == '.pdf':
+                return self._clean_text(_extract_pdf_pages(file_path, timeout=self.extraction_timeout)[0])
+            elif file_extension == '.docx':
+                return self._clean_text(_extract_docx(file_path, timeout=self.extraction_timeout))
+        except Exception as e:
+            raise Exception(f"Error extracting text from {file_extension[1:].upper()}: {str(e)}")
+        
+        if file_extension == '.txt':
+            return asyncio.run(self._extract_from_txt(file_path))
+        raise ValueError(f"Unsupported file format: {file_extension}")
+    
+    async def _run_in_pool(self, func, *args):
+        loop = asyncio.get_running_loop()
+        pool = get_extraction_pool()
+        try:
+            return await loop.run_in_executor(pool, partial(func, *args, timeout=self.extraction_timeout))
+        except BrokenProcessPool:
+            discard_extraction_pool(pool)
+            raise
+    
+    async def _extract_from_pdf(self, source: Union[str, bytes]) -> str:
+        """
+        Extract a PDF in the pool. The first task extracts the first page range and counts the pages in
+        the same parse, so a PDF within one range (almost every CV) is parsed once. Longer PDFs fan
+        the remaining ranges out to tasks that open the file by path and extract only their pages.
+        """
+        try:
+            per_task = self.pdf_pages_per_task
+            text, page_count = await self._run_in_pool(_extract_pdf_pages, source, 0, per_task)
+            if page_count > per_task:
+                with _source_path(source, ".pdf") as path:
+                    parts = await asyncio.gather(*[
+                        self._run_in_pool(_extract_pdf_pages, path, start, start + per_task)
+                        for start in range(per_task, page_count, per_task)
+                    ])
+                text += "".join(part for part, _ in parts)
         except Exception as e:
             raise Exception(f"Error extracting text from PDF: {str(e)}")
         
         return self._clean_text(text)
     
-    async def _extract_from_docx(self, file_path: str) -> str:
-        text = ""
+    async def _extract_from_docx(self, source: Union[str, bytes]) -> str:
         try:
-            doc = Document(file_path)
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
+            text = await self._run_in_pool(_extract_docx, source)
         except Exception as e:
             raise Exception(f"Error extracting text from DOCX: {str(e)}")
         
@@ -62,6 +317,17 @@ class DocumentProcessor:
         return text
     
     def extract_cv_sections(self, text: str) -> Dict[str, str]:
+        """
+        Split CV text into sections at their headers (see SECTION_KEYWORDS).
+
+        Multi-line text is split line by line: a line containing a section keyword starts that
+        section (the first matching section in SECTION_KEYWORDS order wins) and the lines before
+        the first header are contact info. Text of five lines or fewer is split by position: each
+        section runs from the first occurrence of its keyword to the next keyword of another
+        section, and contact info is the start of the first line up to the first keyword.
+
+        Headers are found with one scan of the text by a precompiled scanner.
+        """
         sections = {
             'contact_info': '',
             'summary': '',
@@ -72,37 +338,19 @@ class DocumentProcessor:
             'full_text': text
         }
         
-        text_lower = text.lower()
-        
-        # Try to split by common section headers first
-        section_patterns = {
-            'experience': r'\b(experience|work\s+history|employment|professional\s+experience)\b',
-            'education': r'\b(education|academic|qualification|academic\s+background)\b',
-            'skills': r'\b(skills|technical\s+skills|competencies|core\s+competencies)\b',
-            'summary': r'\b(summary|profile|objective|professional\s+summary)\b',
-            'certifications': r'\b(certification|certificate|license|certifications)\b'
-        }
-        
         # If text has proper line breaks, use line-by-line processing
         lines = text.split('\n')
         if len(lines) > 5:  # Proper multi-line text
+            header_lines = _header_lines(text)
             current_section = 'contact_info'
             section_content = []
             
-            for line in lines:
+            for number, line in enumerate(lines):
                 line = line.strip()
                 if not line:
                     continue
                 
-                line_lower = line.lower()
-                
-                # Check if this line is a section header
-                section_found = None
-                for section_name, pattern in section_patterns.items():
-                    if re.search(pattern, line_lower):
-                        section_found = section_name
-                        break
-                
+                section_found = header_lines.get(number)
                 if section_found:
                     if section_content:
                         sections[current_section] = '\n'.join(section_content)
@@ -115,31 +363,31 @@ class DocumentProcessor:
             if section_content:
                 sections[current_section] = '\n'.join(section_content)
         
-        else:  # Single line or few lines - use regex to extract sections
-            # Extract contact info (first part before any section keywords)
-            contact_match = re.search(r'^(.*?)(?=' + '|'.join(section_patterns.values()) + ')', text, re.IGNORECASE)
-            if contact_match:
-                sections['contact_info'] = contact_match.group(1).strip()
+        else:  # Single line or few lines - split at header positions
+            headers = [(match.start(), match.end(), _keyword_section(match))
+                       for match in _TEXT_HEADER_SCANNER.finditer(text)]
+            if not headers:
+                return sections
             
-            # Extract each section using regex
-            for section_name, pattern in section_patterns.items():
-                # Find section start
-                start_match = re.search(pattern, text, re.IGNORECASE)
-                if start_match:
-                    start_pos = start_match.end()
-                    
-                    # Find next section or end of text
-                    next_patterns = [p for p in section_patterns.values() if p != pattern]
-                    end_pos = len(text)
-                    
-                    for next_pattern in next_patterns:
-                        next_match = re.search(next_pattern, text[start_pos:], re.IGNORECASE)
-                        if next_match:
-                            end_pos = min(end_pos, start_pos + next_match.start())
-                    
-                    section_text = text[start_pos:end_pos].strip()
-                    if section_text:
-                        sections[section_name] = section_text
+            # Contact info: the first line up to the first header, if that header is on the first line
+            first_start = headers[0][0]
+            if '\n' not in text[:first_start]:
+                sections['contact_info'] = text[:first_start].strip()
+            
+            first_headers = {}
+            for header in headers:
+                first_headers.setdefault(header[2], header)
+            starts = [header[0] for header in headers]
+            for section_name, (_, start_pos, _) in first_headers.items():
+                # The section ends at the next header of another section
+                end_pos = len(text)
+                for next_start, _, next_section in headers[bisect_left(starts, start_pos):]:
+                    if next_section != section_name:
+                        end_pos = next_start
+                        break
+                section_text = text[start_pos:end_pos].strip()
+                if section_text:
+                    sections[section_name] = section_text
         
         return sections
     
@@ -215,16 +463,28 @@ class DocumentProcessor:
 
     def chunk_text_with_langchain(self, text: str, chunk_size: int = 500, chunk_overlap: int = 50) -> List[str]:
         """
-        Delegate text chunking to the LLM service using LangChain.
+        Delegate text chunking to the shared LLM service using LangChain.
         """
-        from .llm_service import LLMService
-        llm_service = LLMService()
-        return llm_service.split_text(text)
+        from .llm_service import get_llm_service
+        return get_llm_service().split_text(text, chunk_size, chunk_overlap)
     
     def chunk_cv_sections_with_langchain(self, cv_sections: Dict[str, str], chunk_size: int = 500, chunk_overlap: int = 50) -> List[Dict[str, str]]:
         """
-        Delegate CV section chunking to the LLM service using LangChain.
+        Delegate CV section chunking to the shared LLM service using LangChain.
         """
-        from .llm_service import LLMService
-        llm_service = LLMService()
-        return llm_service.split_cv_sections(cv_sections)
\ No newline at end of file
+        from .llm_service import get_llm_service
+        return get_llm_service().split_cv_sections(cv_sections, chunk_size, chunk_overlap)
+
+def parse_cv_file(file_path: str, extraction_timeout: Optional[float] = None) -> Dict:
+    """
+    Extract text, sections and candidate info from a CV file.
+
+    Module-level so it can be shipped to a process pool for batch uploads.
+    """
+    processor = DocumentProcessor(extraction_timeout=extraction_timeout)
+    cv_text = processor.extract_text_from_file_sync(file_path)
+    return {
+        'cv_text': cv_text,
+        'cv_sections': processor.extract_cv_sections(cv_text),
+        'candidate_info': processor.extract_candidate_info(cv_text)
+    }
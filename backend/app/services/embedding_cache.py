@@ -0,0 +1,147 @@
+import os
+import re
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+SQLITE_BATCH_SIZE = 500
+
+
+def normalize_text(text: str) -> str:
+    """
+    Collapse runs of whitespace so formatting-only differences share a cache entry.
+    """
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding cache: an in-memory LRU tier in front of a SQLite store.
+
+    Entries are keyed by (model name, embedding kind, normalized text hash). The kind separates
+    query and document embeddings, which the embedding model prefixes differently. The SQLite
+    store keeps at most max_disk_entries embeddings; the oldest written are evicted first.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_memory_entries: Optional[int] = None,
+                 max_disk_entries: Optional[int] = None):
+        self.path = path or os.getenv("EMBEDDING_CACHE_PATH", "./database/embedding_cache.db")
+        self.max_memory_entries = max_memory_entries or int(os.getenv("EMBEDDING_CACHE_MEMORY_ENTRIES", "10000"))
+        self.max_disk_entries = max_disk_entries or int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, model TEXT NOT NULL, vector BLOB NOT NULL)"
+        )
+        self._connection.commit()
+        self._disk_entries = self._connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    @staticmethod
+    def make_key(model_name: str, kind: str, text: str) -> str:
+        text_hash = hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+        return f"{model_name}|{kind}|{text_hash}"
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'hits': self.hits,
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'memory_entries': len(self._memory),
+            'disk_entries': self._disk_entries
+        }
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, List[float]]:
+        """
+        Look up embeddings by key. Keys that are not cached are absent from the result.
+        """
+        found = {}
+        missing = []
+
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+                    self.memory_hits += 1
+                else:
+                    missing.append(key)
+
+            # Stay under SQLite's bound-parameter limit for large batches
+            for start in range(0, len(missing), SQLITE_BATCH_SIZE):
+                batch = missing[start:start + SQLITE_BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._connection.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    vector = np.frombuffer(blob, dtype='float32').tolist()
+                    found[key] = vector
+                    self._remember(key, vector)
+                self.disk_hits += len(rows)
+                self.misses += len(batch) - len(rows)
+
+        return found
+
+    def put_many(self, items: Iterable[Tuple[str, List[float]]]):
+        items = list(items)
+        if not items:
+            return
+
+        with self._lock:
+            for key, vector in items:
+                self._remember(key, vector)
+            cursor = self._connection.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, model, vector) VALUES (?, ?, ?)",
+                [(key, key.split("|", 1)[0], np.asarray(vector, dtype='float32').tobytes()) for key, vector in items]
+            )
+            self._disk_entries += cursor.rowcount
+            excess = self._disk_entries - self.max_disk_entries
+            if excess > 0:
+                # Rowids grow with insertion order, so the smallest are the oldest entries
+                self._connection.execute(
+                    "DELETE FROM embeddings WHERE rowid IN (SELECT rowid FROM embeddings ORDER BY rowid LIMIT ?)",
+                    (excess,)
+                )
+                self._disk_entries -= excess
+            self._connection.commit()
+
+    def _remember(self, key: str, vector: List[float]):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """
+    Process-wide cache shared by every LLMService instance.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = EmbeddingCache()
+        return _default_cache
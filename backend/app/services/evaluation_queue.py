@@ -0,0 +1,121 @@
+import os
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
+from typing import Any, Callable, Dict, Optional
+
+
+class TaskStatus:
+    QUEUED = "queued"
+    PROCESSING = "processing"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+    TERMINAL = (COMPLETED, FAILED)
+
+
+@dataclass
+class EvaluationTask:
+    id: str
+    job_id: int
+    company_id: int
+    filename: str
+    status: str = TaskStatus.QUEUED
+    stage: Optional[str] = None
+    evaluation_id: Optional[int] = None
+    overall_score: Optional[float] = None
+    # True while the evaluation only has a pre-screen score
+    provisional: bool = False
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    # Incremented on every change so streaming clients only receive new states
+    version: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data.pop("company_id")
+        return data
+
+
+class EvaluationQueue:
+    """
+    Bounded worker pool for CV evaluations.
+
+    Uploads are handed to a fixed number of worker threads so the request handler can return
+    immediately with a task id. Task state is kept in memory and can be polled or streamed.
+
+    Because tasks only exist in the process that queued them, the API runs as a single worker
+    process; app startup takes APP_LOCK_PATH so a second worker fails instead of answering 404
+    for tasks it has never seen.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_retained_tasks: Optional[int] = None):
+        self.max_workers = max_workers or int(os.getenv("EVALUATION_WORKERS", "4"))
+        self.max_retained_tasks = max_retained_tasks or int(os.getenv("EVALUATION_TASKS_RETAINED", "1000"))
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="cv-evaluation")
+        self._tasks: "OrderedDict[str, EvaluationTask]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, job_id: int, company_id: int, filename: str, func: Callable, *args, **kwargs) -> EvaluationTask:
+        """
+        Queue func(task_id, *args, **kwargs) for execution on the worker pool.
+
+        The function is expected to report progress through update() and return a dict of
+        result fields (e.g. evaluation_id, overall_score) that is stored on completion.
+        """
+        task = self.register(job_id, company_id, filename)
+        self.executor.submit(self._run, task.id, func, *args, **kwargs)
+        return self.get(task.id)
+
+    def register(self, job_id: int, company_id: int, filename: str) -> EvaluationTask:
+        """
+        Create a queued task without scheduling any work for it.
+
+        Used for the per-file tasks of a batch upload, which are driven by the batch's own task.
+        """
+        task = EvaluationTask(id=str(uuid.uuid4()), job_id=job_id, company_id=company_id, filename=filename)
+
+        with self._lock:
+            self._tasks[task.id] = task
+            self._prune()
+
+        return EvaluationTask(**asdict(task))
+
+    def get(self, task_id: str) -> Optional[EvaluationTask]:
+        with self._lock:
+            task = self._tasks.get(task_id)
+            # Return a copy so callers never observe a half-applied update
+            return EvaluationTask(**asdict(task)) if task else None
+
+    def update(self, task_id: str, **fields):
+        with self._lock:
+            task = self._tasks.get(task_id)
+            if not task:
+                return
+            for name, value in fields.items():
+                setattr(task, name, value)
+            task.updated_at = time.time()
+            task.version += 1
+
+    def shutdown(self, wait: bool = True):
+        self.executor.shutdown(wait=wait)
+
+    def _run(self, task_id: str, func: Callable, *args, **kwargs):
+        self.update(task_id, status=TaskStatus.PROCESSING)
+        try:
+            result = func(task_id, *args, **kwargs) or {}
+            self.update(task_id, status=TaskStatus.COMPLETED, stage=None, **result)
+        except Exception as e:
+            self.update(task_id, status=TaskStatus.FAILED, error=str(e))
+
+    def _prune(self):
+        # Drop the oldest finished tasks once the retention limit is exceeded
+        excess = len(self._tasks) - self.max_retained_tasks
+        if excess <= 0:
+            return
+        for task_id in [t.id for t in self._tasks.values() if t.status in TaskStatus.TERMINAL][:excess]:
+            del self._tasks[task_id]
@@ -0,0 +1,149 @@
+import json
+import math
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Optional, Union
+
+from sqlalchemy import Numeric, cast, func
+
+DIMENSIONS = ('skills', 'experience', 'education')
+
+
+@dataclass(frozen=True)
+class EvaluationWeights:
+    """
+    Weights of the per-dimension scores in the overall score. They are normalized to sum to 1.
+    """
+    skills: float = 0.4
+    experience: float = 0.4
+    education: float = 0.2
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'EvaluationWeights':
+        """
+        Validate and normalize weights, e.g. from Company.settings or a request body.
+
+        Args:
+            data: Weight per dimension; missing dimensions weigh 0
+
+        Raises:
+            ValueError: On unknown dimensions, negative, non-finite or all-zero weights
+        """
+        unknown = set(data) - set(DIMENSIONS)
+        if unknown:
+            raise ValueError(f"Unknown evaluation dimensions: {', '.join(sorted(unknown))}")
+        weights = {name: float(data.get(name, 0.0)) for name in DIMENSIONS}
+        # JSON bodies may carry NaN and Infinity, which would spread into every re-ranked score
+        if not all(math.isfinite(weight) for weight in weights.values()):
+            raise ValueError("Evaluation weights must be finite numbers")
+        if any(weight < 0 for weight in weights.values()):
+            raise ValueError("Evaluation weights must not be negative")
+        total = sum(weights.values())
+        if not math.isfinite(total):
+            raise ValueError("Evaluation weights are too large")
+        if total <= 0:
+            raise ValueError("At least one evaluation weight must be positive")
+        return cls(**{name: weight / total for name, weight in weights.items()})
+
+    def to_dict(self) -> Dict[str, float]:
+        return asdict(self)
+
+    def overall_score(self, skills_score: float, experience_score: float, education_score: float) -> float:
+        return round(skills_score * self.skills + experience_score * self.experience +
+                     education_score * self.education, 1)
+
+    def score_expression(self, skills_score, experience_score, education_score):
+        """
+        SQL expression of overall_score over score columns, for re-ranking in a single UPDATE.
+
+        Rounds to one decimal like overall_score; the database may round ties the other way.
+        """
+        weighted = skills_score * self.skills + experience_score * self.experience + \
+            education_score * self.education
+        # round(double precision, int) doesn't exist in PostgreSQL
+        return func.round(cast(weighted, Numeric), 1)
+
+
+DEFAULT_WEIGHTS = EvaluationWeights()
+
+
+def load_settings(settings: Union[str, Dict[str, Any], None]) -> Dict[str, Any]:
+    """
+    Company.settings as a dict; it is stored as a JSON string.
+    """
+    if not settings:
+        return {}
+    if isinstance(settings, dict):
+        return dict(settings)
+    try:
+        loaded = json.loads(settings)
+    except ValueError:
+        return {}
+    return loaded if isinstance(loaded, dict) else {}
+
+
+def _job_overrides(loaded: Dict[str, Any]) -> Dict[str, Any]:
+    overrides = loaded.get('job_evaluation_weights')
+    return overrides if isinstance(overrides, dict) else {}
+
+
+def weights_from_settings(settings: Union[str, Dict[str, Any], None],
+                          job_id: Optional[int] = None) -> EvaluationWeights:
+    """
+    Weights in effect for a job: its own override, else the company's, else the defaults.
+
+    Args:
+        settings: Company.settings
+        job_id: Job whose override to look up
+
+    Returns:
+        The weights; invalid stored weights fall back to the next level
+    """
+    loaded = load_settings(settings)
+    candidates = []
+    if job_id is not None:
+        candidates.append(_job_overrides(loaded).get(str(job_id)))
+    candidates.append(loaded.get('evaluation_weights'))
+    for data in candidates:
+        if isinstance(data, dict):
+            try:
+                return EvaluationWeights.from_dict(data)
+            except (TypeError, ValueError):
+                continue
+    return DEFAULT_WEIGHTS
+
+
+def job_weight_overrides(settings: Union[str, Dict[str, Any], None]) -> Dict[int, Dict[str, float]]:
+    """
+    Jobs of the company with their own weights; malformed entries are skipped.
+    """
+    overrides = {}
+    for job_id, weights in _job_overrides(load_settings(settings)).items():
+        if isinstance(weights, dict) and job_id.isdigit():
+            overrides[int(job_id)] = weights
+    return overrides
+
+
+def settings_with_weights(settings: Union[str, Dict[str, Any], None], weights: Optional[EvaluationWeights],
+                          job_id: Optional[int] = None) -> str:
+    """
+    Company.settings with the company's weights, or a job's override, replaced.
+
+    Args:
+        settings: Current Company.settings
+        weights: New weights; None removes a job's override
+        job_id: Job to override, or None for the company weights
+
+    Returns:
+        The new settings as a JSON string
+    """
+    loaded = load_settings(settings)
+    if job_id is None:
+        loaded['evaluation_weights'] = (weights or DEFAULT_WEIGHTS).to_dict()
+    else:
+        overrides = dict(_job_overrides(loaded))
+        if weights is None:
+            overrides.pop(str(job_id), None)
+        else:
+            overrides[str(job_id)] = weights.to_dict()
+        loaded['job_evaluation_weights'] = overrides
+    return json.dumps(loaded)
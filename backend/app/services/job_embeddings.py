@@ -0,0 +1,137 @@
+import os
+import hashlib
+import sqlite3
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from .llm_service import LLMService, get_llm_service
+
+# Bump when the job queries or the way they are embedded change, so stored vectors are recomputed
+JOB_EMBEDDING_VERSION = 1
+
+
+def job_context_text(job_description: str, job_requirements: str) -> str:
+    """
+    Query used to retrieve experience chunks for a job.
+    """
+    return f"Job Description: {job_description}\n\nRequirements: {job_requirements}"
+
+
+def job_text_hash(job_description: str, job_requirements: str) -> str:
+    return hashlib.sha256(f"{job_description}\x00{job_requirements}".encode('utf-8')).hexdigest()
+
+
+@dataclass
+class JobEmbeddings:
+    """
+    Normalized query embeddings of a job's retrieval queries.
+    """
+    model: str
+    text_hash: str
+    requirements: np.ndarray
+    context: np.ndarray
+
+
+class JobEmbeddingStore:
+    """
+    SQLite store of per-job query embeddings.
+
+    Rows are keyed by job id and carry the embedding model, JOB_EMBEDDING_VERSION and a hash of
+    the job texts they were computed from; a row that doesn't match all three is treated as absent.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("JOB_EMBEDDINGS_PATH", "./database/job_embeddings.db")
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS job_embeddings ("
+            "job_id INTEGER NOT NULL, model TEXT NOT NULL, version INTEGER NOT NULL, text_hash TEXT NOT NULL, "
+            "requirements BLOB NOT NULL, context BLOB NOT NULL, PRIMARY KEY (job_id, model))"
+        )
+        self._connection.commit()
+
+    def get(self, job_id: int, model: str, job_description: str, job_requirements: str) -> Optional[JobEmbeddings]:
+        """
+        Stored embeddings for the job, or None if missing or computed from other texts, model or version.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT version, text_hash, requirements, context FROM job_embeddings WHERE job_id = ? AND model = ?",
+                (job_id, model)
+            ).fetchone()
+        if row is None:
+            return None
+
+        version, text_hash, requirements, context = row
+        if version != JOB_EMBEDDING_VERSION or text_hash != job_text_hash(job_description, job_requirements):
+            return None
+        return JobEmbeddings(model, text_hash, np.frombuffer(requirements, dtype='float32'),
+                             np.frombuffer(context, dtype='float32'))
+
+    def put(self, job_id: int, embeddings: JobEmbeddings):
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO job_embeddings (job_id, model, version, text_hash, requirements, context) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, embeddings.model, JOB_EMBEDDING_VERSION, embeddings.text_hash,
+                 embeddings.requirements.astype('float32').tobytes(), embeddings.context.astype('float32').tobytes())
+            )
+            self._connection.commit()
+
+    def invalidate(self, job_id: int):
+        """
+        Drop the job's embeddings for every model.
+        """
+        with self._lock:
+            self._connection.execute("DELETE FROM job_embeddings WHERE job_id = ?", (job_id,))
+            self._connection.commit()
+
+
+def compute_job_embeddings(llm_service: LLMService, job_description: str, job_requirements: str) -> JobEmbeddings:
+    """
+    Embed a job's retrieval queries in one call.
+    """
+    vectors = np.array(llm_service.embed_queries([
+        job_requirements, job_context_text(job_description, job_requirements)
+    ]), dtype='float32')
+    # Normalize for cosine similarity, like search queries
+    vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    return JobEmbeddings(llm_service.embedding_model_name, job_text_hash(job_description, job_requirements),
+                         vectors[0], vectors[1])
+
+
+def refresh_job_embeddings(job_id: int, job_description: str, job_requirements: str,
+                           llm_service: Optional[LLMService] = None,
+                           store: Optional[JobEmbeddingStore] = None) -> JobEmbeddings:
+    """
+    Compute and store a job's embeddings (called when a job is created or updated).
+    """
+    llm_service = llm_service or get_llm_service()
+    store = store or get_job_embedding_store()
+    embeddings = compute_job_embeddings(llm_service, job_description, job_requirements)
+    store.put(job_id, embeddings)
+    return embeddings
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_job_embedding_store() -> JobEmbeddingStore:
+    """
+    Process-wide job embedding store.
+    """
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = JobEmbeddingStore()
+        return _default_store
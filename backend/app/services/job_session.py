@@ -0,0 +1,121 @@
+import os
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from .llm_service import LLMService
+from .prompts import JOB_SESSION_BRIEFING, JOB_SESSION_PROMPTS
+
+
+class JobEvaluationSession:
+    """
+    Evaluation prompts for the candidates of one job, sent after a shared job prefix.
+
+    The job description and requirements are rendered once as a briefing. The briefing is sent
+    to Ollama a single time and the returned context (its token encoding) is passed with every
+    candidate prompt, so the model server finds the job tokens already prefilled and only has to
+    process the candidate's CV. keep_alive keeps the model, and the cache with it, loaded between
+    candidates. If the server returns no context, the briefing is sent inline ahead of each
+    prompt, which still gives every prompt for the job the same prefix.
+    """
+
+    def __init__(self, llm_service: LLMService, job_description: str, job_requirements: str,
+                 keep_alive: Optional[str] = None):
+        self.llm_service = llm_service
+        self.keep_alive = keep_alive or os.getenv("JOB_SESSION_KEEP_ALIVE", "30m")
+        self.prefix = JOB_SESSION_BRIEFING.format(job_description=job_description,
+                                                  job_requirements=job_requirements)
+        self.context: Optional[List[int]] = None
+        self._primed = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model: str, job_description: str, job_requirements: str) -> str:
+        return hashlib.sha256("\x00".join([model, job_description, job_requirements]).encode("utf-8")).hexdigest()
+
+    def prime(self) -> Optional[List[int]]:
+        """
+        Send the job briefing once and keep its context. Concurrent callers wait for the first.
+
+        Returns:
+            The briefing context, or None if it is not available
+        """
+        with self._lock:
+            if not self._primed:
+                try:
+                    self.context = self.llm_service.prime_context(self.prefix, self.keep_alive)
+                except Exception:
+                    # Try again for the next candidate; this one gets the inline prefix
+                    return None
+                self._primed = True
+            return self.context
+
+    def render(self, template_id: str, **fields) -> str:
+        """
+        Render the candidate part of a prompt (extra fields such as the job texts are ignored).
+        """
+        return JOB_SESSION_PROMPTS[template_id].format(**fields)
+
+    def request(self, template_id: str, **fields) -> Tuple[str, Optional[List[int]]]:
+        """
+        Prompt and context to send for one candidate prompt.
+
+        Returns:
+            (prompt, context); without a context the briefing is prepended to the prompt instead
+        """
+        return self._with_context(self.render(template_id, **fields), self.prime())
+
+    def _with_context(self, prompt: str, context: Optional[List[int]]) -> Tuple[str, Optional[List[int]]]:
+        if context is None:
+            return self.prefix + "\n\n" + prompt, None
+        return prompt, context
+
+    def generate(self, template_id: str, use_cache: bool = True, **fields) -> str:
+        """
+        Generate a response for one candidate prompt in the context of the job briefing.
+
+        Args:
+            template_id: Key of the JOB_SESSION_PROMPTS template to render
+            use_cache: Set to False to bypass the response cache for this call
+            fields: Template fields
+        """
+        prompt, context = self.request(template_id, **fields)
+        return self.llm_service.generate_text(prompt, template_id, use_cache, context=context,
+                                              keep_alive=self.keep_alive)
+
+    async def generate_async(self, template_id: str, use_cache: bool = True, **fields) -> str:
+        """
+        Awaitable generate; only priming the briefing, once per job, runs on a worker thread.
+        """
+        context = self.context if self._primed else await asyncio.to_thread(self.prime)
+        prompt, context = self._with_context(self.render(template_id, **fields), context)
+        return await self.llm_service.generate_text_async(prompt, template_id, use_cache, context=context,
+                                                          keep_alive=self.keep_alive)
+
+
+class JobSessionRegistry:
+    """
+    Most recently used job sessions, so candidates of the same job share one primed session.
+    """
+
+    def __init__(self, llm_service: LLMService, max_sessions: Optional[int] = None):
+        self.llm_service = llm_service
+        self.max_sessions = max_sessions or int(os.getenv("JOB_SESSION_CACHE_SIZE", "32"))
+        self._sessions: "OrderedDict[str, JobEvaluationSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, job_description: str, job_requirements: str) -> JobEvaluationSession:
+        # Keyed by content: an edited job gets a new session instead of a stale briefing
+        key = JobEvaluationSession.make_key(self.llm_service.generation_model_name, job_description, job_requirements)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = JobEvaluationSession(self.llm_service, job_description, job_requirements)
+                self._sessions[key] = session
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            else:
+                self._sessions.move_to_end(key)
+            return session
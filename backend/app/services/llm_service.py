@@ -1,67 +1,182 @@
-from langchain_community.embeddings import OllamaEmbeddings
-from langchain_community.llms import Ollama
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from typing import List
+from functools import lru_cache
+from typing import Callable, List, Optional
 import os
+import json
+import hashlib
+import threading
+from .embedding_cache import EmbeddingCache, get_embedding_cache
+from .response_cache import ResponseCache, get_response_cache
+from .ollama_client import AsyncOllamaClient, get_async_ollama_client
+
+# Instruction prefixes used by LangChain's OllamaEmbeddings; kept so existing vectors and cache entries stay valid
+EMBED_INSTRUCTION = "passage: "
+QUERY_INSTRUCTION = "query: "
+# Tokens generated when priming a context; only the prompt's prefill is wanted
+PRIME_MAX_TOKENS = 8
+
+@lru_cache(maxsize=32)
+def _cached_text_splitter(chunk_size: int, chunk_overlap: int) -> RecursiveCharacterTextSplitter:
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        separators=["\n\n", "\n", " ", ""]
+    )
 
 class LLMService:
-    def __init__(self, embedding_model_name: str = "embeddinggemma:300m", generation_model_name: str = "gemma:4b"):
+    def __init__(self, embedding_model_name: str = "embeddinggemma:300m", generation_model_name: str = "gemma:4b",
+                 embedding_cache: Optional[EmbeddingCache] = None, response_cache: Optional[ResponseCache] = None,
+                 ollama_client: Optional[AsyncOllamaClient] = None):
         self.embedding_model_name = embedding_model_name
         self.generation_model_name = generation_model_name
+        self.temperature = 0.2  # Lower temperature for more consistent evaluations
         
-        # Initialize embeddings service
-        self.embeddings = OllamaEmbeddings(
-            model=embedding_model_name,
-            base_url=os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
-        )
+        # Repeated texts (job requirements, unchanged CVs) are served from the cache instead of Ollama
+        if embedding_cache is None and os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true":
+            embedding_cache = get_embedding_cache()
+        self.embedding_cache = embedding_cache
         
-        # Initialize text generation service
-        self.generator = Ollama(
-            model=generation_model_name,
-            base_url=os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
-            temperature=0.2  # Lower temperature for more consistent evaluations
-        )
+        # Opt-in: identical scoring prompts reuse the previous generation
+        if response_cache is None and os.getenv("LLM_RESPONSE_CACHE_ENABLED", "false").lower() == "true":
+            response_cache = get_response_cache()
+        self.response_cache = response_cache
         
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=500,
-            chunk_overlap=50,
-            separators=["\n\n", "\n", " ", ""]
-        )
+        # Embeddings and generation share one keep-alive connection pool to Ollama, with a bounded
+        # number of requests in flight and identical concurrent requests coalesced
+        self.ollama_client = ollama_client or get_async_ollama_client()
+        
+        self.text_splitter = self.get_text_splitter()
     
     def get_text_splitter(self, chunk_size: int = 500, chunk_overlap: int = 50):
-        return RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            separators=["\n\n", "\n", " ", ""]
-        )
+        return _cached_text_splitter(chunk_size, chunk_overlap)
     
-    def split_text(self, text: str) -> List[str]:
+    def split_text(self, text: str, chunk_size: int = 500, chunk_overlap: int = 50) -> List[str]:
         """
         Split text using LangChain's text splitter
         """
         if not text.strip():
             return []
-        return self.text_splitter.split_text(text)
+        return self.get_text_splitter(chunk_size, chunk_overlap).split_text(text)
     
     def embed_documents(self, texts: List[str]):
         """
         Generate embeddings for a list of documents using embeddingGemma via Ollama
         """
-        return self.embeddings.embed_documents(texts)
+        return self._embed_with_cache(
+            texts, "document",
+            lambda batch: self.ollama_client.embed(self.embedding_model_name, [EMBED_INSTRUCTION + text for text in batch])
+        )
     
     def embed_query(self, query: str):
         """
         Generate embedding for a single query using embeddingGemma via Ollama
         """
-        return self.embeddings.embed_query(query)
+        return self.embed_queries([query])[0]
+    
+    def embed_queries(self, queries: List[str]):
+        """
+        Generate query embeddings for several queries in one call
+        """
+        return self._embed_with_cache(
+            queries, "query",
+            lambda batch: self.ollama_client.embed(self.embedding_model_name, [QUERY_INSTRUCTION + text for text in batch])
+        )
+    
+    def _embed_with_cache(self, texts: List[str], kind: str, embed: Callable[[List[str]], List[List[float]]]):
+        """
+        Serve embeddings from the cache and compute only the missing ones, in a single call
+        """
+        if self.embedding_cache is None:
+            return embed(texts)
+        
+        keys = [EmbeddingCache.make_key(self.embedding_model_name, kind, text) for text in texts]
+        cached = self.embedding_cache.get_many(keys)
+        
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+        
+        if missing:
+            computed = embed(list(missing.values()))
+            new_entries = list(zip(missing.keys(), computed))
+            self.embedding_cache.put_many(new_entries)
+            cached.update(new_entries)
+        
+        return [cached[key] for key in keys]
     
-    def generate_text(self, prompt: str) -> str:
+    def generate_text(self, prompt: str, template_id: Optional[str] = None, use_cache: bool = True,
+                      context: Optional[List[int]] = None, keep_alive: Optional[str] = None) -> str:
         """
         Generate text using the LLM (e.g., Gemma) for evaluation tasks
+        
+        Args:
+            prompt: Fully rendered prompt
+            template_id: Key of the CV_EVALUATION_PROMPTS template the prompt was rendered from
+            use_cache: Set to False to bypass the response cache for this call
+            context: Ollama context of an earlier exchange the prompt continues (see prime_context)
+            keep_alive: How long Ollama should keep the model loaded after this call
+        """
+        key = self._response_cache_key(prompt, template_id, use_cache, context)
+        if key is None:
+            return self._generate(prompt, context, keep_alive)
+        
+        response = self.response_cache.get(key)
+        if response is None:
+            response = self._generate(prompt, context, keep_alive)
+            self.response_cache.put(key, response)
+        return response
+    
+    async def generate_text_async(self, prompt: str, template_id: Optional[str] = None, use_cache: bool = True,
+                                  context: Optional[List[int]] = None, keep_alive: Optional[str] = None) -> str:
+        """
+        Awaitable generate_text; waiting for Ollama doesn't hold a thread
+        """
+        key = self._response_cache_key(prompt, template_id, use_cache, context)
+        response = self.response_cache.get(key) if key is not None else None
+        if response is None:
+            response = await self.ollama_client.generate_async(
+                self.generation_model_name, prompt, {'temperature': self.temperature}, context, keep_alive
+            )
+            if key is not None:
+                self.response_cache.put(key, response)
+        return response
+    
+    def _response_cache_key(self, prompt: str, template_id: Optional[str], use_cache: bool,
+                            context: Optional[List[int]]) -> Optional[str]:
+        """
+        Response cache key of a generation, or None if the response cache is not used for it
+        """
+        if self.response_cache is None or not use_cache:
+            return None
+        params = {'temperature': self.temperature}
+        if context is not None:
+            # The prompt alone doesn't identify the request when it continues a context
+            params['context'] = hashlib.sha256(json.dumps(context).encode('utf-8')).hexdigest()
+        return ResponseCache.make_key(self.generation_model_name, template_id, prompt, params)
+    
+    def prime_context(self, prompt: str, keep_alive: Optional[str] = None) -> Optional[List[int]]:
         """
-        return self.generator.invoke(prompt)
+        Run a short generation for prompt and return its Ollama context.
+        
+        Passing the context to later generate_text calls continues the exchange without
+        resending the prompt; the model server reuses its already computed prefill for it.
+        
+        Returns:
+            The context, or None if the server did not return one
+        """
+        response = self.ollama_client.generate_response(
+            self.generation_model_name, prompt,
+            {'temperature': self.temperature, 'num_predict': PRIME_MAX_TOKENS}, keep_alive=keep_alive
+        )
+        return list(response.context) if response.context else None
     
-    def split_cv_sections(self, cv_sections: dict) -> List[dict]:
+    def _generate(self, prompt: str, context: Optional[List[int]] = None, keep_alive: Optional[str] = None) -> str:
+        return self.ollama_client.generate(
+            self.generation_model_name, prompt, {'temperature': self.temperature}, context, keep_alive
+        )
+    
+    def split_cv_sections(self, cv_sections: dict, chunk_size: int = 500, chunk_overlap: int = 50) -> List[dict]:
         """
         Split individual CV sections into chunks with metadata
         """
@@ -69,7 +184,7 @@ class LLMService:
         
         for section_name, section_text in cv_sections.items():
             if section_text and section_text.strip():
-                section_chunks = self.split_text(section_text)
+                section_chunks = self.split_text(section_text, chunk_size, chunk_overlap)
                 
                 for i, chunk in enumerate(section_chunks):
                     chunk_with_metadata = {
@@ -82,4 +197,17 @@ class LLMService:
                     }
                     chunks_with_metadata.append(chunk_with_metadata)
         
-        return chunks_with_metadata
\ No newline at end of file
+        return chunks_with_metadata
+
+_services = {}
+_services_lock = threading.Lock()
+
+def get_llm_service(embedding_model_name: str = "embeddinggemma:300m", generation_model_name: str = "gemma:4b") -> LLMService:
+    """
+    Lazily created LLMService shared by every caller using the same models.
+    """
+    key = (embedding_model_name, generation_model_name)
+    with _services_lock:
+        if key not in _services:
+            _services[key] = LLMService(embedding_model_name, generation_model_name)
+        return _services[key]
@@ -0,0 +1,191 @@
+import os
+import json
+import random
+import asyncio
+import threading
+from typing import Any, Dict, List, Optional
+
+import httpx
+import ollama
+
+
+def _generate_payload(model: str, prompt: str, options: Optional[Dict[str, Any]] = None,
+                      context: Optional[List[int]] = None, keep_alive: Optional[str] = None) -> Dict[str, Any]:
+    payload = {'model': model, 'prompt': prompt, 'options': options}
+    # Only sent when used, so plain generations keep the same request (and coalescing key)
+    if context is not None:
+        payload['context'] = context
+    if keep_alive is not None:
+        payload['keep_alive'] = keep_alive
+    return payload
+
+
+RETRYABLE_STATUS_CODES = (408, 429, 500, 502, 503, 504)
+
+
+class AsyncOllamaClient:
+    """
+    Async Ollama client with a bounded number of in-flight requests, coalescing and retries.
+
+    The client lives on its own event loop thread so that one connection pool, one in-flight
+    limit and one coalescing table are shared by every caller, whether it runs on a request
+    handler's loop, a queue worker's asyncio.run() loop or a plain thread. Identical requests
+    issued while one is already in flight (e.g. concurrent uploads for the same job embedding the
+    same query) wait for that request instead of sending their own.
+    """
+
+    def __init__(self, base_url: Optional[str] = None, timeout: Optional[float] = None,
+                 max_connections: Optional[int] = None, max_in_flight: Optional[int] = None,
+                 max_retries: Optional[int] = None, retry_backoff: Optional[float] = None,
+                 embed_batch_size: Optional[int] = None):
+        self.base_url = base_url or os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+        self.timeout = timeout or float(os.getenv("OLLAMA_TIMEOUT", "300"))
+        self.max_connections = max_connections or int(os.getenv("OLLAMA_MAX_CONNECTIONS", "16"))
+        self.max_in_flight = max_in_flight or int(os.getenv("OLLAMA_MAX_IN_FLIGHT", "8"))
+        self.max_retries = int(os.getenv("OLLAMA_MAX_RETRIES", "3")) if max_retries is None else max_retries
+        self.retry_backoff = retry_backoff or float(os.getenv("OLLAMA_RETRY_BACKOFF", "0.5"))
+        self.embed_batch_size = embed_batch_size or int(os.getenv("OLLAMA_EMBED_BATCH_SIZE", "64"))
+
+        self.requests_sent = 0
+        self.requests_coalesced = 0
+        self.retries = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="ollama-client", daemon=True)
+        self._thread.start()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._semaphore = None
+        self._client = None
+        self._call(self._open())
+
+    async def _open(self):
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        self._client = ollama.AsyncClient(
+            host=self.base_url,
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.max_connections,
+                                max_keepalive_connections=self.max_connections)
+        )
+
+    def _call(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    # Blocking API, for callers on plain threads
+
+    def embed(self, model: str, texts: List[str]) -> List[List[float]]:
+        return self._call(self._embed(model, texts))
+
+    def generate(self, model: str, prompt: str, options: Optional[Dict[str, Any]] = None,
+                 context: Optional[List[int]] = None, keep_alive: Optional[str] = None) -> str:
+        return self.generate_response(model, prompt, options, context, keep_alive).response
+
+    def generate_response(self, model: str, prompt: str, options: Optional[Dict[str, Any]] = None,
+                          context: Optional[List[int]] = None, keep_alive: Optional[str] = None):
+        """
+        Generate and return the full Ollama response, including the context that continues it.
+        """
+        return self._call(self._generate(_generate_payload(model, prompt, options, context, keep_alive)))
+
+    # Awaitable API, usable from any event loop
+
+    async def generate_async(self, model: str, prompt: str, options: Optional[Dict[str, Any]] = None,
+                             context: Optional[List[int]] = None, keep_alive: Optional[str] = None) -> str:
+        payload = _generate_payload(model, prompt, options, context, keep_alive)
+        response = await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self._generate(payload), self._loop))
+        return response.response
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'requests_sent': self.requests_sent,
+            'requests_coalesced': self.requests_coalesced,
+            'retries': self.retries,
+            'in_flight': len(self._in_flight),
+            'prompt_tokens': self.prompt_tokens,
+            'completion_tokens': self.completion_tokens
+        }
+
+    def close(self):
+        if self._loop.is_closed():
+            return
+        self._call(self._client._client.aclose())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    async def _embed(self, model: str, texts: List[str]) -> List[List[float]]:
+        batches = [texts[start:start + self.embed_batch_size] for start in range(0, len(texts), self.embed_batch_size)]
+        responses = await asyncio.gather(*[
+            self._request("embed", {'model': model, 'input': batch}) for batch in batches
+        ])
+        return [list(vector) for response in responses for vector in response.embeddings]
+
+    async def _generate(self, payload: Dict[str, Any]):
+        return await self._request("generate", payload)
+
+    def _count_usage(self, response):
+        # Generation token counts reported by Ollama; coalesced callers share one response and count once
+        self.prompt_tokens += response.prompt_eval_count or 0
+        self.completion_tokens += response.eval_count or 0
+
+    async def _request(self, method: str, payload: Dict[str, Any]):
+        """
+        Send a request unless an identical one is already in flight, in which case share its result.
+        """
+        key = method + "|" + json.dumps(payload, sort_keys=True)
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            self.requests_coalesced += 1
+            return await asyncio.shield(pending)
+
+        future = self._loop.create_future()
+        self._in_flight[key] = future
+        try:
+            result = await self._send_with_retries(method, payload)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so waiterless failures don't log "exception was never retrieved"
+            future.exception()
+            raise
+        finally:
+            del self._in_flight[key]
+
+    async def _send_with_retries(self, method: str, payload: Dict[str, Any]):
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore:
+                    self.requests_sent += 1
+                    response = await getattr(self._client, method)(**payload)
+                    if method == "generate":
+                        self._count_usage(response)
+                    return response
+            except (httpx.TransportError, ConnectionError, ollama.ResponseError) as e:
+                # The ollama client turns connect failures into ConnectionError and HTTP errors into ResponseError
+                retryable = (not isinstance(e, ollama.ResponseError)
+                             or e.status_code in RETRYABLE_STATUS_CODES)
+                if not retryable or attempt >= self.max_retries:
+                    raise
+            # Exponential backoff with jitter, outside the in-flight limit
+            delay = self.retry_backoff * (2 ** attempt) * (0.5 + random.random() / 2)
+            attempt += 1
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+
+_async_clients: Dict[str, AsyncOllamaClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_async_ollama_client(base_url: Optional[str] = None) -> AsyncOllamaClient:
+    """
+    Process-wide async client per Ollama base URL.
+    """
+    base_url = base_url or os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+    with _clients_lock:
+        if base_url not in _async_clients:
+            _async_clients[base_url] = AsyncOllamaClient(base_url)
+        return _async_clients[base_url]
@@ -0,0 +1,110 @@
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass
+from typing import List, Optional, Set
+
+from .evaluation_weights import DEFAULT_WEIGHTS, EvaluationWeights
+
+
+@dataclass
+class PrescreenPolicy:
+    """
+    Which pre-screened candidates of a batch go on to the full LLM evaluation.
+
+    Candidates scoring at least threshold are kept, then at most top_n of them by score. With neither
+    set, every candidate is kept. Scores are overall scores under weights, so the cut follows the
+    ranking the job will be listed by.
+    """
+    top_n: Optional[int] = None
+    threshold: Optional[float] = None
+    weights: EvaluationWeights = DEFAULT_WEIGHTS
+
+    def select(self, scores: List[float]) -> Set[int]:
+        """
+        Indices of the scores whose candidates get the full evaluation.
+        """
+        indices = [i for i, score in enumerate(scores) if self.threshold is None or score >= self.threshold]
+        if self.top_n is not None:
+            # Stable, so ties keep upload order
+            indices = sorted(indices, key=lambda i: -scores[i])[:self.top_n]
+        return set(indices)
+
+
+class ProvisionalEvaluationStore:
+    """
+    SQLite registry of evaluations that only have a pre-screen score.
+
+    An evaluation is listed from the moment its pre-screen result is saved until it is promoted to a
+    full LLM evaluation or deleted.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("PRESCREEN_STORE_PATH", "./database/prescreen.db")
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS provisional_evaluations ("
+            "evaluation_id INTEGER PRIMARY KEY, job_id INTEGER NOT NULL, prescreen_score REAL NOT NULL)"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS provisional_evaluations_job ON provisional_evaluations (job_id)"
+        )
+        self._connection.commit()
+
+    def add(self, evaluation_id: int, job_id: int, prescreen_score: float):
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO provisional_evaluations (evaluation_id, job_id, prescreen_score) "
+                "VALUES (?, ?, ?)",
+                (evaluation_id, job_id, prescreen_score)
+            )
+            self._connection.commit()
+
+    def is_provisional(self, evaluation_id: int) -> bool:
+        with self._lock:
+            return self._connection.execute(
+                "SELECT 1 FROM provisional_evaluations WHERE evaluation_id = ?", (evaluation_id,)
+            ).fetchone() is not None
+
+    def list_job(self, job_id: int) -> List[dict]:
+        """
+        Provisional evaluations of a job, best pre-screen score first.
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT evaluation_id, prescreen_score FROM provisional_evaluations WHERE job_id = ? "
+                "ORDER BY prescreen_score DESC, evaluation_id",
+                (job_id,)
+            ).fetchall()
+        return [{'evaluation_id': evaluation_id, 'prescreen_score': score} for evaluation_id, score in rows]
+
+    def remove(self, evaluation_id: int):
+        with self._lock:
+            self._connection.execute("DELETE FROM provisional_evaluations WHERE evaluation_id = ?", (evaluation_id,))
+            self._connection.commit()
+
+    def remove_job(self, job_id: int):
+        with self._lock:
+            self._connection.execute("DELETE FROM provisional_evaluations WHERE job_id = ?", (job_id,))
+            self._connection.commit()
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_provisional_store() -> ProvisionalEvaluationStore:
+    """
+    Process-wide provisional evaluation registry.
+    """
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = ProvisionalEvaluationStore()
+        return _default_store
@@ -0,0 +1,52 @@
+import os
+import threading
+from typing import Dict
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class ProcessLockError(RuntimeError):
+    """
+    Raised when another process already holds a lock file.
+    """
+
+
+# Descriptors of the lock files held by this process, by absolute path
+_held_locks: Dict[str, int] = {}
+_held_locks_lock = threading.Lock()
+
+
+def acquire_process_lock(path: str, purpose: str):
+    """
+    Take an exclusive lock on path and hold it until the process exits.
+
+    Used for state that only one process may own, such as the in-memory evaluation tasks. Taking
+    a lock this process already holds is a no-op. The descriptor stays open, since closing any
+    descriptor of the file would drop the process's POSIX lock on it.
+
+    Args:
+        path: Lock file, created if missing
+        purpose: What the lock protects, for the error message
+
+    Raises:
+        ProcessLockError: If another process holds the lock
+    """
+    path = os.path.abspath(path)
+    with _held_locks_lock:
+        if path in _held_locks:
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.lockf(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            os.close(fd)
+            raise ProcessLockError(f"{purpose} is already in use by another process (lock file {path})")
+        _held_locks[path] = fd
@@ -1,5 +1,8 @@
 """
 Prompt templates for CV evaluation tasks using LLM
+
+Job content comes before CV content in every template, so prompts for different candidates of
+the same job share their longest possible prefix and the model server can reuse its prefill.
 """
 
 CV_EVALUATION_PROMPTS = {
@@ -12,12 +15,12 @@ Rate the skills match on a scale of 0-100 where:
 - 30-49: Limited match, has some related skills but significant gaps
 - 0-29: Poor match, skills do not align with requirements
 
-CV Skills Section:
-{cv_skills}
-
 Job Requirements:
 {job_requirements}
 
+CV Skills Section:
+{cv_skills}
+
 Provide only the numeric score (0-100) without any explanation or additional text:""",
 
     "experience_evaluation": """Evaluate the relevance and quality of the candidate's experience for the job. Consider:
@@ -34,12 +37,12 @@ Rate the experience match on a scale of 0-100 where:
 - 30-49: Limited match, minimal relevant experience
 - 0-29: Poor match, experience not aligned with requirements
 
-CV Experience Section:
-{cv_experience}
-
 Job Context:
 {job_context}
 
+CV Experience Section:
+{cv_experience}
+
 Provide only the numeric score (0-100) without any explanation or additional text:""",
 
     "education_evaluation": """Evaluate the candidate's education against job requirements. Consider:
@@ -56,12 +59,12 @@ Rate the education match on a scale of 0-100 where:
 - 30-49: Limited match, partially meets requirements
 - 0-29: Poor match, does not meet requirements
 
-CV Education Section:
-{cv_education}
-
 Job Requirements:
 {job_requirements}
 
+CV Education Section:
+{cv_education}
+
 Provide only the numeric score (0-100) without any explanation or additional text:""",
 
     "soft_skills_evaluation": """Analyze the candidate's CV for evidence of soft skills relevant to the job. 
@@ -73,12 +76,12 @@ Rate the soft skills indication on a scale of 0-100 where:
 - 30-49: Limited evidence of soft skills
 - 0-29: Little to no evidence of soft skills
 
-CV Sections:
-{cv_text}
-
 Job Context:
 {job_context}
 
+CV Sections:
+{cv_text}
+
 Provide only the numeric score (0-100) without any explanation or additional text:""",
 
     "contextual_understanding": """Analyze the candidate's CV in the context of the specific job requirements and industry. 
@@ -90,9 +93,6 @@ Rate the contextual alignment on a scale of 0-100 where:
 - 30-49: Limited alignment with the specific role context
 - 0-29: Poor alignment with role context and company needs
 
-CV:
-{cv_text}
-
 Job Description:
 {job_description}
 
@@ -102,6 +102,9 @@ Job Requirements:
 Company/Industry Context:
 {context_info}
 
+CV:
+{cv_text}
+
 Provide only the numeric score (0-100) without any explanation or additional text:""",
 
     "feedback_generation": """Based on the CV and job requirements, generate specific and actionable feedback. Provide feedback in the following JSON format:
@@ -113,15 +116,15 @@ Provide only the numeric score (0-100) without any explanation or additional tex
     "summary": "A concise summary of the candidate's fit for the position."
 }}
 
-CV:
-{cv_text}
-
 Job Description:
 {job_description}
 
 Job Requirements:
 {job_requirements}
 
+CV:
+{cv_text}
+
 Provide only the JSON response without any explanation or additional text:""",
 
     "detailed_feedback_with_soft_skills": """Based on the CV and job requirements, generate comprehensive feedback that includes assessment of soft skills. 
@@ -136,14 +139,185 @@ Provide feedback in the following JSON format:
     "summary": "A concise summary of the candidate's fit for the position."
 }}
 
+Job Description:
+{job_description}
+
+Job Requirements:
+{job_requirements}
+
+CV:
+{cv_text}
+
+Provide only the JSON response without any explanation or additional text:""",
+
+    "combined_evaluation": """Evaluate the candidate's CV against the job in a single assessment covering skills, experience,
+education, soft skills and overall fit.
+
+Rate each area on a scale of 0-100 where:
+- 90-100: Excellent match
+- 70-89: Good match
+- 50-69: Moderate match
+- 30-49: Limited match
+- 0-29: Poor match
+
+- skills_score: relevance and depth of technical skills compared to the job requirements
+- experience_score: years of relevant experience, progression, responsibilities and achievements, industry and leadership experience
+- education_score: degree level and field of study relative to the requirements, certifications and continuing education
+
+Job Description:
+{job_description}
+
+Job Requirements:
+{job_requirements}
+
+CV Skills Section:
+{cv_skills}
+
+CV Experience Section:
+{cv_experience}
+
+CV Education Section:
+{cv_education}
+
 CV:
 {cv_text}
 
+Provide the evaluation in the following JSON format, with integer scores:
+
+{{
+    "skills_score": 0,
+    "experience_score": 0,
+    "education_score": 0,
+    "strengths": ["specific strength 1", "specific strength 2", ...],
+    "weaknesses": ["specific weakness 1", "specific weakness 2", ...],
+    "recommendations": ["specific recommendation 1", "specific recommendation 2", ...],
+    "soft_skills_assessment": ["soft skill observation 1", "soft skill observation 2", ...],
+    "summary": "A concise summary of the candidate's fit for the position."
+}}
+
+Provide only the JSON response without any explanation or additional text:"""
+}
+
+# Job evaluation sessions (see job_session.py): the briefing is sent once per job and every
+# candidate prompt continues it, so these templates refer to the job instead of repeating it.
+JOB_SESSION_BRIEFING = """You will evaluate several candidates for the job below. Each following message contains one candidate's CV and an evaluation task for this job.
+
 Job Description:
 {job_description}
 
 Job Requirements:
 {job_requirements}
 
+Reply with "OK" and wait for the first candidate."""
+
+JOB_SESSION_PROMPTS = {
+    "skills_evaluation": """Evaluate the candidate's skills based on the provided CV and the job requirements above. 
+Consider both technical skills and their relevance to the position.
+Rate the skills match on a scale of 0-100 where:
+- 90-100: Excellent match, possesses all key skills and advanced expertise
+- 70-89: Good match, has most required skills with some advanced capabilities
+- 50-69: Moderate match, has basic required skills but lacks advanced expertise
+- 30-49: Limited match, has some related skills but significant gaps
+- 0-29: Poor match, skills do not align with requirements
+
+CV Skills Section:
+{cv_skills}
+
+Provide only the numeric score (0-100) without any explanation or additional text:""",
+
+    "experience_evaluation": """Evaluate the relevance and quality of the candidate's experience for the job above. Consider:
+- Years of experience in relevant field
+- Progression and growth in roles
+- Responsibilities and achievements that match job requirements
+- Industry experience
+- Leadership or management experience if relevant
+
+Rate the experience match on a scale of 0-100 where:
+- 90-100: Excellent match, extensive relevant experience with clear progression
+- 70-89: Good match, solid relevant experience with some achievements
+- 50-69: Moderate match, some relevant experience but limited
+- 30-49: Limited match, minimal relevant experience
+- 0-29: Poor match, experience not aligned with requirements
+
+CV Experience Section:
+{cv_experience}
+
+Provide only the numeric score (0-100) without any explanation or additional text:""",
+
+    "education_evaluation": """Evaluate the candidate's education against the job requirements above. Consider:
+- Degree level relative to requirements
+- Field of study relevance
+- Institution prestige (if applicable)
+- Additional certifications
+- Continuing education or professional development
+
+Rate the education match on a scale of 0-100 where:
+- 90-100: Excellent match, exceeds educational requirements
+- 70-89: Good match, meets all educational requirements
+- 50-69: Moderate match, meets minimum requirements
+- 30-49: Limited match, partially meets requirements
+- 0-29: Poor match, does not meet requirements
+
+CV Education Section:
+{cv_education}
+
+Provide only the numeric score (0-100) without any explanation or additional text:""",
+
+    "detailed_feedback_with_soft_skills": """Based on the CV and the job above, generate comprehensive feedback that includes assessment of soft skills. 
+Focus on both technical qualifications and interpersonal abilities.
+Provide feedback in the following JSON format:
+
+{{
+    "strengths": ["specific strength 1", "specific strength 2", ...],
+    "weaknesses": ["specific weakness 1", "specific weakness 2", ...],
+    "recommendations": ["specific recommendation 1", "specific recommendation 2", ...],
+    "soft_skills_assessment": ["soft skill observation 1", "soft skill observation 2", ...],
+    "summary": "A concise summary of the candidate's fit for the position."
+}}
+
+CV:
+{cv_text}
+
+Provide only the JSON response without any explanation or additional text:""",
+
+    "combined_evaluation": """Evaluate the candidate's CV against the job above in a single assessment covering skills, experience,
+education, soft skills and overall fit.
+
+Rate each area on a scale of 0-100 where:
+- 90-100: Excellent match
+- 70-89: Good match
+- 50-69: Moderate match
+- 30-49: Limited match
+- 0-29: Poor match
+
+- skills_score: relevance and depth of technical skills compared to the job requirements
+- experience_score: years of relevant experience, progression, responsibilities and achievements, industry and leadership experience
+- education_score: degree level and field of study relative to the requirements, certifications and continuing education
+
+CV Skills Section:
+{cv_skills}
+
+CV Experience Section:
+{cv_experience}
+
+CV Education Section:
+{cv_education}
+
+CV:
+{cv_text}
+
+Provide the evaluation in the following JSON format, with integer scores:
+
+{{
+    "skills_score": 0,
+    "experience_score": 0,
+    "education_score": 0,
+    "strengths": ["specific strength 1", "specific strength 2", ...],
+    "weaknesses": ["specific weakness 1", "specific weakness 2", ...],
+    "recommendations": ["specific recommendation 1", "specific recommendation 2", ...],
+    "soft_skills_assessment": ["soft skill observation 1", "soft skill observation 2", ...],
+    "summary": "A concise summary of the candidate's fit for the position."
+}}
+
 Provide only the JSON response without any explanation or additional text:"""
-}
\ No newline at end of file
+}
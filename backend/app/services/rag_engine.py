@@ -1,13 +1,18 @@
 import os
+import asyncio
 import numpy as np
 import re
-from typing import List, Dict, Any
-import faiss
-import pickle
+from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 import json
-from .llm_service import LLMService
+from .llm_service import LLMService, get_llm_service
+from .vector_store import ShardKey, ShardedVectorStore, get_vector_store
+from .cv_store import CVContentStore, get_cv_store
+from .evaluation_weights import DEFAULT_WEIGHTS
 from .prompts import CV_EVALUATION_PROMPTS
+from .job_session import JobEvaluationSession, JobSessionRegistry
+from .job_embeddings import (JobEmbeddings, JobEmbeddingStore, compute_job_embeddings, get_job_embedding_store,
+                             job_context_text)
 
 @dataclass
 class EvaluationResult:
@@ -20,67 +25,216 @@ class EvaluationResult:
     weaknesses: List[str]
     recommendations: List[str]
 
+class EvaluationMode:
+    PER_SECTION = "per_section"
+    SINGLE_PASS = "single_pass"
+
+
+SCORE_FIELDS = ('skills_score', 'experience_score', 'education_score')
+FEEDBACK_LIST_FIELDS = ('strengths', 'weaknesses', 'recommendations', 'soft_skills_assessment')
+
+
+def parse_combined_evaluation(response: str) -> Dict[str, Any]:
+    """
+    Strictly parse a combined_evaluation response.
+
+    The response must be a single JSON object (optionally wrapped in a Markdown code fence).
+    Each field is validated on its own; fields that are missing or malformed are left out of
+    the result so the caller can fall back to the per-section prompts for just those fields.
+    """
+    text = response.strip()
+    fence = re.fullmatch(r'```(?:json)?\s*(.*?)\s*```', text, re.DOTALL)
+    if fence:
+        text = fence.group(1)
+
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+
+    parsed = {}
+    for name in SCORE_FIELDS:
+        value = data.get(name)
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and 0 <= value <= 100:
+            parsed[name] = float(value)
+    for name in FEEDBACK_LIST_FIELDS:
+        value = data.get(name)
+        if isinstance(value, list) and all(isinstance(item, str) for item in value):
+            parsed[name] = value
+    summary = data.get('summary')
+    if isinstance(summary, str) and summary.strip():
+        parsed['summary'] = summary
+    return parsed
+
+
+# Sections retrieved for the skills, experience and education scores
+RAG_SECTIONS = ['skills', 'experience', 'education']
+
+
 class RAGEngine:
-    def __init__(self, embedding_model_name: str = "embeddinggemma:300m", generation_model_name: str = "gemma:4b"):
-        self.llm_service = LLMService(embedding_model_name, generation_model_name)
-        self.vector_db_path = os.getenv("VECTOR_DB_PATH", "./database/vector_store")
-        self.index = None
-        self.documents = []
-        # Initialize with a placeholder dimension, will be updated in _initialize_vector_store
-        self._initialize_vector_store()
-
-    def _initialize_vector_store(self):
-        os.makedirs(self.vector_db_path, exist_ok=True)
-
-        index_path = os.path.join(self.vector_db_path, "faiss_index.bin")
-        docs_path = os.path.join(self.vector_db_path, "documents.pkl")
-
-        if os.path.exists(index_path) and os.path.exists(docs_path):
-            self.index = faiss.read_index(index_path)
-            self.embedding_dimension = self.index.d  # Get dimension from existing index
-            with open(docs_path, 'rb') as f:
-                self.documents = pickle.load(f)
-        else:
-            # Use a sample embedding to determine the correct dimension
-            sample_embedding = self.llm_service.embed_query("sample text")
-            self.embedding_dimension = len(sample_embedding)
-            print(f"Initialized FAISS index with embedding dimension: {self.embedding_dimension}")
-            self.index = faiss.IndexFlatIP(self.embedding_dimension)
-            self.documents = []
-
-    def add_documents(self, texts: List[str], metadata: List[Dict] = None):
+    def __init__(self, embedding_model_name: str = "embeddinggemma:300m", generation_model_name: str = "gemma:4b",
+                 llm_service: Optional[LLMService] = None, max_llm_concurrency: Optional[int] = None,
+                 evaluation_mode: Optional[str] = None, use_job_sessions: Optional[bool] = None,
+                 job_embedding_store: Optional[JobEmbeddingStore] = None,
+                 cv_store: Optional[CVContentStore] = None, vector_store: Optional[ShardedVectorStore] = None):
+        self.llm_service = llm_service or get_llm_service(embedding_model_name, generation_model_name)
+        # Upper bound on scoring calls issued at once by the async evaluation path
+        self.max_llm_concurrency = max_llm_concurrency or int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+        # per_section: one prompt per score plus one for feedback; single_pass: one combined JSON prompt
+        self.evaluation_mode = evaluation_mode or os.getenv("EVALUATION_MODE", EvaluationMode.PER_SECTION)
+        if self.evaluation_mode not in (EvaluationMode.PER_SECTION, EvaluationMode.SINGLE_PASS):
+            raise ValueError(f"Unknown evaluation mode: {self.evaluation_mode}")
+        # Opt-in: send the job once per job and evaluate each candidate in its context
+        if use_job_sessions is None:
+            use_job_sessions = os.getenv("JOB_SESSIONS_ENABLED", "false").lower() == "true"
+        self.job_sessions = JobSessionRegistry(self.llm_service) if use_job_sessions else None
+        # Precomputed job query embeddings; the shared store is opened on first use
+        self.job_embedding_store = job_embedding_store
+        # Chunks are sharded per company and job; shards are loaded lazily on first use
+        if vector_store is None:
+            vector_store = get_vector_store(os.getenv("VECTOR_DB_PATH", "./database/vector_store"))
+        self.vector_store = vector_store
+        self.vector_db_path = vector_store.root_path
+        # Parsed CVs and their chunk embeddings, reused when the same CV is uploaded again
+        if cv_store is None and os.getenv("CV_STORE_ENABLED", "true").lower() == "true":
+            cv_store = get_cv_store()
+        self.cv_store = cv_store
+
+    def add_documents(self, texts: List[str], metadata: List[Dict] = None, partition: Optional[ShardKey] = None):
         if metadata is None:
             metadata = [{}] * len(texts)
 
+        documents = [{'text': text, 'metadata': metadata[i]} for i, text in enumerate(texts)]
+        self.vector_store.add(partition or ShardKey(), self._embed_documents(texts), documents)
+
+    def _embed_documents(self, texts: List[str]) -> np.ndarray:
         # Generate embeddings using Ollama with embeddingGemma
         embeddings = self.llm_service.embed_documents(texts)
         embeddings = np.array(embeddings)
         # Normalize embeddings for cosine similarity
         embeddings = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings.astype('float32')
 
-        self.index.add(embeddings.astype('float32'))
+    def add_cv_chunks(self, cv_chunks: List[Dict[str, str]], partition: Optional[ShardKey] = None,
+                      candidate_id: Optional[str] = None):
+        """
+        Add chunked CV content to the vector store with appropriate metadata.
 
-        for i, text in enumerate(texts):
-            self.documents.append({
-                'text': text,
-                'metadata': metadata[i]
-            })
+        Args:
+            cv_chunks: List of dictionaries containing 'text' and 'metadata' keys
+            partition: Company/job shard the chunks belong to (unpartitioned if omitted)
+            candidate_id: Identifier of the candidate the chunks were extracted from
+        """
+        self.add_cv_chunks_batch([(candidate_id, cv_chunks)], partition)
 
-        self._save_vector_store()
+    def add_cv_chunks_batch(self, candidates: List[Tuple[Optional[str], List[Dict[str, str]]]],
+                            partition: Optional[ShardKey] = None):
+        """
+        Add the chunks of several CVs with one embedding call and one vector store write.
 
-    def add_cv_chunks(self, cv_chunks: List[Dict[str, str]]):
+        Args:
+            candidates: List of (candidate_id, cv_chunks) pairs
+            partition: Company/job shard the chunks belong to (unpartitioned if omitted)
         """
-        Add chunked CV content to the vector store with appropriate metadata.
+        partition = partition or ShardKey()
+        shard = self.vector_store.get_shard(partition)
+
+        texts = []
+        metadatas = []
+        seen = set()
+        for candidate_id, cv_chunks in candidates:
+            # Re-uploads of the same CV for the same job are already indexed
+            if candidate_id is not None:
+                if candidate_id in seen or shard.has_candidate(candidate_id):
+                    continue
+                seen.add(candidate_id)
+
+            for chunk in cv_chunks:
+                metadata = dict(chunk['metadata'])
+                metadata.update(company_id=partition.company_id, job_id=partition.job_id, candidate_id=candidate_id)
+                texts.append(chunk['text'])
+                metadatas.append(metadata)
+
+        if texts:
+            self.add_documents(texts, metadatas, partition)
+
+    def add_cv_sections(self, cv_sections: Dict[str, str], partition: Optional[ShardKey] = None,
+                        candidate_id: Optional[str] = None):
+        """
+        Chunk a CV's sections and add them to the vector store, reusing stored chunks and embeddings.
 
         Args:
-            cv_chunks: List of dictionaries containing 'text' and 'metadata' keys
+            cv_sections: Sections returned by DocumentProcessor.extract_cv_sections
+            partition: Company/job shard the chunks belong to (unpartitioned if omitted)
+            candidate_id: Identifier of the candidate the sections were extracted from
         """
-        texts = [chunk['text'] for chunk in cv_chunks]
-        metadatas = [chunk['metadata'] for chunk in cv_chunks]
+        self.add_cv_sections_batch([(candidate_id, cv_sections)], partition)
 
-        self.add_documents(texts, metadatas)
+    def add_cv_sections_batch(self, candidates: List[Tuple[Optional[str], Dict[str, str]]],
+                              partition: Optional[ShardKey] = None):
+        """
+        Add the sections of several CVs with at most one embedding call and one vector store write.
+
+        CVs already in the shard are skipped before chunking. Otherwise, chunks and embeddings of a
+        candidate found in the CV store are reused, and only the remaining CVs are chunked and embedded.
 
-    def search_cv_chunks(self, query: str, k: int = 5, section_filter: str = None) -> List[Dict]:
+        Args:
+            candidates: List of (candidate_id, cv_sections) pairs
+            partition: Company/job shard the chunks belong to (unpartitioned if omitted)
+        """
+        partition = partition or ShardKey()
+        shard = self.vector_store.get_shard(partition)
+        model = self.llm_service.embedding_model_name
+
+        # [candidate_id, chunks, embeddings], in upload order; embeddings are filled in below when not stored
+        entries = []
+        seen = set()
+        for candidate_id, cv_sections in candidates:
+            # Re-uploads of the same CV for the same job are already indexed
+            if candidate_id is not None:
+                if candidate_id in seen or shard.has_candidate(candidate_id):
+                    continue
+                seen.add(candidate_id)
+
+            found = None
+            if self.cv_store is not None and candidate_id is not None:
+                found = self.cv_store.get_chunks(candidate_id, model)
+            if found is not None:
+                entries.append([candidate_id, *found])
+            else:
+                entries.append([candidate_id, self.llm_service.split_cv_sections(cv_sections), None])
+
+        new = [entry for entry in entries if entry[2] is None]
+        texts = [chunk['text'] for _, cv_chunks, _ in new for chunk in cv_chunks]
+        embeddings = self._embed_documents(texts) if texts else None
+        start = 0
+        for entry in new:
+            candidate_id, cv_chunks, _ = entry
+            entry[2] = embeddings[start:start + len(cv_chunks)] if cv_chunks else None
+            start += len(cv_chunks)
+            if self.cv_store is not None and candidate_id is not None and cv_chunks:
+                self.cv_store.put_chunks(candidate_id, model, cv_chunks, entry[2])
+
+        documents = []
+        vectors = []
+        for candidate_id, cv_chunks, chunk_vectors in entries:
+            if not cv_chunks:
+                continue
+            for chunk in cv_chunks:
+                metadata = dict(chunk['metadata'])
+                metadata.update(company_id=partition.company_id, job_id=partition.job_id, candidate_id=candidate_id)
+                documents.append({'text': chunk['text'], 'metadata': metadata})
+            vectors.append(chunk_vectors)
+
+        if documents:
+            # Checked again under the shard lock: a concurrent upload of the same CV may have
+            # indexed it since the check above
+            self.vector_store.add_if_absent(partition, np.concatenate(vectors), documents)
+
+    def search_cv_chunks(self, query: str, k: int = 5, section_filter: str = None,
+                         partition: Optional[ShardKey] = None, candidate_id: Optional[str] = None) -> List[Dict]:
         """
         Search for similar CV chunks, with optional section filtering.
 
@@ -88,18 +242,49 @@ class RAGEngine:
             query: The search query
             k: Number of results to return
             section_filter: Optional section to filter by ('skills', 'experience', etc.)
+            partition: Company/job shard to search (unpartitioned if omitted)
+            candidate_id: Optional candidate to restrict the search to
 
         Returns:
             List of matching chunks with metadata
         """
-        results = self.search_similar(query, k)
+        return self.search_similar(query, k, section_filter, partition, candidate_id)
 
-        if section_filter:
-            results = [r for r in results if r['metadata'].get('section') == section_filter]
+    def search_cv_chunks_batch(self, queries: List[str], section_filters: List[Optional[str]], k: int = 5,
+                               partition: Optional[ShardKey] = None,
+                               candidate_id: Optional[str] = None) -> List[List[Dict]]:
+        """
+        Run several searches with one embedding call and one matrix search.
 
-        return results
+        Args:
+            queries: Search queries; repeated queries are embedded once
+            section_filters: Section to filter by for each query (None for no filter)
+            k: Number of results to return per query
+            partition: Company/job shard to search (unpartitioned if omitted)
+            candidate_id: Optional candidate to restrict the searches to
 
-    def evaluate_cv_with_rag_context(self, cv_sections: Dict[str, str], job_description: str, job_requirements: str) -> EvaluationResult:
+        Returns:
+            List of matching chunks for each query, in query order
+        """
+        if len(queries) != len(section_filters):
+            raise ValueError("queries and section_filters must have the same length")
+
+        shard = self.vector_store.get_shard(partition or ShardKey())
+        if shard.ntotal == 0 or not queries:
+            return [[] for _ in queries]
+
+        unique_queries = list(dict.fromkeys(queries))
+        embeddings = np.array(self.llm_service.embed_queries(unique_queries), dtype='float32')
+        # Normalize query embeddings for cosine similarity
+        embeddings = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+        rows = [unique_queries.index(query) for query in queries]
+
+        return self._search_batch_by_embedding(embeddings[rows], [(k, section) for section in section_filters],
+                                               partition, candidate_id)
+
+    def evaluate_cv_with_rag_context(self, cv_sections: Dict[str, str], job_description: str, job_requirements: str,
+                                     partition: Optional[ShardKey] = None, candidate_id: Optional[str] = None,
+                                     use_cache: bool = True) -> EvaluationResult:
         """
         Enhanced evaluation using RAG to retrieve relevant context from CV chunks.
 
@@ -107,16 +292,294 @@ class RAGEngine:
             cv_sections: Dictionary containing CV sections
             job_description: Job description
             job_requirements: Job requirements
+            partition: Company/job shard holding the CV chunks
+            candidate_id: Candidate whose chunks should be retrieved
+            use_cache: Set to False to force fresh generations even if the response cache is enabled
 
         Returns:
             EvaluationResult with scores and feedback
         """
-        job_context = f"Job Description: {job_description}\n\nRequirements: {job_requirements}"
+        job_context, enhanced_skills, enhanced_experience, enhanced_education = self._retrieve_rag_context(
+            cv_sections, job_description, job_requirements, partition, candidate_id
+        )
+        session = self.get_job_session(job_description, job_requirements)
+
+        if self.evaluation_mode == EvaluationMode.SINGLE_PASS:
+            parsed = self._generate_combined_evaluation_llm(
+                cv_sections, job_description, job_requirements, enhanced_skills, enhanced_experience,
+                enhanced_education, use_cache, session
+            )
+            fallbacks = self._single_pass_fallbacks(
+                parsed, cv_sections, job_description, job_requirements, job_context, enhanced_skills,
+                enhanced_experience, enhanced_education, use_cache, session
+            )
+            results = {name: func(*args) for name, (func, *args) in fallbacks.items()}
+            return self._merge_single_pass(parsed, results)
+
+        skills_score = self._evaluate_skills_match_llm(enhanced_skills, job_requirements, use_cache, session)
+        experience_score = self._evaluate_experience_match_llm(enhanced_experience, job_context, use_cache, session)
+        education_score = self._evaluate_education_match_llm(enhanced_education, job_requirements, use_cache, session)
+
+        # Generate detailed feedback using LLM
+        feedback = self._generate_detailed_feedback_llm(cv_sections, job_description, job_requirements, use_cache,
+                                                        session)
+
+        return self._build_evaluation_result(skills_score, experience_score, education_score, feedback)
+
+    async def evaluate_cv_with_rag_context_async(self, cv_sections: Dict[str, str], job_description: str,
+                                                 job_requirements: str, partition: Optional[ShardKey] = None,
+                                                 candidate_id: Optional[str] = None,
+                                                 max_concurrency: Optional[int] = None,
+                                                 use_cache: bool = True) -> EvaluationResult:
+        """
+        Async variant of evaluate_cv_with_rag_context.
+
+        The skills, experience and education scoring calls and the feedback generation are
+        independent of each other, so they are issued concurrently instead of one after another.
+        Results are identical to the serial path.
+
+        Args:
+            cv_sections: Dictionary containing CV sections
+            job_description: Job description
+            job_requirements: Job requirements
+            partition: Company/job shard holding the CV chunks
+            candidate_id: Candidate whose chunks should be retrieved
+            max_concurrency: Maximum number of LLM calls in flight (defaults to LLM_MAX_CONCURRENCY)
+            use_cache: Set to False to force fresh generations even if the response cache is enabled
+
+        Returns:
+            EvaluationResult with scores and feedback
+        """
+        rag_context = await asyncio.to_thread(
+            self._retrieve_rag_context, cv_sections, job_description, job_requirements, partition, candidate_id
+        )
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_llm_concurrency)
+        return await self.score_with_context_async(cv_sections, job_description, job_requirements, rag_context,
+                                                   semaphore, use_cache)
+
+    async def score_with_context_async(self, cv_sections: Dict[str, str], job_description: str,
+                                       job_requirements: str, rag_context: Tuple[str, str, str, str],
+                                       semaphore: asyncio.Semaphore, use_cache: bool = True) -> EvaluationResult:
+        """
+        Run the LLM scoring calls of an evaluation whose retrieval is done.
+
+        Args:
+            cv_sections: Dictionary containing CV sections
+            job_description: Job description
+            job_requirements: Job requirements
+            rag_context: (job_context, enhanced_skills, enhanced_experience, enhanced_education)
+            semaphore: Bounds the LLM calls in flight; may be shared by several evaluations
+            use_cache: Set to False to force fresh generations even if the response cache is enabled
+
+        Returns:
+            EvaluationResult with scores and feedback
+        """
+        job_context, enhanced_skills, enhanced_experience, enhanced_education = rag_context
+        session = self.get_job_session(job_description, job_requirements)
+
+        async def run_limited(func, *args):
+            async with semaphore:
+                return await func(*args)
+
+        if self.evaluation_mode == EvaluationMode.SINGLE_PASS:
+            parsed = await run_limited(
+                self._generate_combined_evaluation_llm_async, cv_sections, job_description, job_requirements,
+                enhanced_skills, enhanced_experience, enhanced_education, use_cache, session
+            )
+            fallbacks = self._single_pass_fallbacks(
+                parsed, cv_sections, job_description, job_requirements, job_context, enhanced_skills,
+                enhanced_experience, enhanced_education, use_cache, session, asynchronous=True
+            )
+            values = await asyncio.gather(*(run_limited(*call) for call in fallbacks.values()))
+            return self._merge_single_pass(parsed, dict(zip(fallbacks.keys(), values)))
+
+        skills_score, experience_score, education_score, feedback = await asyncio.gather(
+            run_limited(self._evaluate_skills_match_llm_async, enhanced_skills, job_requirements, use_cache, session),
+            run_limited(self._evaluate_experience_match_llm_async, enhanced_experience, job_context, use_cache,
+                        session),
+            run_limited(self._evaluate_education_match_llm_async, enhanced_education, job_requirements, use_cache,
+                        session),
+            run_limited(self._generate_detailed_feedback_llm_async, cv_sections, job_description, job_requirements,
+                        use_cache, session),
+        )
+
+        return self._build_evaluation_result(skills_score, experience_score, education_score, feedback)
+
+    def get_job_embeddings(self, job_id: int, job_description: str, job_requirements: str) -> JobEmbeddings:
+        """
+        Query embeddings of a job, computed and stored now if the stored ones are missing or stale
+        (jobs saved before embeddings were precomputed, a changed embedding model or a pending refresh).
+        """
+        store = self.job_embedding_store or get_job_embedding_store()
+        embeddings = store.get(job_id, self.llm_service.embedding_model_name, job_description, job_requirements)
+        if embeddings is None:
+            embeddings = compute_job_embeddings(self.llm_service, job_description, job_requirements)
+            store.put(job_id, embeddings)
+        return embeddings
+
+    def get_job_session(self, job_description: str, job_requirements: str) -> Optional[JobEvaluationSession]:
+        """
+        Shared evaluation session for the job, or None if job sessions are disabled.
+        """
+        if self.job_sessions is None:
+            return None
+        return self.job_sessions.get(job_description, job_requirements)
+
+    def _generate_for_template(self, template_id: str, use_cache: bool = True,
+                               session: Optional[JobEvaluationSession] = None, **fields) -> str:
+        """
+        Render and generate one evaluation prompt, in the job session's context if one is given.
+        """
+        if session is not None:
+            return session.generate(template_id, use_cache, **fields)
+        prompt = CV_EVALUATION_PROMPTS[template_id].format(**fields)
+        return self.llm_service.generate_text(prompt, template_id, use_cache)
+
+    async def _generate_for_template_async(self, template_id: str, use_cache: bool = True,
+                                           session: Optional[JobEvaluationSession] = None, **fields) -> str:
+        """
+        Awaitable _generate_for_template.
+        """
+        if session is not None:
+            return await session.generate_async(template_id, use_cache, **fields)
+        prompt = CV_EVALUATION_PROMPTS[template_id].format(**fields)
+        return await self.llm_service.generate_text_async(prompt, template_id, use_cache)
+
+    def _try_generate(self, template_id: str, use_cache: bool = True,
+                      session: Optional[JobEvaluationSession] = None, **fields) -> Optional[str]:
+        """
+        _generate_for_template, or None if the generation failed.
+        """
+        try:
+            return self._generate_for_template(template_id, use_cache, session, **fields)
+        except Exception:
+            return None
+
+    async def _try_generate_async(self, template_id: str, use_cache: bool = True,
+                                  session: Optional[JobEvaluationSession] = None, **fields) -> Optional[str]:
+        try:
+            return await self._generate_for_template_async(template_id, use_cache, session, **fields)
+        except Exception:
+            return None
+
+    def _retrieve_rag_context(self, cv_sections: Dict[str, str], job_description: str, job_requirements: str,
+                              partition: Optional[ShardKey] = None, candidate_id: Optional[str] = None):
+        """
+        Retrieve relevant CV chunks for each evaluation aspect and merge them with the parsed sections.
+
+        Returns:
+            Tuple of (job_context, enhanced_skills, enhanced_experience, enhanced_education)
+        """
+        # Retrieve relevant chunks for each evaluation aspect, in one matrix search
+        if partition is not None and partition.job_id is not None:
+            # Job queries were embedded when the job was saved; no embedding calls per upload
+            return self.retrieve_rag_contexts(cv_sections, [(partition, job_description, job_requirements)],
+                                              candidate_id)[0]
+
+        job_context = job_context_text(job_description, job_requirements)
+        retrieved = self.search_cv_chunks_batch(
+            [job_requirements, job_context, job_requirements], RAG_SECTIONS, k=3,
+            partition=partition, candidate_id=candidate_id
+        )
+        return self._enhance_sections(cv_sections, job_context, retrieved)
 
-        # Retrieve relevant chunks for each evaluation aspect
-        skills_chunks = self.search_cv_chunks(job_requirements, k=3, section_filter='skills')
-        experience_chunks = self.search_cv_chunks(job_context, k=3, section_filter='experience')
-        education_chunks = self.search_cv_chunks(job_requirements, k=3, section_filter='education')
+    def retrieve_rag_contexts(self, cv_sections: Dict[str, str], jobs: List[Tuple[ShardKey, str, str]],
+                              candidate_id: Optional[str] = None) -> List[Tuple[str, str, str, str]]:
+        """
+        Retrieve the RAG context of one CV for several jobs with one batched search.
+
+        The jobs' stored query embeddings are stacked and searched against the candidate's chunks in
+        the first job's shard. A candidate's chunks are the same in every shard they were added to,
+        so each job gets what a search of its own shard would return. If a job's shard doesn't hold
+        the candidate, or no candidate is given, each job's shard is searched on its own instead.
+
+        Args:
+            cv_sections: Dictionary containing CV sections
+            jobs: (partition, job_description, job_requirements) of each job; partitions need a job_id
+                and must all belong to the same company
+            candidate_id: Candidate whose chunks should be retrieved
+
+        Returns:
+            (job_context, enhanced_skills, enhanced_experience, enhanced_education) for each job, in order
+
+        Raises:
+            ValueError: If the jobs belong to different companies
+        """
+        if not jobs:
+            return []
+        if len({partition.company_id for partition, _, _ in jobs}) > 1:
+            raise ValueError("Jobs retrieved together must belong to the same company")
+
+        queries = []
+        for partition, job_description, job_requirements in jobs:
+            job_embeddings = self.get_job_embeddings(partition.job_id, job_description, job_requirements)
+            queries.extend([job_embeddings.requirements, job_embeddings.context, job_embeddings.requirements])
+        requests = [(3, section) for section in RAG_SECTIONS]
+
+        if candidate_id is not None and all(self.vector_store.get_shard(partition).has_candidate(candidate_id)
+                                            for partition, _, _ in jobs):
+            retrieved = self._search_batch_by_embedding(np.vstack(queries), requests * len(jobs), jobs[0][0],
+                                                        candidate_id)
+        else:
+            retrieved = []
+            for i, (partition, _, _) in enumerate(jobs):
+                retrieved.extend(self._search_batch_by_embedding(np.vstack(queries[3 * i:3 * i + 3]), requests,
+                                                                 partition, candidate_id))
+
+        contexts = []
+        for i, (_, job_description, job_requirements) in enumerate(jobs):
+            job_context = job_context_text(job_description, job_requirements)
+            contexts.append(self._enhance_sections(cv_sections, job_context, retrieved[3 * i:3 * i + 3]))
+        return contexts
+
+    def prescreen(self, partition: ShardKey, job_description: str, job_requirements: str,
+                  candidates: List[Tuple[str, Dict[str, str]]]) -> List[EvaluationResult]:
+        """
+        Embedding-only scores of indexed CVs against a job, without LLM or embedding calls.
+
+        Each section score is the best similarity between the job query used to retrieve that section
+        and the candidate's chunks of it, scaled like the embedding-only scorers
+        (_evaluate_skills_match etc.). Every candidate is scored with one matrix product over the
+        shard rows. Feedback is the rule-based one.
+
+        Args:
+            partition: Company/job shard holding the CVs' chunks; needs a job_id
+            job_description: Job description
+            job_requirements: Job requirements
+            candidates: List of (candidate_id, cv_sections) pairs
+
+        Returns:
+            A provisional EvaluationResult for each candidate, in order
+        """
+        if not candidates:
+            return []
+
+        job_embeddings = self.get_job_embeddings(partition.job_id, job_description, job_requirements)
+        queries = np.vstack([job_embeddings.requirements, job_embeddings.context, job_embeddings.requirements])
+        similarities = self.vector_store.get_shard(partition).candidate_section_scores(
+            queries, RAG_SECTIONS, [candidate_id for candidate_id, _ in candidates]
+        )
+
+        # Same ranges and defaults as the skills, experience and education scorers
+        scores = np.clip(similarities * 100, [0.0, 0.0, 30.0], 100.0)
+        scores = np.where(np.isnan(scores), [0.0, 0.0, 50.0], scores)
+
+        job_context = job_context_text(job_description, job_requirements)
+        results = []
+        for (_, cv_sections), (skills_score, experience_score, education_score) in zip(candidates, scores.tolist()):
+            strengths, weaknesses, recommendations = self._generate_detailed_feedback(
+                cv_sections, job_context, skills_score, experience_score, education_score
+            )
+            overall_score = DEFAULT_WEIGHTS.overall_score(skills_score, experience_score, education_score)
+            summary = "Provisional pre-screen score from embedding similarity only. " + \
+                self._generate_summary_feedback(overall_score, strengths, weaknesses)
+            results.append(self._build_evaluation_result(
+                skills_score, experience_score, education_score, (strengths, weaknesses, recommendations, summary)
+            ))
+        return results
+
+    def _enhance_sections(self, cv_sections: Dict[str, str], job_context: str, retrieved: List[List[Dict]]):
+        skills_chunks, experience_chunks, education_chunks = retrieved
 
         # Use retrieved chunks for more targeted evaluation
         cv_skills = cv_sections.get('skills', '')
@@ -133,38 +596,146 @@ class RAGEngine:
         enhanced_experience = cv_experience + " " + retrieved_experience
         enhanced_education = cv_education + " " + retrieved_education
 
-        skills_score = self._evaluate_skills_match_llm(enhanced_skills, job_requirements)
-        experience_score = self._evaluate_experience_match_llm(enhanced_experience, job_context)
-        education_score = self._evaluate_education_match_llm(enhanced_education, job_requirements)
+        return job_context, enhanced_skills, enhanced_experience, enhanced_education
 
-        overall_score = (skills_score * 0.4 + experience_score * 0.4 + education_score * 0.2)
-
-        # Generate detailed feedback using LLM
-        strengths, weaknesses, recommendations, feedback = self._generate_detailed_feedback_llm(
-            cv_sections, job_description, job_requirements
-        )
+    def _build_evaluation_result(self, skills_score: float, experience_score: float, education_score: float,
+                                 feedback) -> EvaluationResult:
+        strengths, weaknesses, recommendations, summary = feedback
 
+        # Default weights; saved evaluations are rescored with their company's or job's weights
         return EvaluationResult(
-            overall_score=round(overall_score, 1),
+            overall_score=DEFAULT_WEIGHTS.overall_score(skills_score, experience_score, education_score),
             skills_score=round(skills_score, 1),
             experience_score=round(experience_score, 1),
             education_score=round(education_score, 1),
-            feedback=feedback,
+            feedback=summary,
             strengths=strengths,
             weaknesses=weaknesses,
             recommendations=recommendations
         )
 
-    def _save_vector_store(self):
-        index_path = os.path.join(self.vector_db_path, "faiss_index.bin")
-        docs_path = os.path.join(self.vector_db_path, "documents.pkl")
+    def _generate_combined_evaluation_llm(self, cv_sections: Dict[str, str], job_description: str,
+                                          job_requirements: str, cv_skills: str, cv_experience: str,
+                                          cv_education: str, use_cache: bool = True,
+                                          session: Optional[JobEvaluationSession] = None) -> Dict[str, Any]:
+        """
+        Ask for all section scores and feedback in one JSON response.
+
+        Returns:
+            The fields that parsed and validated; empty if the call or parsing failed
+        """
+        response = self._try_generate(
+            "combined_evaluation", use_cache, session,
+            **self._combined_evaluation_fields(cv_sections, job_description, job_requirements, cv_skills,
+                                               cv_experience, cv_education)
+        )
+        return self._parse_combined_response(response)
+
+    async def _generate_combined_evaluation_llm_async(self, cv_sections: Dict[str, str], job_description: str,
+                                                      job_requirements: str, cv_skills: str, cv_experience: str,
+                                                      cv_education: str, use_cache: bool = True,
+                                                      session: Optional[JobEvaluationSession] = None
+                                                      ) -> Dict[str, Any]:
+        response = await self._try_generate_async(
+            "combined_evaluation", use_cache, session,
+            **self._combined_evaluation_fields(cv_sections, job_description, job_requirements, cv_skills,
+                                               cv_experience, cv_education)
+        )
+        return self._parse_combined_response(response)
+
+    @staticmethod
+    def _combined_evaluation_fields(cv_sections: Dict[str, str], job_description: str, job_requirements: str,
+                                    cv_skills: str, cv_experience: str, cv_education: str) -> Dict[str, str]:
+        cv_text = "\n".join([f"{section}: {content}" for section, content in cv_sections.items() if content])
+        return {
+            'cv_skills': cv_skills,
+            'cv_experience': cv_experience,
+            'cv_education': cv_education,
+            'cv_text': cv_text,
+            'job_description': job_description,
+            'job_requirements': job_requirements
+        }
+
+    @staticmethod
+    def _parse_combined_response(response: Optional[str]) -> Dict[str, Any]:
+        if response is None:
+            return {}
+        try:
+            return parse_combined_evaluation(response)
+        except Exception:
+            return {}
+
+    def _single_pass_fallbacks(self, parsed: Dict[str, Any], cv_sections: Dict[str, str], job_description: str,
+                               job_requirements: str, job_context: str, enhanced_skills: str,
+                               enhanced_experience: str, enhanced_education: str, use_cache: bool = True,
+                               session: Optional[JobEvaluationSession] = None, asynchronous: bool = False) -> Dict:
+        """
+        Per-section calls needed for the fields the combined response did not provide.
 
-        faiss.write_index(self.index, index_path)
-        with open(docs_path, 'wb') as f:
-            pickle.dump(self.documents, f)
+        Args:
+            asynchronous: Return the coroutine functions instead of the blocking ones
+
+        Returns:
+            Dict of field name -> (function, *args)
+        """
+        if asynchronous:
+            skills, experience, education, feedback = (
+                self._evaluate_skills_match_llm_async, self._evaluate_experience_match_llm_async,
+                self._evaluate_education_match_llm_async, self._generate_detailed_feedback_llm_async
+            )
+        else:
+            skills, experience, education, feedback = (
+                self._evaluate_skills_match_llm, self._evaluate_experience_match_llm,
+                self._evaluate_education_match_llm, self._generate_detailed_feedback_llm
+            )
+
+        fallbacks = {}
+        if 'skills_score' not in parsed:
+            fallbacks['skills_score'] = (skills, enhanced_skills, job_requirements, use_cache, session)
+        if 'experience_score' not in parsed:
+            fallbacks['experience_score'] = (experience, enhanced_experience, job_context, use_cache, session)
+        if 'education_score' not in parsed:
+            fallbacks['education_score'] = (education, enhanced_education, job_requirements, use_cache, session)
+        if any(name not in parsed for name in ('strengths', 'weaknesses', 'recommendations', 'summary')):
+            fallbacks['feedback'] = (feedback, cv_sections, job_description, job_requirements, use_cache, session)
+        return fallbacks
+
+    def _merge_single_pass(self, parsed: Dict[str, Any], fallback_results: Dict[str, Any]) -> EvaluationResult:
+        skills_score = parsed['skills_score'] if 'skills_score' in parsed else fallback_results['skills_score']
+        experience_score = parsed['experience_score'] if 'experience_score' in parsed else fallback_results['experience_score']
+        if 'education_score' in parsed:
+            # Same floor as the per-section education prompt
+            education_score = max(30.0, parsed['education_score'])
+        else:
+            education_score = fallback_results['education_score']
+
+        strengths = list(parsed.get('strengths', []))
+        strengths.extend(parsed.get('soft_skills_assessment', []))
+        weaknesses = parsed.get('weaknesses', [])
+        recommendations = parsed.get('recommendations', [])
+        summary = parsed.get('summary', '')
+
+        if 'feedback' in fallback_results:
+            # Only fill in the feedback fields the combined response was missing
+            fb_strengths, fb_weaknesses, fb_recommendations, fb_summary = fallback_results['feedback']
+            if 'strengths' not in parsed:
+                # Already includes the fallback's own soft skills assessment
+                strengths = fb_strengths
+            if 'weaknesses' not in parsed:
+                weaknesses = fb_weaknesses
+            if 'recommendations' not in parsed:
+                recommendations = fb_recommendations
+            if 'summary' not in parsed:
+                summary = fb_summary
+
+        return self._build_evaluation_result(
+            skills_score, experience_score, education_score, (strengths, weaknesses, recommendations, summary)
+        )
 
-    def search_similar(self, query: str, k: int = 5) -> List[Dict]:
-        if self.index.ntotal == 0:
+    def search_similar(self, query: str, k: int = 5, section_filter: Optional[str] = None,
+                       partition: Optional[ShardKey] = None, candidate_id: Optional[str] = None) -> List[Dict]:
+        shard = self.vector_store.get_shard(partition or ShardKey())
+        if shard.ntotal == 0:
             return []
 
         # Generate embedding for query using Ollama with embeddingGemma
@@ -172,18 +743,23 @@ class RAGEngine:
         # Normalize query embedding for cosine similarity
         query_embedding = query_embedding / np.linalg.norm(query_embedding, axis=1, keepdims=True)
 
-        scores, indices = self.index.search(query_embedding.astype('float32'), k)
+        return self._search_by_embedding(query_embedding, k, section_filter, partition, candidate_id)
 
-        results = []
-        for i, (score, idx) in enumerate(zip(scores[0], indices[0])):
-            if idx >= 0 and idx < len(self.documents):
-                results.append({
-                    'text': self.documents[idx]['text'],
-                    'metadata': self.documents[idx]['metadata'],
-                    'score': float(score)
-                })
+    def _search_by_embedding(self, query_embedding: np.ndarray, k: int = 5, section_filter: Optional[str] = None,
+                             partition: Optional[ShardKey] = None, candidate_id: Optional[str] = None) -> List[Dict]:
+        """
+        search_similar for an already normalized query embedding.
+        """
+        return self._search_batch_by_embedding(query_embedding.reshape(1, -1), [(k, section_filter)],
+                                               partition, candidate_id)[0]
 
-        return results
+    def _search_batch_by_embedding(self, query_embeddings: np.ndarray, requests: List[Tuple[int, Optional[str]]],
+                                   partition: Optional[ShardKey] = None,
+                                   candidate_id: Optional[str] = None) -> List[List[Dict]]:
+        shard = self.vector_store.get_shard(partition or ShardKey())
+        if shard.ntotal == 0:
+            return [[] for _ in requests]
+        return shard.search_batch(query_embeddings.astype('float32'), requests, candidate_id)
 
     def calculate_similarity_score(self, text1: str, text2: str) -> float:
         # Generate embeddings for both texts using Ollama with embeddingGemma
@@ -195,32 +771,20 @@ class RAGEngine:
         similarity = np.dot(embeddings[0], embeddings[1])
         return float(similarity)
 
-    def evaluate_cv_against_job(self, cv_sections: Dict[str, str], job_description: str, job_requirements: str) -> EvaluationResult:
+    def evaluate_cv_against_job(self, cv_sections: Dict[str, str], job_description: str, job_requirements: str,
+                                use_cache: bool = True) -> EvaluationResult:
         job_context = f"Job Description: {job_description}\n\nRequirements: {job_requirements}"
 
-        skills_score = self._evaluate_skills_match_llm(cv_sections.get('skills', ''), job_requirements)
-
-        experience_score = self._evaluate_experience_match_llm(cv_sections.get('experience', ''), job_context)
+        skills_score = self._evaluate_skills_match_llm(cv_sections.get('skills', ''), job_requirements, use_cache)
 
-        education_score = self._evaluate_education_match_llm(cv_sections.get('education', ''), job_requirements)
+        experience_score = self._evaluate_experience_match_llm(cv_sections.get('experience', ''), job_context, use_cache)
 
-        overall_score = (skills_score * 0.4 + experience_score * 0.4 + education_score * 0.2)
+        education_score = self._evaluate_education_match_llm(cv_sections.get('education', ''), job_requirements, use_cache)
 
         # Generate detailed feedback using LLM
-        strengths, weaknesses, recommendations, feedback = self._generate_detailed_feedback_llm(
-            cv_sections, job_description, job_requirements
-        )
+        feedback = self._generate_detailed_feedback_llm(cv_sections, job_description, job_requirements, use_cache)
 
-        return EvaluationResult(
-            overall_score=round(overall_score, 1),
-            skills_score=round(skills_score, 1),
-            experience_score=round(experience_score, 1),
-            education_score=round(education_score, 1),
-            feedback=feedback,
-            strengths=strengths,
-            weaknesses=weaknesses,
-            recommendations=recommendations
-        )
+        return self._build_evaluation_result(skills_score, experience_score, education_score, feedback)
 
     def _evaluate_skills_match(self, cv_skills: str, job_requirements: str) -> float:
         if not cv_skills or not job_requirements:
@@ -298,63 +862,51 @@ class RAGEngine:
 
         return " ".join(feedback_parts)
 
-    def _evaluate_skills_match_llm(self, cv_skills: str, job_requirements: str) -> float:
+    def _evaluate_skills_match_llm(self, cv_skills: str, job_requirements: str, use_cache: bool = True,
+                                   session: Optional[JobEvaluationSession] = None) -> float:
         """
         Evaluate skills match using LLM
         """
         if not cv_skills or not job_requirements:
             return 0.0
 
-        prompt = CV_EVALUATION_PROMPTS["skills_evaluation"].format(
-            cv_skills=cv_skills,
-            job_requirements=job_requirements
-        )
+        response = self._try_generate("skills_evaluation", use_cache, session,
+                                      cv_skills=cv_skills, job_requirements=job_requirements)
+        return self._section_score(response, cv_skills, job_requirements)
 
-        try:
-            response = self.llm_service.generate_text(prompt)
-            # Extract numeric score from the response
-            score_match = re.search(r'\d+', response)
-            if score_match:
-                score = float(score_match.group())
-                return max(0.0, min(100.0, score))  # Ensure score is between 0-100
-            else:
-                # Fallback to similarity if LLM didn't return a numeric score
-                similarity = self.calculate_similarity_score(cv_skills, job_requirements)
-                return min(100.0, max(0.0, similarity * 100))
-        except Exception:
-            # Fallback to similarity if LLM fails
-            similarity = self.calculate_similarity_score(cv_skills, job_requirements)
-            return min(100.0, max(0.0, similarity * 100))
+    async def _evaluate_skills_match_llm_async(self, cv_skills: str, job_requirements: str, use_cache: bool = True,
+                                               session: Optional[JobEvaluationSession] = None) -> float:
+        if not cv_skills or not job_requirements:
+            return 0.0
 
-    def _evaluate_experience_match_llm(self, cv_experience: str, job_context: str) -> float:
+        response = await self._try_generate_async("skills_evaluation", use_cache, session,
+                                                  cv_skills=cv_skills, job_requirements=job_requirements)
+        return await self._section_score_async(response, cv_skills, job_requirements)
+
+    def _evaluate_experience_match_llm(self, cv_experience: str, job_context: str, use_cache: bool = True,
+                                       session: Optional[JobEvaluationSession] = None) -> float:
         """
         Evaluate experience match using LLM
         """
         if not cv_experience or not job_context:
             return 0.0
 
-        prompt = CV_EVALUATION_PROMPTS["experience_evaluation"].format(
-            cv_experience=cv_experience,
-            job_context=job_context
-        )
+        response = self._try_generate("experience_evaluation", use_cache, session,
+                                      cv_experience=cv_experience, job_context=job_context)
+        return self._section_score(response, cv_experience, job_context)
 
-        try:
-            response = self.llm_service.generate_text(prompt)
-            # Extract numeric score from the response
-            score_match = re.search(r'\d+', response)
-            if score_match:
-                score = float(score_match.group())
-                return max(0.0, min(100.0, score))  # Ensure score is between 0-100
-            else:
-                # Fallback to similarity if LLM didn't return a numeric score
-                similarity = self.calculate_similarity_score(cv_experience, job_context)
-                return min(100.0, max(0.0, similarity * 100))
-        except Exception:
-            # Fallback to similarity if LLM fails
-            similarity = self.calculate_similarity_score(cv_experience, job_context)
-            return min(100.0, max(0.0, similarity * 100))
+    async def _evaluate_experience_match_llm_async(self, cv_experience: str, job_context: str,
+                                                   use_cache: bool = True,
+                                                   session: Optional[JobEvaluationSession] = None) -> float:
+        if not cv_experience or not job_context:
+            return 0.0
 
-    def _evaluate_education_match_llm(self, cv_education: str, job_requirements: str) -> float:
+        response = await self._try_generate_async("experience_evaluation", use_cache, session,
+                                                  cv_experience=cv_experience, job_context=job_context)
+        return await self._section_score_async(response, cv_experience, job_context)
+
+    def _evaluate_education_match_llm(self, cv_education: str, job_requirements: str, use_cache: bool = True,
+                                      session: Optional[JobEvaluationSession] = None) -> float:
         """
         Evaluate education match using LLM
         """
@@ -364,26 +916,48 @@ class RAGEngine:
         if not job_requirements:
             return 70.0  # Default score if no specific education requirements
 
-        prompt = CV_EVALUATION_PROMPTS["education_evaluation"].format(
-            cv_education=cv_education,
-            job_requirements=job_requirements
-        )
+        response = self._try_generate("education_evaluation", use_cache, session,
+                                      cv_education=cv_education, job_requirements=job_requirements)
+        return self._section_score(response, cv_education, job_requirements, floor=30.0)
 
-        try:
-            response = self.llm_service.generate_text(prompt)
-            # Extract numeric score from the response
-            score_match = re.search(r'\d+', response)
-            if score_match:
-                score = float(score_match.group())
-                return max(30.0, min(100.0, score))  # Ensure score is between 30-100
-            else:
-                # Fallback to similarity if LLM didn't return a numeric score
-                similarity = self.calculate_similarity_score(cv_education, job_requirements)
-                return min(100.0, max(30.0, similarity * 100))
-        except Exception:
-            # Fallback to similarity if LLM fails
-            similarity = self.calculate_similarity_score(cv_education, job_requirements)
-            return min(100.0, max(30.0, similarity * 100))
+    async def _evaluate_education_match_llm_async(self, cv_education: str, job_requirements: str,
+                                                  use_cache: bool = True,
+                                                  session: Optional[JobEvaluationSession] = None) -> float:
+        if not cv_education:
+            return 50.0
+
+        if not job_requirements:
+            return 70.0
+
+        response = await self._try_generate_async("education_evaluation", use_cache, session,
+                                                  cv_education=cv_education, job_requirements=job_requirements)
+        return await self._section_score_async(response, cv_education, job_requirements, floor=30.0)
+
+    @staticmethod
+    def _parse_section_score(response: Optional[str], floor: float = 0.0) -> Optional[float]:
+        """
+        Numeric score in a section evaluation response, clamped to floor..100; None if there is none.
+        """
+        score_match = re.search(r'\d+', response) if response is not None else None
+        if score_match is None:
+            return None
+        return max(floor, min(100.0, float(score_match.group())))
+
+    def _section_score(self, response: Optional[str], cv_text: str, job_text: str, floor: float = 0.0) -> float:
+        score = self._parse_section_score(response, floor)
+        if score is None:
+            # Fallback to similarity if the LLM failed or didn't return a numeric score
+            similarity = self.calculate_similarity_score(cv_text, job_text)
+            score = min(100.0, max(floor, similarity * 100))
+        return score
+
+    async def _section_score_async(self, response: Optional[str], cv_text: str, job_text: str,
+                                   floor: float = 0.0) -> float:
+        score = self._parse_section_score(response, floor)
+        if score is None:
+            # The similarity fallback embeds through the blocking client
+            score = await asyncio.to_thread(self._section_score, None, cv_text, job_text, floor)
+        return score
 
     def get_soft_skills_score(self, cv_sections: Dict[str, str], job_context: str) -> float:
         """
@@ -397,7 +971,7 @@ class RAGEngine:
         )
 
         try:
-            response = self.llm_service.generate_text(prompt)
+            response = self.llm_service.generate_text(prompt, "soft_skills_evaluation")
             # Extract numeric score from the response
             score_match = re.search(r'\d+', response)
             if score_match:
@@ -422,7 +996,7 @@ class RAGEngine:
         )
 
         try:
-            response = self.llm_service.generate_text(prompt)
+            response = self.llm_service.generate_text(prompt, "contextual_understanding")
             # Extract numeric score from the response
             score_match = re.search(r'\d+', response)
             if score_match:
@@ -433,49 +1007,74 @@ class RAGEngine:
         except Exception:
             return 50.0  # Default score if LLM fails
 
-    def _generate_detailed_feedback_llm(self, cv_sections: Dict[str, str], job_description: str, job_requirements: str):
+    def _generate_detailed_feedback_llm(self, cv_sections: Dict[str, str], job_description: str, job_requirements: str,
+                                        use_cache: bool = True, session: Optional[JobEvaluationSession] = None):
         """
         Generate detailed feedback using LLM with enhanced soft skills assessment
         """
+        response = self._try_generate("detailed_feedback_with_soft_skills", use_cache, session,
+                                      **self._feedback_fields(cv_sections, job_description, job_requirements))
+        feedback = self._parse_detailed_feedback(response)
+        if feedback is None:
+            feedback = self._default_detailed_feedback(cv_sections, job_description, job_requirements)
+        return feedback
+
+    async def _generate_detailed_feedback_llm_async(self, cv_sections: Dict[str, str], job_description: str,
+                                                    job_requirements: str, use_cache: bool = True,
+                                                    session: Optional[JobEvaluationSession] = None):
+        response = await self._try_generate_async("detailed_feedback_with_soft_skills", use_cache, session,
+                                                  **self._feedback_fields(cv_sections, job_description,
+                                                                          job_requirements))
+        feedback = self._parse_detailed_feedback(response)
+        if feedback is None:
+            # The similarity fallback embeds through the blocking client
+            feedback = await asyncio.to_thread(self._default_detailed_feedback, cv_sections, job_description,
+                                               job_requirements)
+        return feedback
+
+    @staticmethod
+    def _feedback_fields(cv_sections: Dict[str, str], job_description: str, job_requirements: str) -> Dict[str, str]:
         cv_text = "\n".join([f"{section}: {content}" for section, content in cv_sections.items() if content])
+        return {'cv_text': cv_text, 'job_description': job_description, 'job_requirements': job_requirements}
 
-        prompt = CV_EVALUATION_PROMPTS["detailed_feedback_with_soft_skills"].format(
-            cv_text=cv_text,
-            job_description=job_description,
-            job_requirements=job_requirements
-        )
-
+    @staticmethod
+    def _parse_detailed_feedback(response: Optional[str]):
+        """
+        (strengths, weaknesses, recommendations, summary) of a detailed feedback response;
+        None if the LLM failed or returned JSON of an unexpected shape.
+        """
+        if response is None:
+            return None
         try:
-            response = self.llm_service.generate_text(prompt)
-
-            # Try to parse JSON response
-            try:
-                # Attempt to extract JSON from response (in case LLM adds extra text)
-                json_match = re.search(r'\{.*\}', response, re.DOTALL)
-                if json_match:
-                    json_str = json_match.group()
-                    result = json.loads(json_str)
-
-                    strengths = result.get("strengths", [])
-                    weaknesses = result.get("weaknesses", [])
-                    recommendations = result.get("recommendations", [])
-                    soft_skills_assessment = result.get("soft_skills_assessment", [])
-                    summary = result.get("summary", "")
-
-                    # Include soft skills assessment in strengths/weaknesses if not already covered
-                    strengths.extend(soft_skills_assessment)
-
-                    return strengths, weaknesses, recommendations, summary
-                else:
-                    # If no JSON found, return empty feedback
-                    return [], [], [], "Unable to generate detailed feedback"
-            except json.JSONDecodeError:
-                # If JSON parsing fails, return empty feedback
+            # Attempt to extract JSON from response (in case LLM adds extra text)
+            json_match = re.search(r'\{.*\}', response, re.DOTALL)
+            if json_match:
+                json_str = json_match.group()
+                result = json.loads(json_str)
+
+                strengths = result.get("strengths", [])
+                weaknesses = result.get("weaknesses", [])
+                recommendations = result.get("recommendations", [])
+                soft_skills_assessment = result.get("soft_skills_assessment", [])
+                summary = result.get("summary", "")
+
+                # Include soft skills assessment in strengths/weaknesses if not already covered
+                strengths.extend(soft_skills_assessment)
+
+                return strengths, weaknesses, recommendations, summary
+            else:
+                # If no JSON found, return empty feedback
                 return [], [], [], "Unable to generate detailed feedback"
+        except json.JSONDecodeError:
+            # If JSON parsing fails, return empty feedback
+            return [], [], [], "Unable to generate detailed feedback"
         except Exception:
-            # Fallback to default feedback
-            job_context = f"Job Description: {job_description}\n\nRequirements: {job_requirements}"
-            skills_score = self._evaluate_skills_match(cv_sections.get('skills', ''), job_requirements)
-            experience_score = self._evaluate_experience_match(cv_sections.get('experience', ''), job_context)
-            education_score = self._evaluate_education_match(cv_sections.get('education', ''), job_requirements)
-            return self._generate_detailed_feedback(cv_sections, job_context, skills_score, experience_score, education_score), [], [], "Default feedback generated due to LLM error"
\ No newline at end of file
+            return None
+
+    def _default_detailed_feedback(self, cv_sections: Dict[str, str], job_description: str, job_requirements: str):
+        # Fallback to default feedback
+        job_context = f"Job Description: {job_description}\n\nRequirements: {job_requirements}"
+        skills_score = self._evaluate_skills_match(cv_sections.get('skills', ''), job_requirements)
+        experience_score = self._evaluate_experience_match(cv_sections.get('experience', ''), job_context)
+        education_score = self._evaluate_education_match(cv_sections.get('education', ''), job_requirements)
+        return self._generate_detailed_feedback(cv_sections, job_context, skills_score, experience_score, education_score), [], [], "Default feedback generated due to LLM error"
\ No newline at end of file
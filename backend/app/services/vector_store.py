@@ -0,0 +1,1012 @@
+import os
+import re
+import json
+import struct
+import hashlib
+import pickle
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import faiss
+import numpy as np
+
+from .chunk_store import ChunkColumns, ChunkColumnsBuilder, write_chunk_columns
+from .process_lock import acquire_process_lock
+
+MANIFEST_FILE = "MANIFEST.json"
+# Held at the store root by the one process allowed to open the store
+LOCK_FILE = "LOCK"
+LEGACY_INDEX_FILE = "faiss_index.bin"
+LEGACY_DOCS_FILE = "documents.pkl"
+GENERATION_FILE_PATTERN = re.compile(r'^(checkpoint|wal)-(\d+)\.')
+# Log record header: pickled documents length, vector bytes length, number of rows
+WAL_HEADER = struct.Struct('<QQI')
+# Row count of a log record that deletes chunks; its documents part is the pickled delete request
+WAL_DELETE_ROWS = 0xFFFFFFFF
+# Checkpoint layout: flat float32 vectors plus columnar chunk documents (see chunk_store)
+STORE_FORMAT = 3
+# Earlier layout with documents as offset-indexed JSON records, rewritten by the next compaction
+JSON_RECORDS_FORMAT = 2
+COPY_BLOCK_ROWS = 65536
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+# Filtered searches matching fewer checkpointed rows than this score them exactly instead of using the ANN index
+FILTERED_ANN_MIN_ROWS = 2048
+
+
+def candidate_id_for_text(cv_text: str) -> str:
+    """
+    Stable candidate identifier derived from the extracted CV text, so the same CV maps to the
+    same row group and can be found again from Evaluation.cv_text.
+    """
+    return hashlib.sha256(cv_text.encode('utf-8')).hexdigest()
+
+
+def resolve_index_type(rows: int, index_type: Optional[str] = None) -> str:
+    """
+    Pick the index type for a shard with the given number of rows.
+
+    VECTOR_INDEX_TYPE selects a fixed type; the default "auto" keeps exact search below
+    ANN_MIN_VECTORS rows and switches to IVF-Flat above it.
+    """
+    index_type = (index_type or os.getenv("VECTOR_INDEX_TYPE", "auto")).lower()
+    min_vectors = int(os.getenv("ANN_MIN_VECTORS", "20000"))
+
+    if index_type == "auto":
+        index_type = "ivf_flat"
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unsupported vector index type: {index_type}")
+    if rows < min_vectors:
+        return "flat"
+    return index_type
+
+
+def build_ann_index(index_type: str, vectors: np.ndarray):
+    """
+    Build and populate an approximate inner-product index over normalized vectors.
+
+    Args:
+        index_type: One of 'ivf_flat', 'ivf_pq' or 'hnsw'
+        vectors: float32 matrix of shape (rows, dimension)
+
+    Returns:
+        Trained FAISS index containing all vectors, with row numbers as ids
+    """
+    rows, dimension = vectors.shape
+    nlist = int(min(max(4 * np.sqrt(rows), 16), rows // 39 or 1))
+
+    if index_type == "ivf_flat":
+        description = f"IVF{nlist},Flat"
+    elif index_type == "ivf_pq":
+        # Sub-quantizers of at most 8 dimensions; m has to divide the dimension
+        m = next(m for m in range(max(dimension // 8, 1), dimension + 1) if dimension % m == 0)
+        description = f"IVF{nlist},PQ{m}x8"
+    elif index_type == "hnsw":
+        description = f"HNSW{int(os.getenv('ANN_HNSW_M', '32'))}"
+    else:
+        raise ValueError(f"Unsupported ANN index type: {index_type}")
+
+    index = faiss.index_factory(dimension, description, faiss.METRIC_INNER_PRODUCT)
+    if not index.is_trained:
+        max_training_rows = int(os.getenv("ANN_MAX_TRAINING_VECTORS", "100000"))
+        if rows > max_training_rows:
+            sample = np.random.default_rng(0).choice(rows, max_training_rows, replace=False)
+            index.train(np.ascontiguousarray(vectors[np.sort(sample)]))
+        else:
+            index.train(np.ascontiguousarray(vectors))
+
+    for start in range(0, rows, COPY_BLOCK_ROWS):
+        index.add(np.ascontiguousarray(vectors[start:start + COPY_BLOCK_ROWS]))
+
+    configure_ann_search(index, index_type)
+    return index
+
+
+def configure_ann_search(index, index_type: str):
+    """
+    Apply the query-time accuracy/speed knobs (ANN_NPROBE, ANN_EF_SEARCH) to an ANN index.
+    """
+    parameters = faiss.ParameterSpace()
+    if index_type in ("ivf_flat", "ivf_pq"):
+        parameters.set_index_parameter(index, "nprobe", int(os.getenv("ANN_NPROBE", "16")))
+    elif index_type == "hnsw":
+        parameters.set_index_parameter(index, "efSearch", int(os.getenv("ANN_EF_SEARCH", "64")))
+
+
+@dataclass(frozen=True)
+class ShardKey:
+    """
+    Identifies a vector store partition. Chunks are sharded by company and job;
+    candidates are row groups inside their job's shard.
+
+    The empty key (no company, no job) is the unpartitioned shard stored at the root of
+    the vector store, which is where the pre-sharding global index lives.
+    """
+    company_id: Optional[int] = None
+    job_id: Optional[int] = None
+
+    def relative_path(self) -> str:
+        if self.company_id is None and self.job_id is None:
+            return ""
+        company = f"company_{self.company_id}" if self.company_id is not None else "company_shared"
+        job = f"job_{self.job_id}" if self.job_id is not None else "job_shared"
+        return os.path.join(company, job)
+
+
+class VectorShard:
+    """
+    Exact inner-product index plus chunk documents for a single partition.
+
+    Checkpointed rows are memory-mapped rather than read into RAM: vectors live in a flat
+    float32 file (checkpoint-<gen>.vectors) and documents in column files (ChunkColumns: a text
+    blob with offsets plus typed metadata columns). Opening a shard therefore takes roughly
+    constant time, and the pages live in the OS cache rather than the process heap.
+
+    Persistence is append-only: each add is written to a write-ahead log (wal-<gen>.log) and only
+    the new vectors and documents are written, so the cost of an add does not depend on the size
+    of the shard. Logged rows are kept in memory as the shard's tail. Once the log grows past
+    VECTOR_STORE_COMPACT_BYTES a background compaction writes a new checkpoint covering the tail
+    and atomically switches MANIFEST.json to it. On load the latest checkpoint is mapped and every
+    newer log is replayed. Tail documents are held column-wise too (ChunkColumnsBuilder).
+
+    Small shards are searched exactly. Once a checkpoint reaches ANN_MIN_VECTORS rows, compaction
+    also builds an approximate index (checkpoint-<gen>.ann, see VECTOR_INDEX_TYPE) whose ids are
+    the row numbers. Section and candidate filters are resolved to the matching row ids first and
+    applied inside the search: exact searches only score matching rows, and ANN searches pass a
+    row bitmap to FAISS, falling back to exact scoring when fewer rows match than make the ANN
+    index worthwhile (FILTERED_ANN_MIN_ROWS).
+
+    Deleting a candidate's chunks (or all chunks) logs a delete record and tombstones the rows:
+    searches skip them, and compactions carry them over in checkpoint-<gen>.deleted. Once
+    tombstones make up VECTOR_STORE_TOMBSTONE_RATIO of the rows, compaction rebuilds the
+    checkpoint without them, renumbering the remaining rows and retraining the ANN index. A shard
+    left without rows has its files removed.
+
+    The lock only orders threads: the log, checkpoints and in-memory tail assume a single writer
+    process, which ShardedVectorStore enforces with a lock file at the store root.
+    """
+
+    def __init__(self, path: str, compact_bytes: Optional[int] = None):
+        self.path = path
+        self.dimension = None
+        # Checkpointed rows, memory-mapped from disk
+        self.base_rows = 0
+        self.base_vectors = None
+        self.base_chunks = ChunkColumns.empty()
+        # Approximate index over the checkpointed rows, built once the shard is large enough
+        self.ann_index = None
+        self.ann_type = None
+        self.ann_trained_rows = 0
+        # Rows added since the checkpoint
+        self.tail_chunks = ChunkColumnsBuilder()
+        self._tail_vectors = None
+        self._pending_tail: List[np.ndarray] = []
+        # Row ranges of each candidate's chunks, so candidate lookups avoid scanning documents
+        self.candidate_rows: Dict[str, List[Tuple[int, int]]] = {}
+        # Codes of the sections and candidate ids stored in the chunk columns. Codes are
+        # assigned in order of first appearance and never change.
+        self.section_codes: Dict[str, int] = {}
+        self.section_names: List[str] = []
+        self.candidate_codes: Dict[str, int] = {}
+        self.candidate_ids: List[str] = []
+        # Sorted ids of deleted rows, and the mask of live rows derived from them
+        self.deleted_rows = np.empty(0, dtype='int64')
+        self._live_mask = None
+        self.tombstone_ratio = float(os.getenv("VECTOR_STORE_TOMBSTONE_RATIO", "0.2"))
+        # Generation of the checkpoint on disk, and of the log currently appended to
+        self.generation = 0
+        self.wal_generation = 0
+        self.wal_bytes = 0
+        self.compacting = False
+        self.compact_bytes = compact_bytes or int(os.getenv("VECTOR_STORE_COMPACT_BYTES", str(16 * 1024 * 1024)))
+        self.fsync = os.getenv("VECTOR_STORE_FSYNC", "true").lower() == "true"
+        self._lock = threading.RLock()
+
+    @property
+    def ntotal(self) -> int:
+        return self.base_rows + len(self.tail_chunks)
+
+    @property
+    def live_rows(self) -> int:
+        return self.ntotal - len(self.deleted_rows)
+
+    @property
+    def tail_vectors(self) -> Optional[np.ndarray]:
+        if self._pending_tail:
+            parts = ([self._tail_vectors] if self._tail_vectors is not None else []) + self._pending_tail
+            self._tail_vectors = np.vstack(parts)
+            self._pending_tail = []
+        return self._tail_vectors
+
+    def _section_code(self, section: str) -> int:
+        code = self.section_codes.get(section)
+        if code is None:
+            code = self.section_codes[section] = len(self.section_names)
+            self.section_names.append(section)
+        return code
+
+    def _candidate_code(self, candidate_id: str) -> int:
+        code = self.candidate_codes.get(candidate_id)
+        if code is None:
+            code = self.candidate_codes[candidate_id] = len(self.candidate_ids)
+            self.candidate_ids.append(candidate_id)
+        return code
+
+    @property
+    def _encoders(self) -> Dict:
+        return {'section': self._section_code, 'candidate_id': self._candidate_code}
+
+    @property
+    def _vocabularies(self) -> Dict[str, List[str]]:
+        return {'section': self.section_names, 'candidate_id': self.candidate_ids}
+
+    def _row_values(self, column: str, row_ids: np.ndarray) -> np.ndarray:
+        """
+        Values of a chunk column for the given rows.
+        """
+        base_values, tail_values = self.base_chunks.column(column), self.tail_chunks.column(column)
+        values = np.empty(len(row_ids), dtype=base_values.dtype)
+        in_base = row_ids < self.base_rows
+        values[in_base] = base_values[row_ids[in_base]]
+        values[~in_base] = tail_values[row_ids[~in_base] - self.base_rows]
+        return values
+
+    def _rows_where(self, column: str, value: int) -> np.ndarray:
+        """
+        Sorted ids of all rows whose chunk column equals value.
+        """
+        return np.concatenate([self.base_chunks.rows_where(column, value),
+                               self.tail_chunks.rows_where(column, value) + self.base_rows])
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def load(self):
+        manifest_path = self._file(MANIFEST_FILE)
+        manifest = None
+        if os.path.exists(manifest_path):
+            with open(manifest_path, 'r') as f:
+                manifest = json.load(f)
+            self.generation = manifest['generation']
+
+        if manifest is not None and manifest.get('format') in (STORE_FORMAT, JSON_RECORDS_FORMAT):
+            self._open_checkpoint(manifest)
+            if manifest['format'] != STORE_FORMAT:
+                # Count the rows towards compaction so they are rewritten in the columnar format
+                self.wal_bytes += self.compact_bytes
+        elif manifest is not None:
+            self._load_faiss_checkpoint(f"checkpoint-{self.generation}.index", f"checkpoint-{self.generation}.docs")
+        elif os.path.exists(self._file(LEGACY_INDEX_FILE)) and os.path.exists(self._file(LEGACY_DOCS_FILE)):
+            # Store written before append-only persistence: use it as the base checkpoint
+            self._load_faiss_checkpoint(LEGACY_INDEX_FILE, LEGACY_DOCS_FILE)
+
+        # Replay every log written since the checkpoint. More than one exists only if the
+        # process stopped while a compaction was in progress.
+        self.wal_generation = self.generation
+        generation = self.generation
+        while os.path.exists(self._file(f"wal-{generation}.log")):
+            self.wal_bytes += self._replay_wal(generation)
+            self.wal_generation = generation
+            generation += 1
+
+    def _open_checkpoint(self, manifest: Dict):
+        rows = manifest['rows']
+        self.dimension = manifest['dimension']
+        self.base_rows = rows
+
+        self.base_vectors = None
+        if rows:
+            self.base_vectors = np.memmap(self._file(f"checkpoint-{self.generation}.vectors"), dtype='float32',
+                                          mode='r', shape=(rows, self.dimension))
+        self.deleted_rows = np.empty(0, dtype='int64')
+        if manifest.get('deleted'):
+            self.deleted_rows = np.fromfile(self._file(f"checkpoint-{self.generation}.deleted"), dtype='int64')
+        self._live_mask = None
+
+        with open(self._file(f"checkpoint-{self.generation}.candidates"), 'r') as f:
+            candidates = json.load(f)
+
+        if manifest['format'] == STORE_FORMAT:
+            # Codes are already known when re-opening after a compaction; they are stable either way
+            for section in manifest['sections']:
+                self._section_code(section)
+            for candidate_id in candidates['ids']:
+                self._candidate_code(candidate_id)
+            self.base_chunks = ChunkColumns.open(self._file(f"checkpoint-{self.generation}"), rows)
+            candidate_rows = candidates['rows']
+        else:
+            # JSON records checkpoint: read the documents into columns once
+            self.base_chunks = self._read_json_records(rows)
+            candidate_rows = candidates
+        self.candidate_rows = {candidate_id: [tuple(r) for r in ranges]
+                               for candidate_id, ranges in candidate_rows.items()}
+
+        self.ann_type = manifest.get('ann')
+        self.ann_trained_rows = manifest.get('ann_trained_rows', 0)
+        self.ann_index = None
+        if self.ann_type:
+            ann_path = self._file(f"checkpoint-{self.generation}.ann")
+            # IVF inverted lists can be mapped like the vectors; HNSW graphs are read into memory
+            flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY if self.ann_type != "hnsw" else 0
+            self.ann_index = faiss.read_index(ann_path, flags)
+            configure_ann_search(self.ann_index, self.ann_type)
+
+    def _read_json_records(self, rows: int) -> ChunkColumns:
+        chunks = ChunkColumnsBuilder()
+        if rows:
+            offsets = np.memmap(self._file(f"checkpoint-{self.generation}.offsets"), dtype='uint64', mode='r',
+                                shape=(rows + 1,))
+            records = np.memmap(self._file(f"checkpoint-{self.generation}.meta"), dtype='uint8', mode='r')
+            chunks.append([json.loads(records[int(offsets[row]):int(offsets[row + 1])].tobytes())
+                           for row in range(rows)], self._encoders)
+        return chunks.snapshot()
+
+    def _load_faiss_checkpoint(self, index_name: str, docs_name: str):
+        """
+        Read a checkpoint written by an earlier store format into the in-memory tail.
+        """
+        index = faiss.read_index(self._file(index_name))
+        with open(self._file(docs_name), 'rb') as f:
+            documents = pickle.load(f)
+
+        if index.ntotal:
+            self._apply(index.reconstruct_n(0, index.ntotal), documents)
+            # Count the rows towards compaction so they are rewritten in the mapped format
+            self.wal_bytes += self.compact_bytes
+
+    def _replay_wal(self, generation: int) -> int:
+        wal_path = self._file(f"wal-{generation}.log")
+        valid_bytes = 0
+
+        with open(wal_path, 'rb') as f:
+            while True:
+                header = f.read(WAL_HEADER.size)
+                if len(header) < WAL_HEADER.size:
+                    break
+                docs_length, vectors_length, rows = WAL_HEADER.unpack(header)
+                docs_bytes = f.read(docs_length)
+                vectors_bytes = f.read(vectors_length)
+                if len(docs_bytes) < docs_length or len(vectors_bytes) < vectors_length:
+                    break  # Torn write at the end of the log
+
+                if rows == WAL_DELETE_ROWS:
+                    self._apply_delete(pickle.loads(docs_bytes))
+                else:
+                    embeddings = np.frombuffer(vectors_bytes, dtype='float32').reshape(rows, -1)
+                    self._apply(embeddings, pickle.loads(docs_bytes))
+                valid_bytes += WAL_HEADER.size + docs_length + vectors_length
+
+        if valid_bytes < os.path.getsize(wal_path):
+            # Drop the partial record so later appends start on a record boundary
+            os.truncate(wal_path, valid_bytes)
+
+        return valid_bytes
+
+    def _apply(self, embeddings: np.ndarray, documents: List[Dict]):
+        if self.dimension is None:
+            self.dimension = embeddings.shape[1]
+
+        start = self.ntotal
+        self._pending_tail.append(np.asarray(embeddings, dtype='float32'))
+        self.tail_chunks.append(documents, self._encoders)
+        self._index_candidates(documents, start)
+
+    def _index_candidates(self, documents: List[Dict], start: int):
+        for row, document in enumerate(documents, start):
+            candidate_id = document['metadata'].get('candidate_id')
+            if candidate_id is None:
+                continue
+            ranges = self.candidate_rows.setdefault(candidate_id, [])
+            if ranges and ranges[-1][1] == row:
+                ranges[-1] = (ranges[-1][0], row + 1)
+            else:
+                ranges.append((row, row + 1))
+
+    def _apply_delete(self, request: Dict) -> int:
+        """
+        Tombstone the rows of a delete request.
+
+        Returns:
+            Number of rows newly deleted
+        """
+        if request.get('all'):
+            rows = np.arange(self.ntotal)
+            self.candidate_rows = {}
+        else:
+            ranges = [r for candidate_id in request['candidate_ids'] for r in self.candidate_rows.pop(candidate_id, [])]
+            rows = np.concatenate([np.arange(start, end) for start, end in ranges]) if ranges else np.empty(0, dtype='int64')
+
+        rows = np.setdiff1d(rows, self.deleted_rows)
+        if len(rows):
+            self.deleted_rows = np.union1d(self.deleted_rows, rows)
+            self._live_mask = None
+        return len(rows)
+
+    def _live_rows(self, rows: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        """
+        The given rows (all rows if None) without deleted ones; None if every row is live.
+        """
+        if not len(self.deleted_rows):
+            return rows
+        if self._live_mask is None or len(self._live_mask) != self.ntotal:
+            self._live_mask = np.ones(self.ntotal, dtype=bool)
+            self._live_mask[self.deleted_rows] = False
+        return np.flatnonzero(self._live_mask) if rows is None else rows[self._live_mask[rows]]
+
+    def _candidate_row_array(self, candidate_id: str) -> np.ndarray:
+        return np.concatenate([np.arange(start, end) for start, end in self.candidate_rows[candidate_id]])
+
+    def _document(self, row: int) -> Dict:
+        if row < self.base_rows:
+            return self.base_chunks.document(row, self._vocabularies)
+        return self.tail_chunks.document(row - self.base_rows, self._vocabularies)
+
+    def _append_wal(self, docs_bytes: bytes, vectors_bytes: bytes, rows: int):
+        os.makedirs(self.path, exist_ok=True)
+        record = WAL_HEADER.pack(len(docs_bytes), len(vectors_bytes), rows) + docs_bytes + vectors_bytes
+
+        with open(self._file(f"wal-{self.wal_generation}.log"), 'ab') as f:
+            f.write(record)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+
+        self.wal_bytes += len(record)
+
+    def has_candidate(self, candidate_id: str) -> bool:
+        with self._lock:
+            return candidate_id in self.candidate_rows
+
+    def add(self, embeddings: np.ndarray, documents: List[Dict]):
+        """
+        Add normalized float32 embeddings with their documents and log them to disk.
+        """
+        with self._lock:
+            self._append_wal(pickle.dumps(documents), np.ascontiguousarray(embeddings, dtype='float32').tobytes(),
+                             len(embeddings))
+            self._apply(embeddings, documents)
+            start_compaction = self._claim_compaction()
+
+        if start_compaction:
+            threading.Thread(target=self._compact, name="vector-shard-compaction", daemon=True).start()
+
+    def add_if_absent(self, embeddings: np.ndarray, documents: List[Dict]) -> int:
+        """
+        Add the rows of candidates not yet in the shard, checking and adding under one lock so
+        concurrent uploads of the same CV index it once. Rows without a candidate are always added.
+
+        Returns:
+            Number of rows added
+        """
+        with self._lock:
+            keep = [i for i, document in enumerate(documents)
+                    if document['metadata'].get('candidate_id') not in self.candidate_rows]
+            if keep:
+                self.add(embeddings[keep] if len(keep) < len(documents) else embeddings,
+                         [documents[i] for i in keep])
+            return len(keep)
+
+    def delete(self, candidate_ids: Optional[List[str]] = None) -> int:
+        """
+        Delete the chunks of the given candidates, or every chunk if None, and log the deletion.
+
+        Rows are tombstoned and skipped by searches; compaction reclaims them.
+
+        Returns:
+            Number of rows deleted
+        """
+        with self._lock:
+            if candidate_ids is None:
+                request = {'all': True}
+                if self.live_rows == 0:
+                    return 0
+            else:
+                request = {'candidate_ids': [c for c in candidate_ids if c in self.candidate_rows]}
+                if not request['candidate_ids']:
+                    return 0
+
+            self._append_wal(pickle.dumps(request), b'', WAL_DELETE_ROWS)
+            deleted = self._apply_delete(request)
+            start_compaction = self._claim_compaction()
+
+        if start_compaction:
+            threading.Thread(target=self._compact, name="vector-shard-compaction", daemon=True).start()
+        return deleted
+
+    def _claim_compaction(self) -> bool:
+        """
+        Whether a background compaction is due, marking it started if so. Called with the lock held.
+        """
+        deleted = len(self.deleted_rows)
+        due = self.wal_bytes >= self.compact_bytes or (deleted > 0 and deleted >= self.tombstone_ratio * self.ntotal)
+        if due and not self.compacting:
+            self.compacting = True
+            return True
+        return False
+
+    def compact(self):
+        """
+        Write a checkpoint of the shard and discard the logs it covers.
+        """
+        with self._lock:
+            if self.compacting:
+                return
+            self.compacting = True
+        self._compact()
+
+    def _compact(self):
+        try:
+            with self._lock:
+                if self.ntotal == 0:
+                    return
+                # Snapshot the shard and rotate the log: adds from here on go to the new
+                # generation's log and are not part of this checkpoint. Checkpoint files are
+                # never modified, so the mapped base can be read outside the lock.
+                rows = self.ntotal
+                base_rows, base_vectors = self.base_rows, self.base_vectors
+                previous_ann = (self.ann_type, self.generation, self.ann_trained_rows) if self.ann_type else None
+                tail_vectors = self.tail_vectors
+                chunks = [self.base_chunks, self.tail_chunks.snapshot()]
+                section_names = list(self.section_names)
+                candidate_ids = list(self.candidate_ids)
+                candidate_rows = {candidate_id: list(ranges) for candidate_id, ranges in self.candidate_rows.items()}
+                deleted = self.deleted_rows
+                new_generation = self.wal_generation + 1
+                self.wal_generation = new_generation
+                self.wal_bytes = 0
+
+            # With enough tombstones the checkpoint is rebuilt without the deleted rows; otherwise
+            # they are carried over. dropped holds the rows left out of the new checkpoint.
+            purge = len(deleted) > 0 and len(deleted) >= self.tombstone_ratio * rows
+            dropped = deleted if purge else np.empty(0, dtype='int64')
+            live = np.ones(rows, dtype=bool)
+            live[dropped] = False
+            new_rows = rows - len(dropped)
+
+            def renumber(row_ids):
+                # Row numbers after removing the dropped rows, for rows that are kept
+                return row_ids - np.searchsorted(dropped, row_ids)
+
+            def vector_blocks():
+                for start in range(0, base_rows, COPY_BLOCK_ROWS):
+                    block = np.asarray(base_vectors[start:start + COPY_BLOCK_ROWS])
+                    yield block[live[start:start + len(block)]].tobytes() if purge else block.tobytes()
+                if tail_vectors is not None:
+                    yield tail_vectors[live[base_rows:]].tobytes() if purge else tail_vectors.tobytes()
+
+            if purge:
+                chunks = [chunks[0].take(np.flatnonzero(live[:base_rows])),
+                          chunks[1].take(np.flatnonzero(live[base_rows:]))]
+            candidates = {'ids': candidate_ids,
+                          'rows': {candidate_id: [(int(renumber(start)), int(renumber(start)) + end - start)
+                                                  for start, end in ranges]
+                                   for candidate_id, ranges in candidate_rows.items()}}
+
+            self._atomic_write(f"checkpoint-{new_generation}.vectors", vector_blocks())
+            write_chunk_columns(chunks, f"checkpoint-{new_generation}", self._atomic_write)
+            self._atomic_write(f"checkpoint-{new_generation}.candidates", [json.dumps(candidates).encode('utf-8')])
+            # Switching the manifest is the commit point of the checkpoint
+            manifest = {'format': STORE_FORMAT, 'generation': new_generation, 'rows': new_rows,
+                        'dimension': self.dimension, 'sections': section_names}
+            if not purge and len(deleted):
+                self._atomic_write(f"checkpoint-{new_generation}.deleted", [deleted.tobytes()])
+                manifest['deleted'] = len(deleted)
+            # Rebuilt checkpoints have new row numbers, so the ANN index is rebuilt as well
+            manifest.update(self._write_ann_checkpoint(new_generation, new_rows, base_rows,
+                                                       None if purge else previous_ann))
+            self._atomic_write(MANIFEST_FILE, [json.dumps(manifest).encode('utf-8')])
+
+            with self._lock:
+                # Swap the mapped base to the new checkpoint and keep only tail rows added since the snapshot.
+                # Ranges and tombstones added meanwhile are renumbered like the checkpointed rows.
+                covered = rows - self.base_rows
+                candidate_rows = {candidate_id: [(int(renumber(start)), int(renumber(start)) + end - start)
+                                                 for start, end in ranges]
+                                  for candidate_id, ranges in self.candidate_rows.items()}
+                deleted_rows = np.setdiff1d(self.deleted_rows, dropped)
+                self.generation = new_generation
+                self._open_checkpoint(manifest)
+                self.candidate_rows = candidate_rows
+                self.deleted_rows = renumber(deleted_rows).astype('int64')
+                self._live_mask = None
+                remaining = self.tail_vectors
+                self._tail_vectors = remaining[covered:].copy() if remaining is not None and len(remaining) > covered else None
+                self.tail_chunks.discard(covered)
+
+                removed = self.ntotal == 0 and not os.path.exists(self._file(f"wal-{new_generation}.log"))
+                if removed:
+                    self._remove_files()
+
+            if not removed:
+                self._remove_obsolete_files(new_generation)
+        finally:
+            with self._lock:
+                self.compacting = False
+
+    def _remove_files(self):
+        """
+        Remove the files of a shard left without rows. Called with the lock held.
+
+        Only the shard's own files are removed: the unpartitioned shard lives at the store root,
+        whose directory also holds every other shard. The directory goes once it is empty.
+        """
+        for name in os.listdir(self.path) if os.path.isdir(self.path) else []:
+            own = name.startswith(MANIFEST_FILE) or name in (LEGACY_INDEX_FILE, LEGACY_DOCS_FILE)
+            if own or GENERATION_FILE_PATTERN.match(name):
+                os.remove(self._file(name))
+        try:
+            os.rmdir(self.path)
+        except OSError:
+            pass  # Still holds other shards
+        self.base_vectors = None
+        self.base_chunks = ChunkColumns.empty()
+        self.generation = self.wal_generation = 0
+        self.wal_bytes = 0
+
+    def _write_ann_checkpoint(self, generation: int, rows: int, base_rows: int, previous_ann) -> Dict:
+        """
+        Build or extend the ANN index for a new checkpoint.
+
+        The index is retrained from scratch when the type changes or the shard has doubled in size
+        since the last training; otherwise the previous index is extended with the new rows.
+
+        Returns:
+            Manifest fields describing the ANN index (empty when the shard stays flat)
+        """
+        index_type = resolve_index_type(rows)
+        if index_type == "flat":
+            return {}
+
+        vectors = np.memmap(self._file(f"checkpoint-{generation}.vectors"), dtype='float32', mode='r',
+                            shape=(rows, self.dimension))
+
+        if previous_ann and previous_ann[0] == index_type and rows < 2 * previous_ann[2]:
+            index = faiss.read_index(self._file(f"checkpoint-{previous_ann[1]}.ann"))
+            for start in range(base_rows, rows, COPY_BLOCK_ROWS):
+                index.add(np.ascontiguousarray(vectors[start:min(start + COPY_BLOCK_ROWS, rows)]))
+            trained_rows = previous_ann[2]
+        else:
+            index = build_ann_index(index_type, vectors)
+            trained_rows = rows
+
+        self._atomic_write(f"checkpoint-{generation}.ann", [faiss.serialize_index(index).tobytes()])
+        return {'ann': index_type, 'ann_trained_rows': trained_rows}
+
+    def _atomic_write(self, name: str, blocks: Iterable[bytes]):
+        path = self._file(name)
+        temp_path = path + ".tmp"
+        with open(temp_path, 'wb') as f:
+            for block in blocks:
+                f.write(block)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+
+        if hasattr(os, 'O_DIRECTORY'):
+            dir_fd = os.open(self.path, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+
+    def _remove_obsolete_files(self, generation: int):
+        for name in os.listdir(self.path):
+            obsolete = name in (LEGACY_INDEX_FILE, LEGACY_DOCS_FILE)
+            match = GENERATION_FILE_PATTERN.match(name)
+            if match and int(match.group(2)) < generation:
+                obsolete = True
+            if obsolete:
+                os.remove(self._file(name))
+
+    def _score(self, queries: np.ndarray, rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Inner-product scores of the queries against all rows, or only the given rows.
+
+        Args:
+            queries: float32 matrix of shape (queries, dimension)
+
+        Returns:
+            Tuple of (row ids, scores of shape (rows, queries))
+        """
+        tail_vectors = self.tail_vectors
+        if rows is None:
+            base_rows = np.arange(self.base_rows)
+            tail_rows = np.arange(len(self.tail_chunks))
+        else:
+            base_rows = rows[rows < self.base_rows]
+            tail_rows = rows[rows >= self.base_rows] - self.base_rows
+
+        scores = []
+        if len(base_rows):
+            base = self.base_vectors if rows is None else self.base_vectors[base_rows]
+            scores.append(base @ queries.T)
+        if len(tail_rows):
+            tail = tail_vectors if rows is None else tail_vectors[tail_rows]
+            scores.append(tail @ queries.T)
+
+        row_ids = np.concatenate([base_rows, tail_rows + self.base_rows])
+        return row_ids, (np.vstack(scores) if scores else np.empty((0, len(queries)), dtype='float32'))
+
+    def _matching_rows(self, section_filter: Optional[str], rows: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        """
+        Sorted ids of the rows passing the section filter, within rows if given.
+
+        Returns:
+            Row ids, or None if every row matches
+        """
+        if section_filter is None:
+            return rows
+        code = self.section_codes.get(section_filter)
+        if code is None:
+            return np.empty(0, dtype='int64')
+        if rows is not None:
+            return rows[self._row_values('sections', rows) == code]
+        return self._rows_where('sections', code)
+
+    def _ann_search_parameters(self, base_rows: np.ndarray):
+        """
+        FAISS search parameters restricting an ANN search to the given checkpointed rows.
+
+        Returns:
+            Tuple of (parameters, objects that must stay alive during the search)
+        """
+        mask = np.zeros(self.base_rows, dtype=bool)
+        mask[base_rows] = True
+        bitmap = np.packbits(mask, bitorder='little')
+        selector = faiss.IDSelectorBitmap(self.base_rows, faiss.swig_ptr(bitmap))
+        # Explicit parameters replace the index's own, so carry its search settings over
+        if self.ann_type == "hnsw":
+            parameters = faiss.SearchParametersHNSW(sel=selector,
+                                                    efSearch=faiss.downcast_index(self.ann_index).hnsw.efSearch)
+        else:
+            parameters = faiss.SearchParametersIVF(sel=selector, nprobe=faiss.extract_index_ivf(self.ann_index).nprobe)
+        return parameters, (selector, bitmap)
+
+    def _rank(self, queries: np.ndarray, rows: Optional[np.ndarray], limit: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        The best `limit` rows for each query among rows (all rows if None), best first.
+
+        When the checkpointed rows to search are numerous enough for the ANN index, it answers
+        for them (restricted to rows through an ID selector) and the tail is scored exactly;
+        otherwise only the rows to search are scored exactly. Either way all queries are
+        answered by one matrix search.
+
+        Returns:
+            Per query, a tuple of (row ids, scores)
+        """
+        base_count = self.base_rows if rows is None else int(np.searchsorted(rows, self.base_rows))
+
+        ranked = []
+        if self.ann_index is not None and base_count >= FILTERED_ANN_MIN_ROWS:
+            ann_limit = min(limit, base_count)
+            if rows is None:
+                ann_scores, ann_rows = self.ann_index.search(np.ascontiguousarray(queries), ann_limit)
+                tail_rows = np.arange(self.base_rows, self.ntotal)
+            else:
+                parameters, _keep_alive = self._ann_search_parameters(rows[:base_count])
+                ann_scores, ann_rows = self.ann_index.search(np.ascontiguousarray(queries), ann_limit,
+                                                             params=parameters)
+                tail_rows = rows[base_count:]
+            tail_ids, tail_scores = self._score(queries, tail_rows)
+
+            for q in range(len(queries)):
+                found = ann_rows[q] >= 0
+                if found.sum() < ann_limit:
+                    # The probed part of the index held too few matching rows: score them all exactly
+                    base_rows = np.arange(self.base_rows) if rows is None else rows[:base_count]
+                    base_ids, base_scores = self._score(queries[q:q + 1], base_rows)
+                    base_scores = base_scores[:, 0]
+                else:
+                    base_ids, base_scores = ann_rows[q][found], ann_scores[q][found]
+                ranked.append((np.concatenate([base_ids, tail_ids]), np.concatenate([base_scores, tail_scores[:, q]])))
+        else:
+            row_ids, scores = self._score(queries, rows)
+            ranked = [(row_ids, scores[:, q]) for q in range(len(queries))]
+
+        results = []
+        for row_ids, scores in ranked:
+            if len(scores) > limit:
+                top = np.argpartition(-scores, limit)[:limit]
+                order = top[np.argsort(-scores[top], kind='stable')]
+            else:
+                order = np.argsort(-scores, kind='stable')
+            results.append((row_ids[order], scores[order]))
+        return results
+
+    def search(self, query_embedding: np.ndarray, k: int = 5, section_filter: Optional[str] = None,
+               candidate_id: Optional[str] = None) -> List[Dict]:
+        """
+        Search the shard for the k best chunks matching the optional section and candidate filters.
+        """
+        return self.search_batch(query_embedding.reshape(1, -1), [(k, section_filter)], candidate_id)[0]
+
+    def search_batch(self, query_embeddings: np.ndarray, requests: List[Tuple[int, Optional[str]]],
+                     candidate_id: Optional[str] = None) -> List[List[Dict]]:
+        """
+        Answer several searches with one matrix search per distinct section filter.
+
+        Filters are applied inside the search, so up to k matching chunks are returned whenever
+        that many exist, and the cost depends on the number of matching rows rather than on the
+        share of rows that don't match.
+
+        Args:
+            query_embeddings: Normalized float32 matrix with one query per row
+            requests: (k, section_filter) for each query
+            candidate_id: Optional candidate to restrict every search to
+
+        Returns:
+            Results for each query, in request order
+        """
+        with self._lock:
+            results: List[List[Dict]] = [[] for _ in requests]
+            if self.ntotal == 0:
+                return results
+
+            if candidate_id is not None:
+                # Deleted candidates have no ranges, so candidate rows are always live
+                if candidate_id not in self.candidate_rows:
+                    return results
+                rows = self._candidate_row_array(candidate_id)
+            else:
+                rows = self._live_rows(None)
+
+            queries = np.asarray(query_embeddings, dtype='float32')
+            groups: Dict[Optional[str], List[int]] = {}
+            for i, (_, section_filter) in enumerate(requests):
+                groups.setdefault(section_filter, []).append(i)
+
+            for section_filter, indices in groups.items():
+                matching = self._matching_rows(section_filter, rows)
+                if matching is not None and len(matching) == 0:
+                    continue
+                ranked = self._rank(queries[indices], matching, max(requests[i][0] for i in indices))
+                for i, (row_ids, scores) in zip(indices, ranked):
+                    k = requests[i][0]
+                    results[i] = [self._result(int(row), float(score)) for row, score in zip(row_ids[:k], scores[:k])]
+
+        return results
+
+    def candidate_section_scores(self, query_embeddings: np.ndarray, sections: List[str],
+                                 candidate_ids: List[str]) -> np.ndarray:
+        """
+        Best score of each query against each candidate's chunks of the query's section, from one
+        matrix product over the rows of all the candidates.
+
+        Args:
+            query_embeddings: Normalized float32 matrix with one query per row
+            sections: Section whose chunks each query is scored against
+            candidate_ids: Candidates to score
+
+        Returns:
+            float32 matrix of shape (candidates, queries); NaN where a candidate has no chunk of the section
+        """
+        with self._lock:
+            best = np.full((len(candidate_ids), len(sections)), -np.inf, dtype='float32')
+            # Deleted candidates have no ranges, so their rows are never scored
+            ranges = [(index, start, end) for index, candidate_id in enumerate(candidate_ids)
+                      for start, end in self.candidate_rows.get(candidate_id, [])]
+            if ranges:
+                rows = np.concatenate([np.arange(start, end) for _, start, end in ranges])
+                owners = np.concatenate([np.full(end - start, index) for index, start, end in ranges])
+                # _score returns rows in ascending order
+                order = np.argsort(rows, kind='stable')
+                rows, owners = rows[order], owners[order]
+                _, scores = self._score(np.asarray(query_embeddings, dtype='float32'), rows)
+                row_sections = self._row_values('sections', rows)
+                for j, section in enumerate(sections):
+                    code = self.section_codes.get(section)
+                    if code is None:
+                        continue
+                    matching = row_sections == code
+                    np.maximum.at(best[:, j], owners[matching], scores[matching, j])
+
+        best[np.isneginf(best)] = np.nan
+        return best
+
+    def _result(self, row: int, score: float) -> Dict:
+        document = self._document(row)
+        return {'text': document['text'], 'metadata': document['metadata'], 'score': score}
+
+
+class ShardedVectorStore:
+    """
+    Lazily loaded collection of VectorShards with LRU eviction.
+
+    Shards are loaded from disk on first access and kept in memory until either the number of
+    loaded shards or the total number of loaded vectors exceeds its limit, at which point the
+    least recently used shards are dropped. Shards are persisted on every add, so eviction never
+    loses data.
+
+    A store is owned by one process. Two processes appending to the same logs and switching the
+    same manifests would corrupt the shards, and each would keep serving its own stale tail, so
+    the store takes an exclusive lock on LOCK_FILE and opening it from a second process raises
+    ProcessLockError. Several instances in the same process are fine.
+    """
+
+    def __init__(self, root_path: str, max_loaded_shards: Optional[int] = None,
+                 max_loaded_vectors: Optional[int] = None):
+        self.root_path = root_path
+        self.max_loaded_shards = max_loaded_shards or int(os.getenv("VECTOR_SHARD_CACHE_SIZE", "32"))
+        self.max_loaded_vectors = max_loaded_vectors or int(os.getenv("VECTOR_SHARD_CACHE_MAX_VECTORS", "500000"))
+        self._shards: "OrderedDict[ShardKey, VectorShard]" = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(self.root_path, exist_ok=True)
+        acquire_process_lock(os.path.join(self.root_path, LOCK_FILE), f"The vector store at {self.root_path}")
+
+    def get_shard(self, key: ShardKey) -> VectorShard:
+        with self._lock:
+            shard = self._shards.get(key)
+            if shard is not None:
+                self._shards.move_to_end(key)
+                return shard
+
+            shard = VectorShard(os.path.join(self.root_path, key.relative_path()))
+            shard.load()
+            self._shards[key] = shard
+            self._evict()
+            return shard
+
+    def add(self, key: ShardKey, embeddings: np.ndarray, documents: List[Dict]):
+        shard = self.get_shard(key)
+        shard.add(embeddings, documents)
+        with self._lock:
+            self._evict()
+
+    def add_if_absent(self, key: ShardKey, embeddings: np.ndarray, documents: List[Dict]) -> int:
+        """
+        Add the chunks of candidates not yet in a shard (see VectorShard.add_if_absent).
+        """
+        added = self.get_shard(key).add_if_absent(embeddings, documents)
+        with self._lock:
+            self._evict()
+        return added
+
+    def delete(self, key: ShardKey, candidate_ids: Optional[List[str]] = None) -> int:
+        """
+        Delete the chunks of the given candidates from a shard, or all of its chunks if None.
+        """
+        return self.get_shard(key).delete(candidate_ids)
+
+    def search(self, key: ShardKey, query_embedding: np.ndarray, k: int = 5, section_filter: Optional[str] = None,
+               candidate_id: Optional[str] = None) -> List[Dict]:
+        return self.get_shard(key).search(query_embedding, k, section_filter, candidate_id)
+
+    def search_batch(self, key: ShardKey, query_embeddings: np.ndarray, requests: List[Tuple[int, Optional[str]]],
+                     candidate_id: Optional[str] = None) -> List[List[Dict]]:
+        return self.get_shard(key).search_batch(query_embeddings, requests, candidate_id)
+
+    @property
+    def loaded_shards(self) -> int:
+        return len(self._shards)
+
+    def _evict(self):
+        # Always keep the most recently used shard, even if it alone exceeds the vector budget.
+        # Shards with a compaction in flight stay loaded so two instances never write the same files.
+        while len(self._shards) > 1:
+            loaded_vectors = sum(shard.ntotal for shard in self._shards.values())
+            if len(self._shards) <= self.max_loaded_shards and loaded_vectors <= self.max_loaded_vectors:
+                break
+            candidates = [key for key in list(self._shards)[:-1] if not self._shards[key].compacting]
+            if not candidates:
+                break
+            del self._shards[candidates[0]]
+
+
+_default_stores: Dict[str, ShardedVectorStore] = {}
+_default_stores_lock = threading.Lock()
+
+
+def get_vector_store(root_path: Optional[str] = None) -> ShardedVectorStore:
+    """
+    Process-wide vector store for root_path (VECTOR_DB_PATH by default).
+
+    Everything in the process that reads or writes a store goes through the same instance, so a
+    shard is loaded once and deletions are seen by searches right away.
+    """
+    root_path = root_path or os.getenv("VECTOR_DB_PATH", "./database/vector_store")
+    with _default_stores_lock:
+        store = _default_stores.get(root_path)
+        if store is None:
+            store = _default_stores[root_path] = ShardedVectorStore(root_path)
+        return store
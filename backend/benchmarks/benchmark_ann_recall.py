@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Compare approximate index types against exact search: recall@k, build time and query latency.
+
+Vectors are drawn from a mixture of Gaussian clusters and normalized, which is closer to real
+embedding distributions than uniform noise. Tune ANN_NPROBE / ANN_EF_SEARCH through the
+environment to explore the accuracy/speed trade-off.
+
+Usage:
+    python benchmarks/benchmark_ann_recall.py [--rows 100000] [--dimension 768] [--queries 200] [--k 10]
+"""
+import argparse
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from app.services.vector_store import build_ann_index
+
+
+def make_vectors(rng, rows: int, dimension: int, clusters: int = 200) -> np.ndarray:
+    centers = rng.standard_normal((clusters, dimension)).astype('float32')
+    vectors = centers[rng.integers(0, clusters, rows)] + 0.5 * rng.standard_normal((rows, dimension)).astype('float32')
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000, help="Number of indexed vectors")
+    parser.add_argument("--dimension", type=int, default=768, help="Embedding dimension")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries")
+    parser.add_argument("--k", type=int, default=10, help="Neighbours per query")
+    parser.add_argument("--types", nargs="+", default=["ivf_flat", "ivf_pq", "hnsw"], help="Index types to test")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = make_vectors(rng, args.rows, args.dimension)
+    queries = make_vectors(rng, args.queries, args.dimension)
+
+    start = time.perf_counter()
+    exact_scores = queries @ vectors.T
+    exact = np.argsort(-exact_scores, axis=1)[:, :args.k]
+    exact_ms = (time.perf_counter() - start) * 1000 / args.queries
+
+    print(f"{args.rows} vectors, dimension {args.dimension}, {args.queries} queries, k={args.k}")
+    print(f"{'index':>9} {'build (s)':>10} {'ms/query':>9} {'recall@k':>9}")
+    print(f"{'flat':>9} {0.0:>10.2f} {exact_ms:>9.3f} {1.0:>9.3f}")
+
+    for index_type in args.types:
+        start = time.perf_counter()
+        index = build_ann_index(index_type, vectors)
+        build_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        # One query at a time, the way shards issue searches
+        for query in queries:
+            index.search(query.reshape(1, -1), args.k)
+        query_ms = (time.perf_counter() - start) * 1000 / args.queries
+
+        _, found = index.search(queries, args.k)
+        recall = np.mean([len(set(found[i]) & set(exact[i])) / args.k for i in range(args.queries)])
+        print(f"{index_type:>9} {build_s:>10.2f} {query_ms:>9.3f} {recall:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
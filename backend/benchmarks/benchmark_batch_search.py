@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Compare the three retrieval searches of an evaluation run one by one vs. as one batch.
+
+    separate  three shard searches (skills, experience, education) as evaluate used to issue them
+    batched   one search_batch call, which ranks all three queries with one matrix search per
+              distinct section filter
+
+Both are measured on a job shard (unrestricted search) and on a single candidate's rows. The
+embedding round trips saved (three query embeddings -> one batched call) come on top of this.
+
+Usage:
+    python benchmarks/benchmark_batch_search.py [--rows 20000 100000] [--dimension 768] [--repeat 50]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from app.services.vector_store import VectorShard
+
+SECTIONS = ['summary', 'experience', 'education', 'skills', 'certifications']
+REQUESTS = [(3, 'skills'), (3, 'experience'), (3, 'education')]
+
+
+def build_shard(path: str, rows: int, dimension: int, rng) -> VectorShard:
+    shard = VectorShard(path)
+    shard.load()
+    batch = 5000
+    for start in range(0, rows, batch):
+        count = min(batch, rows - start)
+        embeddings = rng.standard_normal((count, dimension)).astype('float32')
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+        documents = [{'text': f"chunk {start + i}",
+                      'metadata': {'section': SECTIONS[(start + i) % len(SECTIONS)],
+                                   'candidate_id': str((start + i) // 20)}}
+                     for i in range(count)]
+        shard.add(embeddings, documents)
+    while shard.compacting:
+        time.sleep(0.1)
+    shard.compact()
+    return shard
+
+
+def search_separately(shard: VectorShard, queries: np.ndarray, candidate_id):
+    return [shard.search(query.reshape(1, -1), k, section, candidate_id)
+            for query, (k, section) in zip(queries, REQUESTS)]
+
+
+def timed(func, repeat: int):
+    func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[20000, 100000], help="Shard sizes to test")
+    parser.add_argument("--dimension", type=int, default=768, help="Embedding dimension")
+    parser.add_argument("--repeat", type=int, default=50, help="Timed repetitions per measurement")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    os.environ.setdefault("VECTOR_STORE_FSYNC", "false")
+
+    print(f"{'vectors':>9} {'scope':>10} {'separate (ms)':>14} {'batched (ms)':>13} {'speedup':>8}")
+    for rows in args.rows:
+        shard = build_shard(tempfile.mkdtemp(prefix="cvalign-batch-"), rows, args.dimension, rng)
+        queries = rng.standard_normal((len(REQUESTS), args.dimension)).astype('float32')
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+        for scope, candidate_id in (("job", None), ("candidate", "0")):
+            separate, expected = timed(lambda: search_separately(shard, queries, candidate_id), args.repeat)
+            batched, results = timed(lambda: shard.search_batch(queries, REQUESTS, candidate_id), args.repeat)
+            assert [[hit['text'] for hit in hits] for hits in results] == \
+                   [[hit['text'] for hit in hits] for hits in expected]
+            print(f"{rows:>9} {scope:>10} {separate * 1000:>14.2f} {batched * 1000:>13.2f} "
+                  f"{separate / batched:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
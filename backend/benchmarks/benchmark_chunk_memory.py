@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Compare the memory and disk cost per chunk of chunk documents stored as a list of dicts vs.
+column-wise (ChunkColumns).
+
+    dicts      list of {'text', 'metadata'} dicts, as documents.pkl held them and as the
+               shard's tail held them before
+    columnar   ChunkColumnsBuilder (the shard's tail) and mapped checkpoint ChunkColumns
+
+Chunks look like the ones add_cv_chunks stores: CV section text of up to 500 characters with
+section, chunk_id, total_chunks, company_id, job_id and candidate_id metadata. Heap sizes are
+measured with tracemalloc and include the text itself; "overhead" excludes the UTF-8 text bytes.
+A section filter and a lookup by row are timed as well.
+
+Usage:
+    python benchmarks/benchmark_chunk_memory.py [--chunks 100000]
+"""
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import sys
+import tempfile
+import time
+import tracemalloc
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from app.services.chunk_store import ChunkColumns, ChunkColumnsBuilder, write_chunk_columns
+
+SECTIONS = ['summary', 'experience', 'education', 'skills', 'certifications']
+WORDS = ["Python", "led", "team", "of", "engineers", "built", "services", "PostgreSQL", "migration", "AWS",
+         "university", "degree", "2019", "backend", "platform", "React", "mentoring", "Kubernetes"]
+
+
+def make_documents(count: int, rng):
+    documents = []
+    for i in range(count):
+        candidate = i // 12
+        words = rng.choice(WORDS, int(rng.integers(30, 70)))
+        documents.append({
+            'text': " ".join(words)[:500],
+            'metadata': {'section': SECTIONS[(i // 3) % len(SECTIONS)], 'chunk_id': i % 3, 'total_chunks': 3,
+                         'company_id': 1, 'job_id': 1 + candidate % 40,
+                         'candidate_id': hashlib.sha256(str(candidate).encode()).hexdigest()},
+        })
+    return documents
+
+
+def traced(build):
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def timed(func, repeat: int = 5):
+    func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=100000, help="Chunks to store")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    count = args.chunks
+    texts = make_documents(count, rng)
+    text_bytes = sum(len(document['text'].encode('utf-8')) for document in texts)
+
+    # Build each representation from scratch under tracemalloc, so texts are counted in both
+    vocabularies = {'section': [], 'candidate_id': []}
+    codes = {key: {} for key in vocabularies}
+
+    def encoder(key):
+        def encode(value):
+            if value not in codes[key]:
+                codes[key][value] = len(vocabularies[key])
+                vocabularies[key].append(value)
+            return codes[key][value]
+        return encode
+
+    documents, dict_bytes = traced(lambda: pickle.loads(pickle.dumps(texts)))
+
+    def build_columns():
+        builder = ChunkColumnsBuilder()
+        builder.append(pickle.loads(pickle.dumps(texts)), {key: encoder(key) for key in vocabularies})
+        return builder
+    builder, builder_bytes = traced(build_columns)
+
+    path = tempfile.mkdtemp(prefix="cvalign-chunks-")
+
+    def write(name, blocks):
+        with open(os.path.join(path, name), 'wb') as f:
+            for block in blocks:
+                f.write(block)
+
+    write_chunk_columns([builder.snapshot()], "checkpoint", write)
+    mapped, mapped_bytes = traced(lambda: ChunkColumns.open(os.path.join(path, "checkpoint"), count))
+
+    pickle_disk = len(pickle.dumps(documents))
+    json_disk = sum(len(json.dumps(document, separators=(',', ':')).encode('utf-8')) + 8 for document in documents)
+    columnar_disk = sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+    print(f"{count} chunks, {text_bytes / count:.0f} bytes of text per chunk\n")
+    print(f"{'representation':<32} {'bytes/chunk':>12} {'overhead':>10}")
+    for name, size in (("list of dicts (heap)", dict_bytes), ("columnar tail (heap)", builder_bytes),
+                       ("columnar checkpoint (heap)", mapped_bytes), ("documents.pkl (disk)", pickle_disk),
+                       ("JSON records (disk)", json_disk), ("columnar checkpoint (disk)", columnar_disk)):
+        overhead = f"{(size - text_bytes) / count:>10.0f}" if size >= text_bytes else f"{'-':>10}"
+        print(f"{name:<32} {size / count:>12.0f} {overhead}")
+
+    skills = codes['section']['skills']
+    rows = rng.integers(0, count, 1000)
+    print(f"\n{'operation':<32} {'dicts':>12} {'columnar':>10}")
+    dict_filter = timed(lambda: [i for i, document in enumerate(documents) if document['metadata']['section'] == 'skills'])
+    column_filter = timed(lambda: mapped.rows_where('sections', skills))
+    print(f"{'section filter (ms)':<32} {dict_filter * 1000:>12.2f} {column_filter * 1000:>10.2f}")
+    dict_lookup = timed(lambda: [documents[row] for row in rows])
+    column_lookup = timed(lambda: [mapped.document(int(row), vocabularies) for row in rows])
+    print(f"{'document lookup (us)':<32} {dict_lookup * 1000:>12.2f} {column_lookup * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Measure shard size and search latency under churn: every round uploads a batch of candidates
+to a job's shard and deletes the evaluations of as many older candidates.
+
+    keep      deleted candidates' chunks stay in the shard (the behaviour before deletion support)
+    delete    VectorShard.delete tombstones them and compaction drops them once they reach
+              VECTOR_STORE_TOMBSTONE_RATIO of the rows
+
+With deletion the number of stored rows, the checkpoint size on disk and the search latency
+should level off instead of growing with every round.
+
+Usage:
+    python benchmarks/benchmark_churn.py [--rounds 20] [--candidates 500] [--chunks 12]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from app.services.vector_store import VectorShard
+
+
+def directory_size(path: str) -> int:
+    if not os.path.exists(path):
+        return 0
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def run(mode: str, args, rng):
+    path = tempfile.mkdtemp(prefix="cvalign-churn-")
+    shard = VectorShard(path)
+    shard.load()
+    queries = rng.standard_normal((20, args.dimension)).astype('float32')
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    results = []
+    for round_number in range(args.rounds):
+        first = round_number * args.candidates
+        documents = [{'text': f"candidate {c} chunk {j}",
+                      'metadata': {'section': 'skills' if j % 3 == 0 else 'experience', 'candidate_id': f"c{c}"}}
+                     for c in range(first, first + args.candidates) for j in range(args.chunks)]
+        embeddings = rng.standard_normal((len(documents), args.dimension)).astype('float32')
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+        shard.add(embeddings, documents)
+
+        # Candidates of the round before last are removed, so about two rounds stay live
+        if mode == "delete" and round_number >= 2:
+            old = first - 2 * args.candidates
+            shard.delete([f"c{c}" for c in range(old, old + args.candidates)])
+        while shard.compacting:
+            time.sleep(0.01)
+
+        start = time.perf_counter()
+        for query in queries:
+            shard.search(query, 3, 'skills')
+        latency = (time.perf_counter() - start) / len(queries)
+        results.append((shard.ntotal, shard.live_rows, directory_size(path), latency))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=20, help="Upload/delete rounds")
+    parser.add_argument("--candidates", type=int, default=500, help="Candidates uploaded (and deleted) per round")
+    parser.add_argument("--chunks", type=int, default=12, help="Chunks per candidate")
+    parser.add_argument("--dimension", type=int, default=384, help="Embedding dimension")
+    args = parser.parse_args()
+
+    os.environ.setdefault("VECTOR_STORE_FSYNC", "false")
+    os.environ.setdefault("VECTOR_STORE_COMPACT_BYTES", str(4 * 1024 * 1024))
+
+    runs = {mode: run(mode, args, np.random.default_rng(0)) for mode in ("keep", "delete")}
+    print(f"{'round':>5} | {'keep: rows':>10} {'disk MB':>8} {'ms':>6} | {'delete: rows':>12} {'live':>7} "
+          f"{'disk MB':>8} {'ms':>6}")
+    for round_number in range(args.rounds):
+        kept_rows, _, kept_disk, kept_latency = runs["keep"][round_number]
+        rows, live, disk, latency = runs["delete"][round_number]
+        print(f"{round_number + 1:>5} | {kept_rows:>10} {kept_disk / 2 ** 20:>8.1f} {kept_latency * 1000:>6.2f} | "
+              f"{rows:>12} {live:>7} {disk / 2 ** 20:>8.1f} {latency * 1000:>6.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Benchmark CV text extraction on the event loop vs. in the extraction process pool.
+
+Generates a corpus of synthetic PDF and DOCX files of different sizes, then extracts every file
+concurrently the old way (parsing inline on the event loop) and through DocumentProcessor. Also
+reports the worst event loop stall seen while extracting, which is what other requests feel.
+
+Usage:
+    python benchmarks/benchmark_document_extraction.py [--pages 1 5 40 200] [--copies 4] [--workers 4]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docx import Document
+from PyPDF2 import PdfReader
+
+from app.services.document_processor import DocumentProcessor, get_extraction_pool, shutdown_extraction_pool
+
+LINES_PER_PAGE = 45
+
+
+def _line(page: int, line: int) -> str:
+    return f"Page {page} line {line}: Senior engineer, Python, Kubernetes, PostgreSQL, team lead"
+
+
+def write_pdf(path: str, pages: int):
+    """Write a minimal multi-page PDF with one text line per row, without extra dependencies."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for page in range(pages):
+        rows = "".join(f"({_line(page, line)}) Tj T* " for line in range(LINES_PER_PAGE))
+        stream = f"BT /F1 10 Tf 12 TL 40 800 Td {rows}ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        content_id = len(objects)
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>")
+        page_ids.append(len(objects))
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {pages} >>"
+
+    body = b"%PDF-1.4\n"
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(body))
+        body += f"{number} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref = len(body)
+    body += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    body += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    body += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    with open(path, "wb") as f:
+        f.write(body)
+
+
+def write_docx(path: str, pages: int):
+    doc = Document()
+    for page in range(pages):
+        for line in range(LINES_PER_PAGE):
+            doc.add_paragraph(_line(page, line))
+    doc.save(path)
+
+
+def build_corpus(directory: str, page_counts, copies: int):
+    files = []
+    for pages in page_counts:
+        for copy in range(copies):
+            pdf_path = os.path.join(directory, f"cv_{pages}p_{copy}.pdf")
+            docx_path = os.path.join(directory, f"cv_{pages}p_{copy}.docx")
+            write_pdf(pdf_path, pages)
+            write_docx(docx_path, pages)
+            files.extend([pdf_path, docx_path])
+    return files
+
+
+async def extract_inline(processor: DocumentProcessor, file_path: str) -> str:
+    """The previous implementation: synchronous parsing and string concatenation on the event loop."""
+    text = ""
+    if file_path.endswith(".pdf"):
+        for page in PdfReader(file_path).pages:
+            text += page.extract_text() + "\n"
+    else:
+        for paragraph in Document(file_path).paragraphs:
+            text += paragraph.text + "\n"
+    return processor._clean_text(text)
+
+
+async def run(files, extract):
+    """Extract all files concurrently; return (elapsed seconds, worst event loop stall, texts)."""
+    stall = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal stall
+        interval = 0.005
+        while not done:
+            before = time.perf_counter()
+            await asyncio.sleep(interval)
+            stall = max(stall, time.perf_counter() - before - interval)
+
+    ticker_task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    texts = await asyncio.gather(*(extract(path) for path in files))
+    elapsed = time.perf_counter() - start
+    done = True
+    await ticker_task
+    return elapsed, stall, texts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 5, 40, 200], help="Page counts in the corpus")
+    parser.add_argument("--copies", type=int, default=4, help="Files per page count and format")
+    parser.add_argument("--workers", type=int, default=0, help="Extraction processes (0 = one per CPU)")
+    parser.add_argument("--pages-per-task", type=int, default=20, help="PDF pages extracted per pool task")
+    args = parser.parse_args()
+
+    if args.workers:
+        os.environ["EXTRACTION_WORKERS"] = str(args.workers)
+
+    directory = tempfile.mkdtemp(prefix="cvalign-extract-")
+    files = build_corpus(directory, args.pages, args.copies)
+    total_mb = sum(os.path.getsize(path) for path in files) / 1e6
+    print(f"Corpus: {len(files)} files, {total_mb:.1f} MB, pages {args.pages}")
+
+    processor = DocumentProcessor(pdf_pages_per_task=args.pages_per_task)
+    # Start the workers up front so process spawn time isn't charged to the first run
+    pool = get_extraction_pool()
+    list(pool.map(abs, range(pool._max_workers)))
+
+    inline_time, inline_stall, inline_texts = asyncio.run(run(files, lambda p: extract_inline(processor, p)))
+    pool_time, pool_stall, pool_texts = asyncio.run(run(files, processor.extract_text_from_file))
+    shutdown_extraction_pool()
+
+    print(f"Inline on event loop: {inline_time:.2f}s total, worst loop stall {inline_stall * 1000:.0f}ms")
+    print(f"Process pool ({pool._max_workers} workers): {pool_time:.2f}s total, "
+          f"worst loop stall {pool_stall * 1000:.0f}ms")
+    print(f"Speedup:               {inline_time / pool_time:.2f}x")
+    print(f"Identical text:        {inline_texts == pool_texts}")
+
+
+if __name__ == "__main__":
+    main()
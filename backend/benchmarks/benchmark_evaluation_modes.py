@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Compare latency and token usage of the per-section and single-pass evaluation modes.
+
+per_section sends three score prompts and one feedback prompt per CV, each repeating the job
+context; single_pass sends one combined JSON prompt and only falls back to per-section prompts
+for fields that fail to parse.
+
+By default a simulated Ollama server is started whose latency grows with prompt tokens (prefill)
+and generated tokens (decode). Pass --base-url to measure against a real Ollama instance.
+
+Usage:
+    python benchmarks/benchmark_evaluation_modes.py [--runs 5] [--malformed-rate 0.2]
+    python benchmarks/benchmark_evaluation_modes.py --base-url http://localhost:11434 --model gemma:4b
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.cv_store import CVContentStore
+from app.services.embedding_cache import EmbeddingCache
+from app.services.job_embeddings import JobEmbeddingStore
+from app.services.llm_service import LLMService
+from app.services.ollama_client import AsyncOllamaClient
+from app.services.rag_engine import EvaluationMode, RAGEngine
+from app.services.vector_store import ShardedVectorStore
+
+CV_SECTIONS = {
+    'contact_info': 'John Doe john.doe@email.com (123) 456-7890',
+    'summary': 'Experienced software engineer with 5+ years in web development and cloud technologies.',
+    'experience': ('Senior Software Engineer, Tech Corp, 2020-Present. Developed web applications in Python and '
+                   'JavaScript, implemented CI/CD pipelines that cut deployment time by 40%, led a team of 4. '
+                   'Software Engineer, Startup Inc, 2018-2020. Built React and Node.js applications, '
+                   'PostgreSQL and MongoDB data layers, improved load times by 30%.'),
+    'education': 'Bachelor of Science in Computer Science, University of Tech, 2018. Magna Cum Laude.',
+    'skills': 'Python, JavaScript, Java, React, Node.js, Django, Flask, PostgreSQL, MongoDB, Redis, AWS, Docker, Kubernetes',
+    'certifications': 'AWS Certified Solutions Architect',
+}
+JOB_DESCRIPTION = ("We are hiring a senior software engineer to build and operate a cloud-native web platform, "
+                   "mentor engineers and own services end to end.")
+JOB_REQUIREMENTS = ("5+ years of experience, proficiency in Python and JavaScript, modern web frameworks, "
+                    "experience with cloud platforms and containers, degree in Computer Science or related field.")
+
+FEEDBACK = {
+    "strengths": ["Strong Python and JavaScript background", "Led a team of engineers"],
+    "weaknesses": ["Limited exposure to large-scale distributed systems"],
+    "recommendations": ["Probe cloud architecture depth in interview"],
+    "soft_skills_assessment": ["Mentors junior developers"],
+    "summary": "Strong fit for the role with minor gaps."
+}
+
+
+def start_simulated_ollama(prefill_ms_per_1k: float, decode_ms_per_token: float, malformed_rate: float,
+                           parallel: int, seed: int):
+    rng = random.Random(seed)
+    lock = threading.Lock()
+    # Like OLLAMA_NUM_PARALLEL: generations beyond this many queue on the model
+    slots = threading.BoundedSemaphore(parallel)
+
+    def respond(prompt: str) -> str:
+        if '"skills_score"' in prompt:
+            with lock:
+                malformed = rng.random() < malformed_rate
+            if malformed:
+                # Typical failure: a field comes back in the wrong type
+                return json.dumps({**FEEDBACK, "skills_score": "high", "experience_score": 78, "education_score": 85})
+            return json.dumps({**FEEDBACK, "skills_score": 82, "experience_score": 78, "education_score": 85})
+        if "JSON format" in prompt:
+            return json.dumps(FEEDBACK)
+        return "80"
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            if self.path == "/api/embed":
+                payload = {"model": body["model"], "embeddings": [[1.0, 0.0]] * len(body["input"])}
+            else:
+                text = respond(body["prompt"])
+                # Rough token estimate: 4 characters per token
+                prompt_tokens = len(body["prompt"]) // 4
+                completion_tokens = max(1, len(text) // 4)
+                with slots:
+                    time.sleep(prompt_tokens / 1000 * prefill_ms_per_1k / 1000
+                               + completion_tokens * decode_ms_per_token / 1000)
+                payload = {"model": body["model"], "response": text, "done": True,
+                           "prompt_eval_count": prompt_tokens, "eval_count": completion_tokens}
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_mode(mode: str, base_url: str, model: str, runs: int):
+    client = AsyncOllamaClient(base_url)
+    directory = tempfile.mkdtemp(prefix="cvalign-bench-")
+    service = LLMService(generation_model_name=model, ollama_client=client,
+                         embedding_cache=EmbeddingCache(os.path.join(directory, "embeddings.db")))
+    rag_engine = RAGEngine(llm_service=service, evaluation_mode=mode,
+                           job_embedding_store=JobEmbeddingStore(os.path.join(directory, "jobs.db")),
+                           cv_store=CVContentStore(os.path.join(directory, "cvs.db")),
+                           vector_store=ShardedVectorStore(os.path.join(directory, "vectors")))
+
+    latencies = []
+    results = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        results.append(asyncio.run(rag_engine.evaluate_cv_with_rag_context_async(
+            CV_SECTIONS, JOB_DESCRIPTION, JOB_REQUIREMENTS, use_cache=False
+        )))
+        latencies.append(time.perf_counter() - start)
+
+    stats = client.stats()
+    client.close()
+    return latencies, stats, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="Real Ollama URL; a simulated server is used if omitted")
+    parser.add_argument("--model", default="gemma:4b", help="Generation model")
+    parser.add_argument("--runs", type=int, default=5, help="Evaluations per mode")
+    parser.add_argument("--prefill-ms-per-1k", type=float, default=300, help="Simulated prefill cost per 1k prompt tokens")
+    parser.add_argument("--decode-ms-per-token", type=float, default=15, help="Simulated decode cost per generated token")
+    parser.add_argument("--parallel", type=int, default=1, help="Generations the simulated server runs at once")
+    parser.add_argument("--malformed-rate", type=float, default=0.0,
+                        help="Fraction of simulated combined responses with an invalid field")
+    args = parser.parse_args()
+
+    # Measure fresh generations only
+    os.environ["LLM_RESPONSE_CACHE_ENABLED"] = "false"
+
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        server = start_simulated_ollama(args.prefill_ms_per_1k, args.decode_ms_per_token, args.malformed_rate,
+                                        args.parallel, seed=0)
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    print(f"{'mode':<12} {'latency/CV':>11} {'requests/CV':>12} {'prompt tok/CV':>14} {'output tok/CV':>14}")
+    for mode in (EvaluationMode.PER_SECTION, EvaluationMode.SINGLE_PASS):
+        latencies, stats, results = run_mode(mode, base_url, args.model, args.runs)
+        print(f"{mode:<12} {sum(latencies) / len(latencies):>10.3f}s {stats['requests_sent'] / args.runs:>12.1f} "
+              f"{stats['prompt_tokens'] / args.runs:>14.0f} {stats['completion_tokens'] / args.runs:>14.0f}"
+              f"   (overall score {results[-1].overall_score})")
+
+    if server:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
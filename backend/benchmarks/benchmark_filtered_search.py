@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Measure section-filtered search latency and hit counts as the filter gets more selective.
+
+Builds one shard per selectivity in which the searched section makes up the given share of the
+rows, then searches for k chunks of that section. Filters are applied inside the search, so
+every search should return k hits and latency should not grow as the share shrinks. Run with
+--rows above ANN_MIN_VECTORS (default 20000) to exercise the ANN index with an ID selector.
+
+Usage:
+    python benchmarks/benchmark_filtered_search.py [--rows 100000] [--shares 0.5 0.1 0.01 0.001] [--k 3]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from app.services.vector_store import VectorShard
+
+
+def build_shard(path: str, rows: int, dimension: int, share: float, rng) -> VectorShard:
+    shard = VectorShard(path)
+    shard.load()
+    batch = 5000
+    for start in range(0, rows, batch):
+        count = min(batch, rows - start)
+        embeddings = rng.standard_normal((count, dimension)).astype('float32')
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+        sections = np.where(rng.random(count) < share, 'skills', 'experience')
+        documents = [{'text': f"chunk {start + i}", 'metadata': {'section': str(sections[i])}} for i in range(count)]
+        shard.add(embeddings, documents)
+    while shard.compacting:
+        time.sleep(0.1)
+    shard.compact()
+    return shard
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000, help="Vectors per shard")
+    parser.add_argument("--dimension", type=int, default=384, help="Embedding dimension")
+    parser.add_argument("--shares", type=float, nargs="+", default=[0.5, 0.1, 0.01, 0.001],
+                        help="Share of rows in the searched section")
+    parser.add_argument("--k", type=int, default=3, help="Hits requested per search")
+    parser.add_argument("--queries", type=int, default=50, help="Searches per shard")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    os.environ.setdefault("VECTOR_STORE_FSYNC", "false")
+
+    print(f"{'share':>7} {'matching':>9} {'index':>9} {'latency (ms)':>13} {'min hits':>9}")
+    for share in args.shares:
+        shard = build_shard(tempfile.mkdtemp(prefix="cvalign-filter-"), args.rows, args.dimension, share, rng)
+        queries = rng.standard_normal((args.queries, args.dimension)).astype('float32')
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+        matching = len(shard.base_chunks.rows_where('sections', shard.section_codes['skills']))
+
+        shard.search(queries[:1], args.k, 'skills')
+        start = time.perf_counter()
+        hits = [len(shard.search(query.reshape(1, -1), args.k, 'skills')) for query in queries]
+        latency = (time.perf_counter() - start) / len(queries)
+        print(f"{share:>7} {matching:>9} {shard.ann_type or 'flat':>9} {latency * 1000:>13.2f} {min(hits):>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Measure time-to-first-token per candidate with and without a job evaluation session.
+
+Every candidate gets the four per-section prompts (skills, experience, education, feedback),
+streamed so the first token can be timed. Three prompt layouts are compared:
+
+    cv_first   the previous layout, CV content before the job texts
+    job_first  the current templates, job texts before CV content
+    session    JobEvaluationSession: the job briefing is sent once and its Ollama context is
+               passed with every candidate prompt
+
+By default a simulated Ollama server is started that, like the Ollama runner, keeps the tokens of
+the last request in its KV cache and only prefills the part of a new request after the longest
+common prefix. The session's one-time job briefing is reported separately as "job prime".
+Pass --base-url to measure against a real Ollama instance.
+
+Usage:
+    python benchmarks/benchmark_job_session_ttft.py [--candidates 6] [--job-words 1200]
+    python benchmarks/benchmark_job_session_ttft.py --base-url http://localhost:11434 --model gemma:4b
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ollama
+
+from app.services.embedding_cache import EmbeddingCache
+from app.services.job_session import JobEvaluationSession
+from app.services.llm_service import LLMService
+from app.services.ollama_client import AsyncOllamaClient
+from app.services.prompts import CV_EVALUATION_PROMPTS
+
+TEMPLATES = ("skills_evaluation", "experience_evaluation", "education_evaluation", "detailed_feedback_with_soft_skills")
+SKILLS = ["Python", "JavaScript", "Go", "React", "Django", "PostgreSQL", "Redis", "AWS", "Docker", "Kubernetes",
+          "Terraform", "Kafka", "GraphQL", "TypeScript", "Rust", "Spark"]
+
+
+def make_job(words: int):
+    sentence = ("The platform team owns the services behind our hiring marketplace, from ingestion pipelines "
+                "to the public API, and works closely with product and data science. ")
+    description = (sentence * (words // len(sentence.split()) + 1)).strip()
+    requirements = ("5+ years of backend experience, Python and one of Go or Java, PostgreSQL, cloud platforms "
+                    "and containers, mentoring experience, degree in Computer Science or related field.")
+    return description, requirements
+
+
+def make_candidate(i: int):
+    skills = ", ".join(SKILLS[(i + j) % len(SKILLS)] for j in range(8))
+    return {
+        'summary': f"Candidate {i}: software engineer with {3 + i % 6} years of experience.",
+        'experience': (f"Engineer at Company {i} since {2015 + i % 8}, built services in {SKILLS[i % len(SKILLS)]}, "
+                       f"led migrations and on-call for {2 + i % 5} services. ") * 3,
+        'education': f"BSc Computer Science, University {i}, {2012 + i % 8}.",
+        'skills': skills,
+    }
+
+
+def cv_first_prompt(template_id: str, fields) -> str:
+    """The previous layout of the templates: everything before the job texts, then the CV."""
+    template = CV_EVALUATION_PROMPTS[template_id]
+    job_start = template.index("Job ")
+    cv_start = template.index("CV", job_start)
+    tail_start = template.index("\n\n", template.index("}", cv_start)) + 2
+    return (template[:job_start] + template[cv_start:tail_start] + template[job_start:cv_start]
+            + template[tail_start:]).format(**fields)
+
+
+def start_simulated_ollama(prefill_ms_per_token: float, decode_ms_per_token: float):
+    state = {'cached': []}
+    lock = threading.Lock()
+
+    def tokenize(text: str):
+        return [zlib.crc32(text[i:i + 4].encode("utf-8")) for i in range(0, len(text), 4)]
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        def log_message(self, *args):
+            pass
+
+        def write_chunk(self, payload):
+            data = (json.dumps(payload) + "\n").encode("utf-8")
+            self.wfile.write(f"{len(data):x}\r\n".encode("latin-1") + data + b"\r\n")
+            self.wfile.flush()
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            # Chat-template the new turn and append it to the context, as Ollama does
+            turn = tokenize(f"<start_of_turn>user\n{body['prompt']}<end_of_turn>\n<start_of_turn>model\n")
+            tokens = list(body.get("context") or []) + turn
+            limit = (body.get("options") or {}).get("num_predict") or 4
+            output = tokenize("OK" if limit < 4 else "80")[:limit]
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            with lock:
+                cached = state['cached']
+                common = 0
+                while common < min(len(cached), len(tokens)) and cached[common] == tokens[common]:
+                    common += 1
+                prefill = len(tokens) - common
+                time.sleep(prefill * prefill_ms_per_token / 1000)
+                for token in output:
+                    time.sleep(decode_ms_per_token / 1000)
+                    if body.get("stream"):
+                        self.write_chunk({"model": body["model"], "response": "8", "done": False})
+                state['cached'] = tokens + output
+            final = {"model": body["model"], "response": "" if body.get("stream") else "80", "done": True,
+                     "prompt_eval_count": prefill, "eval_count": len(output), "context": tokens + output}
+            self.write_chunk(final)
+            self.wfile.write(b"0\r\n\r\n")
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def time_to_first_token(client: ollama.Client, model: str, prompt: str, context=None) -> float:
+    start = time.perf_counter()
+    ttft = None
+    for part in client.generate(model=model, prompt=prompt, context=context, stream=True,
+                                options={'temperature': 0.2, 'num_predict': 16}, keep_alive="30m"):
+        if ttft is None and (part.response or part.done):
+            ttft = time.perf_counter() - start
+    return ttft
+
+
+def run_layout(layout: str, base_url: str, model: str, candidates, job_description: str, job_requirements: str):
+    client = ollama.Client(host=base_url)
+    session = None
+    prime_time = 0.0
+    if layout == "session":
+        async_client = AsyncOllamaClient(base_url)
+        embedding_cache = EmbeddingCache(os.path.join(tempfile.mkdtemp(prefix="cvalign-bench-"), "embeddings.db"))
+        session = JobEvaluationSession(LLMService(generation_model_name=model, ollama_client=async_client,
+                                                  embedding_cache=embedding_cache),
+                                       job_description, job_requirements)
+        start = time.perf_counter()
+        session.prime()
+        prime_time = time.perf_counter() - start
+        async_client.close()
+
+    per_candidate = []
+    for cv_sections in candidates:
+        cv_text = "\n".join(f"{section}: {content}" for section, content in cv_sections.items() if content)
+        fields = {
+            'cv_skills': cv_sections['skills'], 'cv_experience': cv_sections['experience'],
+            'cv_education': cv_sections['education'], 'cv_text': cv_text,
+            'job_description': job_description, 'job_requirements': job_requirements,
+            'job_context': f"Job Description: {job_description}\n\nRequirements: {job_requirements}",
+        }
+        ttfts = []
+        for template_id in TEMPLATES:
+            if layout == "session":
+                prompt, context = session.request(template_id, **fields)
+            elif layout == "job_first":
+                prompt, context = CV_EVALUATION_PROMPTS[template_id].format(**fields), None
+            else:
+                prompt, context = cv_first_prompt(template_id, fields), None
+            ttfts.append(time_to_first_token(client, model, prompt, context))
+        per_candidate.append(sum(ttfts) / len(ttfts))
+    client._client.close()
+    return per_candidate, prime_time, session is not None and session.context is not None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="Real Ollama URL; a simulated server is used if omitted")
+    parser.add_argument("--model", default="gemma:4b", help="Generation model")
+    parser.add_argument("--candidates", type=int, default=6, help="Candidates evaluated for the job")
+    parser.add_argument("--job-words", type=int, default=1200, help="Length of the synthetic job description")
+    parser.add_argument("--prefill-ms-per-token", type=float, default=0.5, help="Simulated prefill cost per token")
+    parser.add_argument("--decode-ms-per-token", type=float, default=15, help="Simulated decode cost per token")
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        server = start_simulated_ollama(args.prefill_ms_per_token, args.decode_ms_per_token)
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    job_description, job_requirements = make_job(args.job_words)
+    candidates = [make_candidate(i) for i in range(args.candidates)]
+
+    print(f"Mean time-to-first-token per prompt, {len(TEMPLATES)} prompts per candidate")
+    print(f"{'layout':<10} {'job prime':>10} {'1st CV':>9} {'later CVs':>10}  context")
+    for layout in ("cv_first", "job_first", "session"):
+        per_candidate, prime_time, has_context = run_layout(layout, base_url, args.model, candidates,
+                                                job_description, job_requirements)
+        later = per_candidate[1:] or per_candidate
+        print(f"{layout:<10} {prime_time * 1000:>8.0f}ms {per_candidate[0] * 1000:>7.0f}ms {sum(later) / len(later) * 1000:>8.0f}ms  "
+              f"{'reused' if has_context else '-'}")
+
+    if server:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
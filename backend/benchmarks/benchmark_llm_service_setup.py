@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Measure per-upload setup overhead of the LLM service and the cost of embedding round trips.
+
+Compares the previous pattern (a new LLMService with fresh LangChain Ollama clients and text
+splitter on every chunking call, one HTTP request per embedded text on a new connection) with
+the shared service registry (one lazily created service, cached splitters, batched embeddings
+over a keep-alive connection pool).
+
+A local fake Ollama server answers requests instantly, so only client-side overhead is measured.
+
+Usage:
+    python benchmarks/benchmark_llm_service_setup.py [--uploads 200] [--chunks 12] [--dimension 768]
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_community.embeddings import OllamaEmbeddings
+from langchain_community.llms import Ollama
+
+from app.services.llm_service import LLMService
+from app.services.ollama_client import AsyncOllamaClient
+
+CV_SECTIONS = {
+    'summary': 'Experienced software engineer with 5+ years in web development. ' * 6,
+    'experience': 'Senior Software Engineer at Tech Corp, built Python services and CI/CD pipelines. ' * 12,
+    'education': 'BSc Computer Science, University of Tech, 2018. ' * 4,
+    'skills': 'Python, JavaScript, React, Docker, Kubernetes, PostgreSQL, AWS, Terraform. ' * 6,
+}
+
+
+def start_fake_ollama(dimension: int):
+    vector = [0.01] * dimension
+    connections = set()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            # Headers and body go out in separate writes; avoid Nagle/delayed-ACK stalls on reused connections
+            self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            connections.add(self.client_address)
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            if self.path == "/api/embed":
+                inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+                payload = {"model": body["model"], "embeddings": [vector] * len(inputs)}
+            elif self.path == "/api/embeddings":
+                payload = {"embedding": vector}
+            else:
+                payload = {"model": body["model"], "response": "75", "done": True}
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, connections
+
+
+def legacy_chunk(cv_sections, base_url):
+    """What chunk_cv_sections_with_langchain used to do: build every client, then split."""
+    OllamaEmbeddings(model="embeddinggemma:300m", base_url=base_url)
+    Ollama(model="gemma:4b", base_url=base_url, temperature=0.2)
+    splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50, separators=["\n\n", "\n", " ", ""])
+    return [chunk for text in cv_sections.values() for chunk in splitter.split_text(text)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uploads", type=int, default=200, help="Simulated uploads")
+    parser.add_argument("--chunks", type=int, default=12, help="Chunks embedded per upload")
+    parser.add_argument("--dimension", type=int, default=768, help="Embedding dimension returned by the fake server")
+    args = parser.parse_args()
+
+    server, connections = start_fake_ollama(args.dimension)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ["OLLAMA_BASE_URL"] = base_url
+    # Measure real round trips, not cache hits
+    os.environ["EMBEDDING_CACHE_ENABLED"] = "false"
+    texts = [f"chunk {i} " + CV_SECTIONS['experience'][:400] for i in range(args.chunks)]
+
+    start = time.perf_counter()
+    for _ in range(args.uploads):
+        legacy_chunk(CV_SECTIONS, base_url)
+    legacy_setup = (time.perf_counter() - start) / args.uploads
+
+    service = LLMService(ollama_client=AsyncOllamaClient(base_url))
+    start = time.perf_counter()
+    for _ in range(args.uploads):
+        service.split_cv_sections(CV_SECTIONS)
+    shared_setup = (time.perf_counter() - start) / args.uploads
+
+    connections.clear()
+    legacy_embeddings = OllamaEmbeddings(model="embeddinggemma:300m", base_url=base_url)
+    start = time.perf_counter()
+    for _ in range(args.uploads):
+        legacy_embeddings.embed_documents(texts)
+    legacy_embed = (time.perf_counter() - start) / args.uploads
+    legacy_connections = len(connections)
+
+    connections.clear()
+    start = time.perf_counter()
+    for _ in range(args.uploads):
+        service.embed_documents(texts)
+    shared_embed = (time.perf_counter() - start) / args.uploads
+    shared_connections = len(connections)
+
+    server.shutdown()
+
+    print(f"Uploads: {args.uploads}, chunks per upload: {args.chunks}")
+    print(f"Chunking setup   per upload: legacy {legacy_setup * 1000:.2f}ms, shared {shared_setup * 1000:.2f}ms "
+          f"({legacy_setup / shared_setup:.1f}x)")
+    print(f"Embedding calls  per upload: legacy {legacy_embed * 1000:.2f}ms, shared {shared_embed * 1000:.2f}ms "
+          f"({legacy_embed / shared_embed:.1f}x)")
+    print(f"TCP connections opened:      legacy {legacy_connections}, shared {shared_connections}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Measure the parse + index cost of a CV uploaded for the first time vs. uploaded again, with and
+without the CV content store.
+
+    first     new file: extracted, chunked, embedded and written to the job's shard
+    same job  the same file for the same job (a re-application)
+    new job   the same file for another job
+
+Embeddings come from a local fake Ollama server with a fixed per-request latency, and the
+embedding cache is disabled so only the CV store can avoid embedding calls. CV_STORE_ENABLED is
+off so the "no store" run gets no default store; the other run passes one explicitly.
+
+Usage:
+    python benchmarks/benchmark_repeat_uploads.py [--cvs 20] [--embed-latency 0.05]
+"""
+import argparse
+import asyncio
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["EMBEDDING_CACHE_ENABLED"] = "false"
+os.environ["CV_STORE_ENABLED"] = "false"
+os.environ["VECTOR_STORE_FSYNC"] = "false"
+os.environ.setdefault("EXTRACTION_WORKERS", "1")
+
+from docx import Document
+
+from benchmark_section_tokenizer import make_cv
+from test_ollama_client import FakeOllama
+
+from app.services.cv_store import CVContentStore, file_hash
+from app.services.document_processor import DocumentProcessor, shutdown_extraction_pool
+from app.services.llm_service import LLMService
+from app.services.ollama_client import AsyncOllamaClient
+from app.services.rag_engine import RAGEngine
+from app.services.vector_store import ShardKey, ShardedVectorStore, candidate_id_for_text
+
+
+def upload(engine: RAGEngine, processor: DocumentProcessor, data: bytes, partition: ShardKey):
+    """What _process_cv_upload does before scoring."""
+    stream = io.BytesIO(data)
+    parsed = None
+    upload_hash = None
+    if engine.cv_store is not None:
+        upload_hash = file_hash(stream, "cv.docx")
+        parsed = engine.cv_store.get_file(upload_hash)
+    if parsed is None:
+        cv_text = asyncio.run(processor.extract_text_from_stream(stream, "cv.docx"))
+        parsed = {'cv_text': cv_text, 'cv_sections': processor.extract_cv_sections(cv_text),
+                  'candidate_info': processor.extract_candidate_info(cv_text)}
+        if engine.cv_store is not None:
+            parsed = engine.cv_store.put(upload_hash, parsed)
+    engine.add_cv_sections(parsed['cv_sections'], partition, candidate_id_for_text(parsed['cv_text']))
+
+
+def run(files, cv_store, url: str):
+    client = AsyncOllamaClient(url)
+    try:
+        engine = RAGEngine(llm_service=LLMService(ollama_client=client), cv_store=cv_store,
+                           vector_store=ShardedVectorStore(tempfile.mkdtemp(prefix="cvalign-repeat-")))
+        processor = DocumentProcessor()
+        timings = {}
+        for name, job_id in (("first", 1), ("same job", 1), ("new job", 2)):
+            start = time.perf_counter()
+            for data in files:
+                upload(engine, processor, data, ShardKey(company_id=1, job_id=job_id))
+            timings[name] = (time.perf_counter() - start) / len(files)
+        return timings
+    finally:
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cvs", type=int, default=20, help="Distinct CVs uploaded")
+    parser.add_argument("--embed-latency", type=float, default=0.05, help="Fake Ollama latency per request (s)")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="cvalign-repeat-")
+    rng = random.Random(0)
+    files = []
+    for _ in range(args.cvs):
+        document = Document()
+        for line in make_cv(rng).split("\n"):
+            document.add_paragraph(line)
+        buffer = io.BytesIO()
+        document.save(buffer)
+        files.append(buffer.getvalue())
+
+    # Start the extraction pool outside the timed runs
+    asyncio.run(DocumentProcessor().extract_text_from_stream(io.BytesIO(files[0]), "cv.docx"))
+    server = FakeOllama(latency=args.embed_latency)
+    try:
+        results = {
+            "no store": run(files, None, server.url),
+            "CV store": run(files, CVContentStore(os.path.join(directory, "cvs.db")), server.url),
+        }
+    finally:
+        server.close()
+        shutdown_extraction_pool()
+
+    print(f"{args.cvs} DOCX CVs, {args.embed_latency * 1000:.0f}ms per embedding request\n")
+    print(f"{'':<10} {'first (ms)':>11} {'same job (ms)':>14} {'new job (ms)':>13}")
+    for name, timings in results.items():
+        print(f"{name:<10} {timings['first'] * 1000:>11.1f} {timings['same job'] * 1000:>14.1f} "
+              f"{timings['new job'] * 1000:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Measure how long it takes to open a checkpointed vector shard and run a first search.
+
+Checkpoints are memory-mapped, so open time should stay roughly constant as the shard grows.
+
+Usage:
+    python benchmarks/benchmark_shard_startup.py [--sizes 10000 50000 200000] [--dimension 768]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from app.services.vector_store import VectorShard
+
+
+def build_shard(path: str, rows: int, dimension: int, rng) -> VectorShard:
+    shard = VectorShard(path)
+    shard.load()
+    batch = 5000
+    for start in range(0, rows, batch):
+        count = min(batch, rows - start)
+        embeddings = rng.standard_normal((count, dimension)).astype('float32')
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+        documents = [{'text': f"chunk {start + i}", 'metadata': {'section': 'skills', 'candidate_id': str((start + i) // 20)}}
+                     for i in range(count)]
+        shard.add(embeddings, documents)
+    while shard.compacting:
+        time.sleep(0.1)
+    shard.compact()
+    return shard
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000, 200000], help="Shard sizes to test")
+    parser.add_argument("--dimension", type=int, default=768, help="Embedding dimension")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    os.environ.setdefault("VECTOR_STORE_FSYNC", "false")
+
+    print(f"{'vectors':>9} {'open (ms)':>10} {'first search (ms)':>18}")
+    for rows in args.sizes:
+        path = tempfile.mkdtemp(prefix="cvalign-startup-")
+        build_shard(path, rows, args.dimension, rng)
+
+        start = time.perf_counter()
+        shard = VectorShard(path)
+        shard.load()
+        open_ms = (time.perf_counter() - start) * 1000
+
+        query = rng.standard_normal((1, args.dimension)).astype('float32')
+        start = time.perf_counter()
+        shard.search(query, k=5, candidate_id="0")
+        search_ms = (time.perf_counter() - start) * 1000
+
+        print(f"{rows:>9} {open_ms:>10.2f} {search_ms:>18.2f}")
+
+
+if __name__ == "__main__":
+    main()
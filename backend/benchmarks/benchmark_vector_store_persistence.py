@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Measure per-upload persistence cost of a vector shard as the corpus grows.
+
+Each simulated upload adds one CV worth of chunks. With append-only persistence the time per
+add should stay roughly flat instead of growing with the number of stored vectors.
+
+Usage:
+    python benchmarks/benchmark_vector_store_persistence.py [--uploads 2000] [--chunks 20] [--dimension 768]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from app.services.vector_store import VectorShard
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uploads", type=int, default=2000, help="Number of simulated CV uploads")
+    parser.add_argument("--chunks", type=int, default=20, help="Chunks per CV")
+    parser.add_argument("--dimension", type=int, default=768, help="Embedding dimension")
+    parser.add_argument("--report-every", type=int, default=250, help="Print timings every N uploads")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    shard = VectorShard(tempfile.mkdtemp(prefix="cvalign-shard-"))
+    shard.load()
+
+    window = []
+    print(f"{'uploads':>8} {'vectors':>9} {'ms/add (mean)':>14} {'ms/add (max)':>13}")
+    for upload in range(1, args.uploads + 1):
+        embeddings = rng.standard_normal((args.chunks, args.dimension)).astype('float32')
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+        documents = [{'text': f"chunk {i} of cv {upload}", 'metadata': {'section': 'experience', 'chunk_id': i,
+                                                                        'candidate_id': str(upload)}}
+                     for i in range(args.chunks)]
+
+        start = time.perf_counter()
+        shard.add(embeddings, documents)
+        window.append((time.perf_counter() - start) * 1000)
+
+        if upload % args.report_every == 0:
+            print(f"{upload:>8} {shard.ntotal:>9} {np.mean(window):>14.2f} {np.max(window):>13.2f}")
+            window = []
+
+    # Wait for any background compaction and check the shard reloads to the same contents
+    while shard.compacting:
+        time.sleep(0.1)
+    reloaded = VectorShard(shard.path)
+    reloaded.load()
+    print(f"Reloaded {reloaded.ntotal} vectors (expected {shard.ntotal}) at checkpoint generation {reloaded.generation}")
+
+
+if __name__ == "__main__":
+    main()
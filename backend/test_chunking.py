@@ -5,10 +5,16 @@ Test script for chunking functionality in CV-Align RAG system.
 import asyncio
 import os
 import sys
+import tempfile
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from app.services.cv_store import CVContentStore
 from app.services.document_processor import DocumentProcessor
+from app.services.embedding_cache import EmbeddingCache
+from app.services.job_embeddings import JobEmbeddingStore
+from app.services.llm_service import LLMService
 from app.services.rag_engine import RAGEngine
+from app.services.vector_store import ShardKey, ShardedVectorStore
 
 
 def test_chunking():
@@ -48,6 +54,10 @@ def test_chunking():
     Tools: Git, Jenkins, Jira
     """
     
+    # Stores live in a temporary directory, so the test doesn't write into ./database
+    directory = tempfile.mkdtemp(prefix="cvalign-test-")
+    # The processor's chunking helpers go through the shared LLM service and its default embedding cache
+    os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(directory, "embeddings.db")
     processor = DocumentProcessor()
     
     # Test basic text chunking
@@ -72,12 +82,17 @@ def test_chunking():
     
     # Test RAG engine with chunks
     print("\n3. Testing RAG engine integration...")
-    rag_engine = RAGEngine(embedding_model_name="embeddinggemma:300m", generation_model_name="gemma:4b")
+    llm_service = LLMService(embedding_model_name="embeddinggemma:300m", generation_model_name="gemma:4b",
+                             embedding_cache=EmbeddingCache(os.path.join(directory, "embeddings.db")))
+    rag_engine = RAGEngine(llm_service=llm_service,
+                           job_embedding_store=JobEmbeddingStore(os.path.join(directory, "jobs.db")),
+                           cv_store=CVContentStore(os.path.join(directory, "cvs.db")),
+                           vector_store=ShardedVectorStore(os.path.join(directory, "vectors")))
     
     # Add the chunks to the RAG engine
     rag_engine.add_cv_chunks(cv_chunks)
     print(f"Added {len(cv_chunks)} chunks to RAG engine")
-    print(f"Vector store now has {rag_engine.index.ntotal} embeddings")
+    print(f"Vector store now has {rag_engine.vector_store.get_shard(ShardKey()).ntotal} embeddings")
     
     # Test search functionality
     print("\n4. Testing search functionality...")
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Test script for the content-addressed CV store, run against a local fake Ollama HTTP server.
+
+No Ollama instance is needed.
+"""
+import os
+import sys
+import tempfile
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ["EMBEDDING_CACHE_ENABLED"] = "false"
+
+import numpy as np
+
+from test_ollama_client import FakeOllama
+
+from app.services import cv_store as cv_store_module
+from app.services.batch_pipeline import BatchEvaluationPipeline, BatchItem
+from app.services.cv_store import CVContentStore, file_hash_for_path
+from app.services.document_processor import DocumentProcessor, shutdown_extraction_pool
+from app.services.llm_service import LLMService
+from app.services.ollama_client import AsyncOllamaClient
+from app.services.rag_engine import RAGEngine
+from app.services.vector_store import ShardKey, ShardedVectorStore, candidate_id_for_text
+
+CV_TEXT = """Jane Doe
+jane@example.com
+PROFESSIONAL SUMMARY
+Backend engineer with eight years of Python
+WORK EXPERIENCE
+Led the payments team at Acme
+EDUCATION
+BSc Computer Science
+SKILLS
+Python, PostgreSQL, Kubernetes"""
+
+
+def embed_requests(server):
+    return [body for path, body in server.requests if path == "/api/embed"]
+
+
+def parse(text: str):
+    processor = DocumentProcessor()
+    return {'cv_text': text, 'cv_sections': processor.extract_cv_sections(text),
+            'candidate_info': processor.extract_candidate_info(text)}
+
+
+def test_documents_are_shared_by_normalized_text():
+    store = CVContentStore(os.path.join(tempfile.mkdtemp(), "cvs.db"))
+    parsed = parse(CV_TEXT)
+
+    assert store.get_file("pdf-hash") is None
+    assert store.put("pdf-hash", parsed) == parsed
+    assert store.get_file("pdf-hash") == parsed
+
+    # The same CV extracted from another format with different whitespace maps to the first text
+    reformatted = parse(CV_TEXT.replace("\n", "\n\n").replace("Backend engineer", "Backend   engineer"))
+    assert store.put("docx-hash", reformatted) == parsed
+    assert store.get_file("docx-hash") == parsed
+    assert store.stats()['text_hits'] == 1
+
+    # Rows written by another version are recomputed
+    cv_store_module.CV_STORE_VERSION += 1
+    try:
+        assert store.get_file("pdf-hash") is None
+        assert store.put("pdf-hash", reformatted) == reformatted
+    finally:
+        cv_store_module.CV_STORE_VERSION -= 1
+    print("✓ Files with the same normalized text share one stored parse, tied to the store version")
+
+
+def test_delete_forgets_everything_stored_for_a_cv():
+    store = CVContentStore(os.path.join(tempfile.mkdtemp(), "cvs.db"))
+    parsed = parse(CV_TEXT)
+    other = parse(CV_TEXT.replace("Jane Doe", "John Roe"))
+    store.put("pdf-hash", parsed)
+    store.put("docx-hash", parse(CV_TEXT.replace("\n", "\n\n")))
+    store.put("other-hash", other)
+    vectors = np.ones((1, 2), dtype='float32')
+    store.put_chunks(candidate_id_for_text(CV_TEXT), "model", [{'text': "Jane Doe"}], vectors)
+    store.put_chunks(candidate_id_for_text(other['cv_text']), "model", [{'text': "John Roe"}], vectors)
+
+    # Any text with the same normalized form identifies the CV
+    assert store.delete(CV_TEXT.replace("\n", "  "))
+    assert store.get_file("pdf-hash") is None and store.get_file("docx-hash") is None
+    assert store.get_text(CV_TEXT) is None
+    assert store.get_chunks(candidate_id_for_text(CV_TEXT), "model") is None
+    assert not store.delete(CV_TEXT)
+
+    assert store.get_file("other-hash") == other
+    assert store.get_chunks(candidate_id_for_text(other['cv_text']), "model") is not None
+    print("✓ Deleting a CV removes its text, candidate details, file hashes and chunk embeddings only")
+
+
+def test_repeat_uploads_are_not_embedded_again():
+    server = FakeOllama()
+    client = AsyncOllamaClient(server.url)
+    try:
+        directory = tempfile.mkdtemp(prefix="cvalign-test-")
+        store = CVContentStore(os.path.join(directory, "cvs.db"))
+        engine = RAGEngine(llm_service=LLMService(ollama_client=client), cv_store=store,
+                           vector_store=ShardedVectorStore(os.path.join(directory, "vectors")))
+        parsed = parse(CV_TEXT)
+        candidate_id = candidate_id_for_text(CV_TEXT)
+        first_job, second_job = ShardKey(company_id=1, job_id=1), ShardKey(company_id=1, job_id=2)
+
+        engine.add_cv_sections(parsed['cv_sections'], first_job, candidate_id)
+        assert len(embed_requests(server)) == 1
+        rows = engine.vector_store.get_shard(first_job).ntotal
+        assert rows > 0
+
+        # Same job: nothing is chunked, embedded or added
+        server.requests.clear()
+        engine.add_cv_sections(parsed['cv_sections'], first_job, candidate_id)
+        assert embed_requests(server) == []
+        assert engine.vector_store.get_shard(first_job).ntotal == rows
+
+        # Another job: stored chunks and embeddings are reused
+        engine.add_cv_sections_batch([(candidate_id, parsed['cv_sections']), (candidate_id, parsed['cv_sections'])],
+                                     second_job)
+        assert embed_requests(server) == []
+        first, second = engine.vector_store.get_shard(first_job), engine.vector_store.get_shard(second_job)
+        assert second.ntotal == rows
+        query = np.array([10.0, 1.0], dtype='float32') / np.linalg.norm([10.0, 1.0])
+        assert [hit['text'] for hit in first.search(query, rows)] == [hit['text'] for hit in second.search(query, rows)]
+        print(f"✓ A CV uploaded again is indexed for another job with 0 embedding calls ({rows} chunks reused)")
+    finally:
+        client.close()
+        server.close()
+
+
+def test_batch_reuses_parsed_files():
+    server = FakeOllama()
+    client = AsyncOllamaClient(server.url)
+    directory = tempfile.mkdtemp()
+    try:
+        store = CVContentStore(os.path.join(directory, "cvs.db"))
+        engine = RAGEngine(llm_service=LLMService(ollama_client=client), cv_store=store,
+                           vector_store=ShardedVectorStore(os.path.join(directory, "vectors")))
+        pipeline = BatchEvaluationPipeline(engine, DocumentProcessor())
+
+        def write(name: str, text: str) -> BatchItem:
+            file_path = os.path.join(directory, name)
+            with open(file_path, "w", encoding="utf-8") as f:
+                f.write(text)
+            return BatchItem(file_path=file_path, filename=name)
+
+        first = pipeline._extract([write("jane.txt", CV_TEXT)], lambda item, stage: None, None)
+        assert store.stats()['file_hits'] == 0
+
+        # Same bytes under another name, and the same text with other spacing
+        again = pipeline._extract([write("jane (1).txt", CV_TEXT), write("jane.v2.txt", CV_TEXT.replace(" ", "  "))],
+                                  lambda item, stage: None, None)
+        assert store.stats()['file_hits'] == 1 and store.stats()['text_hits'] == 1
+        assert {item.candidate_id for item in again} == {first[0].candidate_id}
+        assert again[1].file_hash == file_hash_for_path(again[1].file_path, again[1].filename)
+        print("✓ Batch uploads skip parsing for known files and map reformatted copies to the same candidate")
+    finally:
+        shutdown_extraction_pool()
+        client.close()
+        server.close()
+
+
+def test_concurrent_uploads_index_a_cv_once():
+    # Slow embeddings let every upload pass the early check before any of them is indexed
+    server = FakeOllama(latency=0.2)
+    client = AsyncOllamaClient(server.url)
+    try:
+        directory = tempfile.mkdtemp(prefix="cvalign-test-")
+        engine = RAGEngine(llm_service=LLMService(ollama_client=client),
+                           cv_store=CVContentStore(os.path.join(directory, "cvs.db")),
+                           vector_store=ShardedVectorStore(os.path.join(directory, "vectors")))
+        parsed = parse(CV_TEXT)
+        candidate_id = candidate_id_for_text(CV_TEXT)
+        job = ShardKey(company_id=1, job_id=1)
+        chunks = len(engine.llm_service.split_cv_sections(parsed['cv_sections']))
+
+        barrier = threading.Barrier(4)
+
+        def upload():
+            barrier.wait()
+            engine.add_cv_sections(parsed['cv_sections'], job, candidate_id)
+
+        threads = [threading.Thread(target=upload) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert engine.vector_store.get_shard(job).ntotal == chunks, engine.vector_store.get_shard(job).ntotal
+        print(f"✓ Four concurrent uploads of the same CV indexed its {chunks} chunks once")
+    finally:
+        client.close()
+        server.close()
+
+
+def main():
+    print("Testing CV content store...")
+    test_documents_are_shared_by_normalized_text()
+    test_delete_forgets_everything_stored_for_a_cv()
+    test_repeat_uploads_are_not_embedded_again()
+    test_concurrent_uploads_index_a_cv_once()
+    test_batch_reuses_parsed_files()
+    print("\nCV content store test completed successfully!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test script for the two-tier embedding cache (in-memory LRU in front of SQLite).
+
+No Ollama instance is needed.
+"""
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.embedding_cache import EmbeddingCache
+
+
+def key(i: int) -> str:
+    return EmbeddingCache.make_key("embeddinggemma:300m", "document", f"text {i}")
+
+
+def vector(i: int):
+    return [float(i), 0.5]
+
+
+def test_hit_and_miss_counters():
+    cache = EmbeddingCache(os.path.join(tempfile.mkdtemp(), "embeddings.db"))
+    cache.put_many([(key(i), vector(i)) for i in range(3)])
+
+    found = cache.get_many([key(0), key(1), key(5), key(0)])
+    assert found == {key(0): vector(0), key(1): vector(1)}
+    # Duplicate keys in one lookup are counted once
+    assert cache.stats() == {'hits': 2, 'memory_hits': 2, 'disk_hits': 0, 'misses': 1,
+                             'memory_entries': 3, 'disk_entries': 3}
+    assert EmbeddingCache.make_key("m", "query", "a  b\n") == EmbeddingCache.make_key("m", "query", "a b")
+    assert EmbeddingCache.make_key("m", "query", "a b") != EmbeddingCache.make_key("m", "document", "a b")
+    print("✓ Hits and misses are counted per distinct key")
+
+
+def test_memory_lru_falls_back_to_disk():
+    cache = EmbeddingCache(os.path.join(tempfile.mkdtemp(), "embeddings.db"), max_memory_entries=2)
+    cache.put_many([(key(0), vector(0)), (key(1), vector(1))])
+    cache.get_many([key(0)])
+    cache.put_many([(key(2), vector(2))])
+
+    # key(1) was least recently used, so it is only on disk now
+    assert cache.get_many([key(0), key(2)]) == {key(0): vector(0), key(2): vector(2)}
+    assert cache.disk_hits == 0
+    assert cache.get_many([key(1)]) == {key(1): vector(1)}
+    assert cache.disk_hits == 1 and cache.stats()['memory_entries'] == 2
+    print("✓ Least recently used entries leave memory but are still served from disk")
+
+
+def test_persists_across_instances():
+    path = os.path.join(tempfile.mkdtemp(), "embeddings.db")
+    EmbeddingCache(path).put_many([(key(i), vector(i)) for i in range(4)])
+
+    reopened = EmbeddingCache(path)
+    assert reopened.get_many([key(i) for i in range(4)]) == {key(i): vector(i) for i in range(4)}
+    assert reopened.disk_hits == 4 and reopened.memory_hits == 0
+    assert reopened.stats()['disk_entries'] == 4
+    print("✓ Embeddings written by one instance are served to the next from disk")
+
+
+def test_disk_entries_are_capped():
+    path = os.path.join(tempfile.mkdtemp(), "embeddings.db")
+    cache = EmbeddingCache(path, max_memory_entries=1, max_disk_entries=5)
+    for start in range(0, 8, 2):
+        cache.put_many([(key(i), vector(i)) for i in range(start, start + 2)])
+    # Re-putting a stored key neither grows nor refreshes the store
+    cache.put_many([(key(7), vector(7))])
+    assert cache.stats()['disk_entries'] == 5
+
+    reopened = EmbeddingCache(path, max_disk_entries=5)
+    assert set(reopened.get_many([key(i) for i in range(8)])) == {key(i) for i in range(3, 8)}
+    assert reopened.stats()['disk_entries'] == 5
+    print("✓ The SQLite store keeps the 5 most recently written embeddings (limit 5)")
+
+
+def main():
+    print("Testing embedding cache...")
+    test_hit_and_miss_counters()
+    test_memory_lru_falls_back_to_disk()
+    test_persists_across_instances()
+    test_disk_entries_are_capped()
+    print("\nEmbedding cache test completed successfully!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test script for company and job evaluation weights and re-ranking stored evaluations.
+
+Runs on an in-memory SQLite table shaped like the evaluations table; no Ollama instance is needed.
+"""
+import os
+import sys
+import json
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from sqlalchemy import Column, Float, Index, Integer, create_engine, text
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from app.services.evaluation_weights import (DEFAULT_WEIGHTS, EvaluationWeights, job_weight_overrides,
+                                             settings_with_weights, weights_from_settings)
+
+Base = declarative_base()
+
+
+class Evaluation(Base):
+    __tablename__ = "evaluations"
+    id = Column(Integer, primary_key=True)
+    job_id = Column(Integer, index=True)
+    overall_score = Column(Float)
+    skills_score = Column(Float)
+    experience_score = Column(Float)
+    education_score = Column(Float)
+
+
+def test_weights_from_settings():
+    # As stored by init_db
+    settings = '{"evaluation_weights": {"skills": 0.4, "experience": 0.4, "education": 0.2}}'
+    assert weights_from_settings(settings) == DEFAULT_WEIGHTS
+    assert weights_from_settings(None) == DEFAULT_WEIGHTS
+    assert weights_from_settings("not json") == DEFAULT_WEIGHTS
+
+    weights = EvaluationWeights.from_dict({"skills": 3, "experience": 1})
+    assert weights == EvaluationWeights(skills=0.75, experience=0.25, education=0.0)
+    for invalid in ({"skills": -1, "education": 2}, {"skills": 0}, {"leadership": 1}):
+        try:
+            EvaluationWeights.from_dict(invalid)
+        except ValueError:
+            continue
+        raise AssertionError(f"{invalid} should be rejected")
+
+    settings = settings_with_weights(settings, weights, job_id=7)
+    assert weights_from_settings(settings, 7) == weights
+    assert weights_from_settings(settings, 8) == DEFAULT_WEIGHTS
+    assert job_weight_overrides(settings) == {7: weights.to_dict()}
+    settings = settings_with_weights(settings, None, job_id=7)
+    assert weights_from_settings(settings, 7) == DEFAULT_WEIGHTS
+    assert json.loads(settings)["evaluation_weights"] == DEFAULT_WEIGHTS.to_dict()
+
+    # Hand-edited or corrupted settings fall back instead of raising
+    for malformed in ({"job_evaluation_weights": ["7"]}, {"job_evaluation_weights": "7"},
+                      {"job_evaluation_weights": {"7": [0.5, 0.5], "job-8": {"skills": 1}}}):
+        assert weights_from_settings(json.dumps(malformed), 7) == DEFAULT_WEIGHTS
+        assert job_weight_overrides(json.dumps(malformed)) == {}
+        assert weights_from_settings(settings_with_weights(json.dumps(malformed), weights, job_id=7), 7) == weights
+    print("✓ Weights resolve from the job override, then the company settings, then the defaults")
+
+
+def test_non_finite_weights_are_rejected():
+    # FastAPI's JSON parser accepts NaN and Infinity in request bodies
+    for invalid in ({"skills": float("nan"), "experience": 1}, {"skills": float("inf")},
+                    {"skills": 1e308, "experience": 1e308}):
+        try:
+            EvaluationWeights.from_dict(invalid)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"{invalid} should be rejected")
+        assert weights_from_settings(json.dumps({"evaluation_weights": invalid})) == DEFAULT_WEIGHTS
+    print("✓ NaN, infinite and overflowing weights are rejected")
+
+
+def test_single_update_rerank():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    Index("ix_evaluations_job_id_overall_score", Evaluation.job_id, Evaluation.overall_score).create(
+        bind=engine, checkfirst=True
+    )
+    session = sessionmaker(bind=engine)()
+
+    rng = np.random.default_rng(0)
+    count = 20000
+    scores = np.round(rng.uniform(0, 100, (count, 3)), 1)
+    session.bulk_insert_mappings(Evaluation, [
+        {'job_id': i % 20, 'skills_score': s, 'experience_score': e, 'education_score': d,
+         'overall_score': DEFAULT_WEIGHTS.overall_score(s, e, d)}
+        for i, (s, e, d) in enumerate(scores.tolist())
+    ])
+    session.commit()
+
+    weights = EvaluationWeights.from_dict({"skills": 0.2, "experience": 0.3, "education": 0.5})
+    start = time.perf_counter()
+    updated = session.query(Evaluation).filter(Evaluation.job_id.in_(list(range(10)))).update(
+        {Evaluation.overall_score: weights.score_expression(
+            Evaluation.skills_score, Evaluation.experience_score, Evaluation.education_score
+        )},
+        synchronize_session=False
+    )
+    session.commit()
+    elapsed = (time.perf_counter() - start) * 1000
+    assert updated == count // 2
+
+    # Same scores as computing them in Python when the evaluation is saved, up to how ties are rounded
+    for evaluation in session.query(Evaluation).all():
+        chosen = weights if evaluation.job_id < 10 else DEFAULT_WEIGHTS
+        expected = chosen.overall_score(evaluation.skills_score, evaluation.experience_score,
+                                        evaluation.education_score)
+        assert abs(evaluation.overall_score - expected) < 0.1 + 1e-9, (evaluation.id, evaluation.overall_score, expected)
+
+    ranking = session.query(Evaluation).filter(Evaluation.job_id == 3).order_by(Evaluation.overall_score.desc())
+    overall = [evaluation.overall_score for evaluation in ranking]
+    assert overall == sorted(overall, reverse=True)
+
+    with engine.connect() as connection:
+        plan = " ".join(str(row[-1]) for row in connection.execute(
+            text("EXPLAIN QUERY PLAN " + str(ranking.statement.compile(compile_kwargs={"literal_binds": True})))
+        ))
+    assert "ix_evaluations_job_id_overall_score" in plan and "TEMP B-TREE" not in plan, plan
+    print(f"✓ Re-ranked {updated} evaluations in one UPDATE in {elapsed:.1f} ms; "
+          f"the job ranking is an index scan without sorting")
+
+
+def main():
+    print("Testing evaluation weights...")
+    test_weights_from_settings()
+    test_non_finite_weights_are_rejected()
+    test_single_update_rerank()
+    print("\nEvaluation weights test completed successfully!")
+
+
+if __name__ == "__main__":
+    main()
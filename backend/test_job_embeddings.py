@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test script for precomputed job embeddings, run against a local fake Ollama HTTP server.
+
+No Ollama instance is needed.
+"""
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ["EMBEDDING_CACHE_ENABLED"] = "false"
+
+from test_ollama_client import FakeOllama
+
+from app.services.cv_store import CVContentStore
+from app.services.job_embeddings import JobEmbeddingStore, refresh_job_embeddings
+from app.services.llm_service import LLMService
+from app.services.ollama_client import AsyncOllamaClient
+from app.services.rag_engine import RAGEngine
+from app.services.vector_store import ShardKey, ShardedVectorStore
+
+JOB_DESCRIPTION = "Backend engineer for the hiring platform"
+JOB_REQUIREMENTS = "Python, PostgreSQL, 5+ years"
+
+
+def embed_requests(server):
+    return [body for path, body in server.requests if path == "/api/embed"]
+
+
+def test_store_versioning():
+    server = FakeOllama()
+    client = AsyncOllamaClient(server.url)
+    try:
+        store = JobEmbeddingStore(os.path.join(tempfile.mkdtemp(), "jobs.db"))
+        service = LLMService(ollama_client=client)
+
+        refresh_job_embeddings(7, JOB_DESCRIPTION, JOB_REQUIREMENTS, service, store)
+        assert len(embed_requests(server)) == 1, "both job queries should be embedded in one call"
+
+        assert store.get(7, service.embedding_model_name, JOB_DESCRIPTION, JOB_REQUIREMENTS) is not None
+        assert store.get(7, "other-model", JOB_DESCRIPTION, JOB_REQUIREMENTS) is None
+        assert store.get(7, service.embedding_model_name, JOB_DESCRIPTION, "Go, 2+ years") is None
+        store.invalidate(7)
+        assert store.get(7, service.embedding_model_name, JOB_DESCRIPTION, JOB_REQUIREMENTS) is None
+        print("✓ Job embeddings are tied to the model and job texts, and invalidated per job")
+    finally:
+        client.close()
+        server.close()
+
+
+def test_evaluation_makes_no_query_embedding_calls():
+    server = FakeOllama()
+    client = AsyncOllamaClient(server.url)
+    try:
+        directory = tempfile.mkdtemp(prefix="cvalign-test-")
+        store = JobEmbeddingStore(os.path.join(directory, "jobs.db"))
+        service = LLMService(ollama_client=client)
+        engine = RAGEngine(llm_service=service, job_embedding_store=store,
+                           cv_store=CVContentStore(os.path.join(directory, "cvs.db")),
+                           vector_store=ShardedVectorStore(os.path.join(directory, "vectors")))
+        partition = ShardKey(company_id=1, job_id=7)
+        cv_sections = {'skills': 'Python, Django', 'experience': '6 years backend', 'education': 'BSc CS'}
+
+        refresh_job_embeddings(7, JOB_DESCRIPTION, JOB_REQUIREMENTS, service, store)
+        engine.add_cv_chunks(service.split_cv_sections(cv_sections), partition, candidate_id="c1")
+
+        server.requests.clear()
+        engine.evaluate_cv_with_rag_context(cv_sections, JOB_DESCRIPTION, JOB_REQUIREMENTS, partition,
+                                            candidate_id="c1", use_cache=False)
+        assert embed_requests(server) == [], embed_requests(server)
+
+        # A stale row (edited job) is recomputed once, then reused
+        server.requests.clear()
+        for _ in range(2):
+            engine.evaluate_cv_with_rag_context(cv_sections, JOB_DESCRIPTION, "Go, 2+ years", partition,
+                                                candidate_id="c1", use_cache=False)
+        assert len(embed_requests(server)) == 1
+        print("✓ Uploads for a job with stored embeddings make no query embedding calls")
+    finally:
+        client.close()
+        server.close()
+
+
+def main():
+    print("Testing precomputed job embeddings against a fake server...")
+    test_store_versioning()
+    test_evaluation_makes_no_query_embedding_calls()
+    print("\nJob embeddings test completed successfully!")
+
+
+if __name__ == "__main__":
+    main()
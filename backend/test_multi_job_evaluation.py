@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Test script for evaluating a stored CV against several jobs, run against a local fake Ollama HTTP server.
+
+No Ollama instance is needed.
+"""
+import os
+import sys
+import asyncio
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from test_ollama_client import FakeOllama
+from test_cv_store import CV_TEXT, embed_requests, parse
+
+from app.services.batch_pipeline import JobTarget, MultiJobEvaluationPipeline
+from app.services.cv_store import CVContentStore
+from app.services.job_embeddings import JobEmbeddingStore, refresh_job_embeddings
+from app.services.llm_service import LLMService
+from app.services.ollama_client import AsyncOllamaClient
+from app.services.rag_engine import RAGEngine
+from app.services.vector_store import ShardKey, ShardedVectorStore, candidate_id_for_text
+
+JOBS = {
+    1: ("Backend engineer for the hiring platform", "Python, PostgreSQL, 5+ years"),
+    2: ("Data engineer for the analytics team", "Spark, Airflow, Python"),
+    3: ("Platform engineer", "Kubernetes, Terraform, AWS"),
+    4: ("Engineering manager", "Led teams of 5+, hiring, Python background"),
+}
+
+
+def generate_requests(server):
+    return [body for path, body in server.requests if path == "/api/generate"]
+
+
+def make_engine(client, max_llm_concurrency: int = 4) -> RAGEngine:
+    """
+    Engine whose vector, job embedding and CV stores are private to it, so no state leaks between tests.
+    """
+    directory = tempfile.mkdtemp(prefix="cvalign-test-")
+    service = LLMService(ollama_client=client)
+    engine = RAGEngine(llm_service=service, max_llm_concurrency=max_llm_concurrency,
+                       job_embedding_store=JobEmbeddingStore(os.path.join(directory, "jobs.db")),
+                       cv_store=CVContentStore(os.path.join(directory, "cvs.db")),
+                       vector_store=ShardedVectorStore(os.path.join(directory, "vectors")))
+    for job_id, (description, requirements) in JOBS.items():
+        refresh_job_embeddings(job_id, description, requirements, service, engine.job_embedding_store)
+    return engine
+
+
+def test_extra_jobs_cost_only_generations():
+    server = FakeOllama(latency=0.02)
+    client = AsyncOllamaClient(server.url)
+    try:
+        engine = make_engine(client, max_llm_concurrency=3)
+        parsed = parse(CV_TEXT)
+        candidate_id = candidate_id_for_text(CV_TEXT)
+        engine.add_cv_sections(parsed['cv_sections'], ShardKey(company_id=1, job_id=1), candidate_id)
+
+        server.requests.clear()
+        server.max_active = 0
+        targets = [JobTarget(job_id, *JOBS[job_id]) for job_id in (2, 3, 4)]
+        scored = []
+        MultiJobEvaluationPipeline(engine).run(parsed['cv_sections'], candidate_id, 1, targets,
+                                               on_scored=scored.append, use_cache=False)
+
+        assert all(target.result is not None and target.error is None for target in targets), targets
+        assert len(scored) == 3
+        assert embed_requests(server) == [], "stored chunk and job embeddings should be reused"
+        # Per-section mode: three scores and one feedback generation per job
+        assert len(generate_requests(server)) == 4 * len(targets)
+        assert server.max_active <= 3, server.max_active
+        for target in targets:
+            assert engine.vector_store.get_shard(ShardKey(company_id=1, job_id=target.job_id)).has_candidate(candidate_id)
+        print(f"✓ 3 extra jobs made 0 embedding calls and {len(generate_requests(server))} generations, "
+              f"at most {server.max_active} in flight (limit 3)")
+    finally:
+        client.close()
+        server.close()
+
+
+def test_async_scoring_awaits_generations():
+    server = FakeOllama(latency=0.3)
+    client = AsyncOllamaClient(server.url)
+    try:
+        engine = make_engine(client, max_llm_concurrency=8)
+        parsed = parse(CV_TEXT)
+        candidate_id = candidate_id_for_text(CV_TEXT)
+        partition = ShardKey(company_id=1, job_id=1)
+        engine.add_cv_sections(parsed['cv_sections'], partition, candidate_id)
+
+        blocking_calls = []
+        engine.llm_service.generate_text = lambda *args, **kwargs: blocking_calls.append(args)
+
+        async def evaluate_all():
+            semaphore = asyncio.Semaphore(8)
+            evaluations = []
+            for job_id in (1, 2):
+                rag_context = engine._retrieve_rag_context(parsed['cv_sections'], *JOBS[job_id], partition,
+                                                           candidate_id)
+                evaluations.append(engine.score_with_context_async(parsed['cv_sections'], *JOBS[job_id],
+                                                                   rag_context, semaphore, use_cache=False))
+            return await asyncio.gather(*evaluations)
+
+        server.requests.clear()
+        server.max_active = 0
+        results = asyncio.run(evaluate_all())
+        assert len(results) == 2 and blocking_calls == []
+        # Two jobs, four generations each, in flight together instead of one per worker thread;
+        # how many overlap exactly depends on timing, but never more than the semaphore allows
+        assert len(generate_requests(server)) == 8
+        assert 4 < server.max_active <= 8, server.max_active
+        print(f"✓ Async scoring awaited {len(generate_requests(server))} generations, "
+              f"{server.max_active} in flight at once")
+    finally:
+        client.close()
+        server.close()
+
+
+def test_batched_retrieval_matches_per_job_retrieval():
+    server = FakeOllama()
+    client = AsyncOllamaClient(server.url)
+    try:
+        engine = make_engine(client)
+        parsed = parse(CV_TEXT)
+        candidate_id = candidate_id_for_text(CV_TEXT)
+        jobs = [(ShardKey(company_id=1, job_id=job_id), *JOBS[job_id]) for job_id in JOBS]
+        for partition, _, _ in jobs:
+            engine.add_cv_sections(parsed['cv_sections'], partition, candidate_id)
+
+        batched = engine.retrieve_rag_contexts(parsed['cv_sections'], jobs, candidate_id)
+        separate = [engine._retrieve_rag_context(parsed['cv_sections'], description, requirements, partition,
+                                                 candidate_id)
+                    for partition, description, requirements in jobs]
+        assert batched == separate
+        print(f"✓ One batched search returns the same context as {len(jobs)} per-job searches")
+    finally:
+        client.close()
+        server.close()
+
+
+def test_batched_retrieval_without_a_shared_shard():
+    server = FakeOllama()
+    client = AsyncOllamaClient(server.url)
+    try:
+        engine = make_engine(client)
+        parsed = parse(CV_TEXT)
+        candidate_id = candidate_id_for_text(CV_TEXT)
+        jobs = [(ShardKey(company_id=1, job_id=job_id), *JOBS[job_id]) for job_id in JOBS]
+        # The first job's shard doesn't hold the candidate; the others do
+        for partition, _, _ in jobs[1:]:
+            engine.add_cv_sections(parsed['cv_sections'], partition, candidate_id)
+        other = parse(CV_TEXT.replace("Jane Doe", "John Roe").replace("payments", "billing"))
+        for partition, _, _ in jobs:
+            engine.add_cv_sections(other['cv_sections'], partition, candidate_id_for_text(other['cv_text']))
+
+        for candidate in (candidate_id, None):
+            batched = engine.retrieve_rag_contexts(parsed['cv_sections'], jobs, candidate)
+            separate = [engine._retrieve_rag_context(parsed['cv_sections'], description, requirements, partition,
+                                                     candidate)
+                        for partition, description, requirements in jobs]
+            assert batched == separate, candidate
+        # Unfiltered, job 1's shard only holds the other CV
+        assert "billing" in batched[0][2] and "payments" in batched[1][2], batched
+
+        try:
+            engine.retrieve_rag_contexts(parsed['cv_sections'], [jobs[0], (ShardKey(company_id=2, job_id=9),
+                                                                           *JOBS[2])], candidate_id)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("jobs of different companies should be rejected")
+        print("✓ Batched retrieval searches each job's shard when one lacks the candidate; "
+              "jobs of different companies are rejected")
+    finally:
+        client.close()
+        server.close()
+
+
+def main():
+    print("Testing multi-job evaluation...")
+    test_extra_jobs_cost_only_generations()
+    test_async_scoring_awaits_generations()
+    test_batched_retrieval_matches_per_job_retrieval()
+    test_batched_retrieval_without_a_shared_shard()
+    print("\nMulti-job evaluation test completed successfully!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Test script for the async Ollama client layer, run against a local fake Ollama HTTP server.
+
+No Ollama instance is needed.
+"""
+import asyncio
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+# Exercise the client itself, not the embedding cache in front of it
+os.environ["EMBEDDING_CACHE_ENABLED"] = "false"
+
+import ollama
+
+from app.services.job_session import JobEvaluationSession
+from app.services.llm_service import LLMService
+from app.services.ollama_client import AsyncOllamaClient
+
+
+class FakeOllama:
+    """Minimal /api/embed and /api/generate server with configurable latency and failures."""
+
+    def __init__(self, latency: float = 0.0, failures: int = 0, failure_status: int = 503):
+        self.latency = latency
+        self.failures = failures
+        self.failure_status = failure_status
+        self.requests = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                status, payload = fake.handle(self.path, body)
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        # The default listen backlog of 5 would hold back bursts of concurrent connections
+        server_class = type("Server", (ThreadingHTTPServer,), {"request_queue_size": 64})
+        self.server = server_class(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def handle(self, path, body):
+        with self._lock:
+            self.requests.append((path, body))
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            fail = self.failures > 0
+            if fail:
+                self.failures -= 1
+        try:
+            time.sleep(self.latency)
+            if fail:
+                return self.failure_status, {"error": "temporarily unavailable"}
+            if path == "/api/embed":
+                # Encode the text length so callers can check which input each vector belongs to
+                return 200, {"model": body["model"], "embeddings": [[float(len(text)), 1.0] for text in body["input"]]}
+            # Context stands in for the tokens of the exchange: earlier context plus this prompt
+            context = list(body.get("context") or []) + [len(body["prompt"])]
+            return 200, {"model": body["model"], "response": f"echo: {body['prompt']}", "done": True,
+                         "context": context}
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def test_round_trip_and_prefixes():
+    server = FakeOllama()
+    client = AsyncOllamaClient(server.url)
+    try:
+        service = LLMService(ollama_client=client)
+
+        assert service.generate_text("hello", use_cache=False) == "echo: hello"
+        assert service.embed_documents(["abc", "de"]) == [[len("passage: abc"), 1.0], [len("passage: de"), 1.0]]
+        assert service.embed_query("xyz") == [len("query: xyz"), 1.0]
+        assert server.requests[1] == ("/api/embed", {"model": "embeddinggemma:300m", "input": ["passage: abc", "passage: de"]})
+        print("✓ Generation and batched embeddings round-trip with the LangChain instruction prefixes")
+    finally:
+        client.close()
+        server.close()
+
+
+def test_identical_requests_are_coalesced():
+    server = FakeOllama(latency=0.2)
+    client = AsyncOllamaClient(server.url)
+    try:
+        with ThreadPoolExecutor(max_workers=10) as pool:
+            results = list(pool.map(lambda _: client.embed("m", ["query: senior python engineer"]), range(10)))
+
+        assert all(result == results[0] for result in results)
+        assert len(server.requests) == 1, server.requests
+        assert client.stats()['requests_coalesced'] == 9
+        print("✓ 10 concurrent identical query embeddings sent 1 request")
+    finally:
+        client.close()
+        server.close()
+
+
+def test_in_flight_limit():
+    server = FakeOllama(latency=0.05)
+    client = AsyncOllamaClient(server.url, max_in_flight=3)
+    try:
+        with ThreadPoolExecutor(max_workers=12) as pool:
+            list(pool.map(lambda i: client.generate("m", f"prompt {i}"), range(12)))
+
+        assert len(server.requests) == 12
+        assert server.max_active <= 3, server.max_active
+        print(f"✓ 12 distinct generations ran with at most {server.max_active} in flight (limit 3)")
+    finally:
+        client.close()
+        server.close()
+
+
+def test_retries_with_backoff():
+    server = FakeOllama(failures=2)
+    client = AsyncOllamaClient(server.url, max_retries=3, retry_backoff=0.01)
+    try:
+        assert client.generate("m", "retry me") == "echo: retry me"
+        assert client.stats()['retries'] == 2
+        assert len(server.requests) == 3
+        print("✓ Two 503 responses were retried before succeeding")
+    finally:
+        client.close()
+        server.close()
+
+
+def test_non_retryable_errors_fail_fast():
+    server = FakeOllama(failures=5, failure_status=404)
+    client = AsyncOllamaClient(server.url, max_retries=3, retry_backoff=0.01)
+    try:
+        try:
+            client.generate("missing-model", "hello")
+            raise AssertionError("expected ResponseError")
+        except ollama.ResponseError as e:
+            assert e.status_code == 404
+        assert len(server.requests) == 1
+        print("✓ 404 responses are not retried")
+    finally:
+        client.close()
+        server.close()
+
+
+def test_connection_errors_are_retried_then_raised():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    client = AsyncOllamaClient(f"http://127.0.0.1:{port}", max_retries=2, retry_backoff=0.01)
+    try:
+        try:
+            client.embed("m", ["text"])
+            raise AssertionError("expected ConnectionError")
+        except ConnectionError:
+            pass
+        assert client.stats()['retries'] == 2
+        print("✓ Connection failures are retried, then surfaced")
+    finally:
+        client.close()
+
+
+def test_async_api_from_other_event_loops():
+    server = FakeOllama(latency=0.1)
+    client = AsyncOllamaClient(server.url)
+    try:
+        async def worker(i):
+            return await client.generate_async("m", "shared prompt" if i % 2 else f"prompt {i}")
+
+        async def run():
+            return await asyncio.gather(*(worker(i) for i in range(6)))
+
+        results = asyncio.run(run())
+        results += asyncio.run(run())
+        assert results[1] == "echo: shared prompt"
+        print(f"✓ Awaitable API works from separate event loops ({len(server.requests)} requests for 12 calls)")
+    finally:
+        client.close()
+        server.close()
+
+
+def test_job_session_reuses_context():
+    server = FakeOllama()
+    client = AsyncOllamaClient(server.url)
+    try:
+        service = LLMService(ollama_client=client)
+        session = JobEvaluationSession(service, "Backend engineer", "Python, PostgreSQL", keep_alive="10m")
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(lambda i: session.generate("skills_evaluation", False, cv_skills=f"skills {i}"), range(4)))
+
+        generations = [body for path, body in server.requests if path == "/api/generate"]
+        briefing, candidates = generations[0], generations[1:]
+        assert "Backend engineer" in briefing["prompt"] and "context" not in briefing
+        assert len(candidates) == 4
+        assert all(body["context"] == session.context and body["keep_alive"] == "10m" for body in candidates)
+        assert all("Backend engineer" not in body["prompt"] for body in candidates)
+        print("✓ Job briefing was sent once and its context reused for 4 candidates")
+    finally:
+        client.close()
+        server.close()
+
+
+def main():
+    print("Testing async Ollama client against a fake server...")
+    test_round_trip_and_prefixes()
+    test_identical_requests_are_coalesced()
+    test_in_flight_limit()
+    test_retries_with_backoff()
+    test_non_retryable_errors_fail_fast()
+    test_connection_errors_are_retried_then_raised()
+    test_async_api_from_other_event_loops()
+    test_job_session_reuses_context()
+    print("\nAsync Ollama client test completed successfully!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test script for the embedding pre-screen cascade of batch uploads, run against a local fake Ollama HTTP server.
+
+No Ollama instance is needed.
+"""
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from test_ollama_client import FakeOllama
+from test_multi_job_evaluation import JOBS, generate_requests, make_engine
+from test_cv_store import CV_TEXT, embed_requests
+
+from app.services.batch_pipeline import BatchEvaluationPipeline, BatchItem
+from app.services.document_processor import DocumentProcessor, shutdown_extraction_pool
+from app.services.ollama_client import AsyncOllamaClient
+from app.services.prescreen import PrescreenPolicy, ProvisionalEvaluationStore
+from app.services.vector_store import ShardKey, VectorShard
+
+DIMENSION = 16
+SECTIONS = ['skills', 'experience', 'education', 'summary']
+
+
+def test_candidate_section_scores_match_brute_force():
+    rng = np.random.default_rng(0)
+    shard = VectorShard(tempfile.mkdtemp())
+    shard.load()
+    documents = [{'text': f"c{c} chunk {j}", 'metadata': {'section': SECTIONS[(c + j) % 4], 'candidate_id': f"c{c}"}}
+                 for c in range(30) for j in range(int(rng.integers(1, 6)))]
+    vectors = rng.standard_normal((len(documents), DIMENSION)).astype('float32')
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    # Half in the checkpoint, half in the tail, and one candidate deleted
+    half = len(documents) // 2
+    shard.add(vectors[:half], documents[:half])
+    shard.compact()
+    shard.add(vectors[half:], documents[half:])
+    shard.delete(["c3"])
+
+    queries = rng.standard_normal((3, DIMENSION)).astype('float32')
+    candidates = [f"c{c}" for c in (5, 3, 29, 0, 17, 99)]
+    scores = shard.candidate_section_scores(queries, ['skills', 'experience', 'education'], candidates)
+
+    for i, candidate_id in enumerate(candidates):
+        for j, section in enumerate(['skills', 'experience', 'education']):
+            rows = [r for r, document in enumerate(documents)
+                    if document['metadata'] == {'section': section, 'candidate_id': candidate_id}
+                    and candidate_id != "c3"]
+            expected = max(float(vectors[r] @ queries[j]) for r in rows) if rows else None
+            if expected is None:
+                assert np.isnan(scores[i, j]), (candidate_id, section, scores[i, j])
+            else:
+                assert abs(scores[i, j] - expected) < 1e-5, (candidate_id, section, scores[i, j], expected)
+    print("✓ Per-candidate section scores match a brute-force scan, across checkpoint, tail and deletions")
+
+
+def test_policy_selection():
+    scores = [40.0, 90.0, 75.0, 75.0, 10.0]
+    assert PrescreenPolicy(top_n=2).select(scores) == {1, 2}
+    assert PrescreenPolicy(threshold=70).select(scores) == {1, 2, 3}
+    assert PrescreenPolicy(top_n=1, threshold=95).select(scores) == set()
+    assert PrescreenPolicy().select(scores) == {0, 1, 2, 3, 4}
+    print("✓ Policies keep the top N, those above the threshold, or the top N above it")
+
+
+def test_provisional_store():
+    store = ProvisionalEvaluationStore(os.path.join(tempfile.mkdtemp(), "prescreen.db"))
+    store.add(1, 7, 42.0)
+    store.add(2, 7, 61.5)
+    store.add(3, 8, 50.0)
+    assert store.list_job(7) == [{'evaluation_id': 2, 'prescreen_score': 61.5}, {'evaluation_id': 1, 'prescreen_score': 42.0}]
+    store.remove(2)
+    assert not store.is_provisional(2) and store.is_provisional(1)
+    store.remove_job(7)
+    assert store.list_job(7) == [] and store.is_provisional(3)
+    print("✓ Provisional evaluations are listed per job, best first, until promoted or deleted")
+
+
+def test_cascade_only_llm_scores_selected_cvs():
+    server = FakeOllama()
+    client = AsyncOllamaClient(server.url)
+    directory = tempfile.mkdtemp()
+    try:
+        # make_engine gives the engine its own vector store, so the shard holds only this batch
+        engine = make_engine(client)
+        pipeline = BatchEvaluationPipeline(engine, DocumentProcessor())
+        items = []
+        for i in range(12):
+            # Different lengths give different fake embeddings, hence different pre-screen scores
+            text = CV_TEXT.replace("Python, PostgreSQL, Kubernetes", ", ".join(["Python"] * (i + 1)))
+            # Unique sections, so no two generation requests are coalesced by the client
+            text = text.replace("at Acme", f"at Acme {i}").replace("Computer Science", f"Computer Science {i}")
+            file_path = os.path.join(directory, f"cv{i}.txt")
+            with open(file_path, "w", encoding="utf-8") as f:
+                f.write(text.replace("Jane Doe", f"Candidate {i}"))
+            items.append(BatchItem(file_path=file_path, filename=f"cv{i}.txt"))
+
+        server.requests.clear()
+        scored = []
+        partition = ShardKey(company_id=1, job_id=1)
+        pipeline.run(items, partition, *JOBS[1], on_scored=scored.append, use_cache=False,
+                     prescreen=PrescreenPolicy(top_n=3))
+
+        assert len(scored) == 12 and all(item.error is None for item in items)
+        full = [item for item in items if not item.provisional]
+        provisional = [item for item in items if item.provisional]
+        assert len(full) == 3 and len(provisional) == 9
+        # Per-section mode: three scores and one feedback generation per fully evaluated CV
+        assert len(generate_requests(server)) == 4 * 3
+        # Only the batch's chunks are embedded, once; pre-screening adds no embedding calls
+        embedded = sum(len(body["input"]) for body in embed_requests(server))
+        assert embedded == engine.vector_store.get_shard(partition).ntotal, embedded
+
+        prescreened = engine.prescreen(partition, *JOBS[1], [(item.candidate_id, item.cv_sections) for item in items])
+        ranking = sorted(range(12), key=lambda i: -prescreened[i].overall_score)
+        assert {id(items[i]) for i in ranking[:3]} == {id(item) for item in full}
+        assert all(item.result.feedback.startswith("Provisional") for item in provisional)
+        print(f"✓ A batch of 12 with top_n=3 made {len(generate_requests(server))} generations "
+              f"instead of {4 * 12}; 9 CVs kept their provisional score")
+    finally:
+        shutdown_extraction_pool()
+        client.close()
+        server.close()
+
+
+def main():
+    print("Testing pre-screen cascade...")
+    test_candidate_section_scores_match_brute_force()
+    test_policy_selection()
+    test_provisional_store()
+    test_cascade_only_llm_scores_selected_cvs()
+    print("\nPre-screen cascade test completed successfully!")
+
+
+if __name__ == "__main__":
+    main()
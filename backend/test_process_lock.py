@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test script for the single-process locks held by the API (see APP_LOCK_PATH) and the vector store.
+
+No Ollama instance is needed.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.process_lock import acquire_process_lock
+from app.services.vector_store import ShardedVectorStore
+
+# Runs a statement taking a lock in another process; exits with 1 if the lock is held
+CHILD = """
+import sys
+sys.path.insert(0, {backend!r})
+from app.services.process_lock import ProcessLockError, acquire_process_lock
+from app.services.vector_store import ShardedVectorStore
+try:
+    {statement}
+except ProcessLockError as e:
+    print(e)
+    sys.exit(1)
+"""
+
+
+def try_lock_in_child(path: str, statement: str = "acquire_process_lock({path!r}, 'The evaluation task queue')"):
+    code = CHILD.format(backend=os.path.dirname(os.path.abspath(__file__)), statement=statement.format(path=path))
+    return subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, timeout=60)
+
+
+def test_second_process_is_refused():
+    directory = tempfile.mkdtemp(prefix="cvalign-test-")
+    path = os.path.join(directory, "cvalign.lock")
+
+    # Free lock: another process can take it, and releases it when it exits
+    assert try_lock_in_child(path).returncode == 0
+
+    acquire_process_lock(path, "The evaluation task queue")
+    # Taking it again in the same process is allowed
+    acquire_process_lock(path, "The evaluation task queue")
+
+    child = try_lock_in_child(path)
+    assert child.returncode == 1, child.stderr
+    assert "already in use by another process" in child.stdout, child.stdout
+    assert try_lock_in_child(os.path.join(directory, "other.lock")).returncode == 0
+    print("✓ A second process cannot take a lock held by this one; other lock files are unaffected")
+
+
+def test_vector_store_is_owned_by_one_process():
+    path = os.path.join(tempfile.mkdtemp(prefix="cvalign-test-"), "vectors")
+    open_store = "ShardedVectorStore({path!r})"
+    assert try_lock_in_child(path, open_store).returncode == 0
+
+    ShardedVectorStore(path)
+    # Further instances in this process share the lock
+    ShardedVectorStore(path)
+    child = try_lock_in_child(path, open_store)
+    assert child.returncode == 1 and "The vector store at" in child.stdout, child.stdout + child.stderr
+    print("✓ A vector store opened here cannot be opened by another process")
+
+
+def main():
+    print("Testing process lock...")
+    test_second_process_is_refused()
+    test_vector_store_is_owned_by_one_process()
+    print("\nProcess lock test completed successfully!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Test script for the LLM response cache, run against a local fake Ollama HTTP server.
+
+No Ollama instance is needed.
+"""
+import asyncio
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from test_ollama_client import FakeOllama
+from test_multi_job_evaluation import generate_requests
+
+from app.services.llm_service import LLMService
+from app.services.ollama_client import AsyncOllamaClient
+from app.services.response_cache import ResponseCache
+
+
+def key(prompt: str) -> str:
+    return ResponseCache.make_key("gemma:4b", "skills_evaluation", prompt, {'temperature': 0.2})
+
+
+def test_entries_expire():
+    cache = ResponseCache(ttl_seconds=0.05, max_entries=10)
+    cache.put(key("a"), "85")
+    assert cache.get(key("a")) == "85"
+
+    time.sleep(0.1)
+    assert cache.get(key("a")) is None
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'expirations': 1, 'entries': 0}
+    # A fresh put starts a new TTL
+    cache.put(key("a"), "90")
+    assert cache.get(key("a")) == "90"
+    print("✓ Entries expire after the TTL and are dropped on lookup")
+
+
+def test_least_recently_used_is_evicted():
+    cache = ResponseCache(ttl_seconds=60, max_entries=2)
+    cache.put(key("a"), "1")
+    cache.put(key("b"), "2")
+    cache.get(key("a"))
+    cache.put(key("c"), "3")
+
+    assert cache.get(key("b")) is None
+    assert cache.get(key("a")) == "1" and cache.get(key("c")) == "3"
+    assert cache.stats()['entries'] == 2
+    assert key("a") != ResponseCache.make_key("gemma:4b", "education_evaluation", "a", {'temperature': 0.2})
+    print("✓ The least recently used entry is evicted once max_entries is reached")
+
+
+def test_generate_text_uses_and_bypasses_cache():
+    server = FakeOllama()
+    client = AsyncOllamaClient(server.url)
+    try:
+        cache = ResponseCache(ttl_seconds=60, max_entries=10)
+        service = LLMService(ollama_client=client, response_cache=cache)
+
+        assert service.generate_text("score this", "skills_evaluation") == "echo: score this"
+        assert service.generate_text("score this", "skills_evaluation") == "echo: score this"
+        assert asyncio.run(service.generate_text_async("score this", "skills_evaluation")) == "echo: score this"
+        assert len(generate_requests(server)) == 1
+        assert cache.hits == 2
+
+        # use_cache=False goes to the model and neither reads nor writes the cache
+        assert service.generate_text("score this", "skills_evaluation", use_cache=False) == "echo: score this"
+        assert asyncio.run(service.generate_text_async("score this", "skills_evaluation", use_cache=False))
+        assert len(generate_requests(server)) == 3
+        assert cache.stats() == {'hits': 2, 'misses': 1, 'expirations': 0, 'entries': 1}
+
+        # The same prompt continuing a primed context is a different request
+        service.generate_text("score this", "skills_evaluation", context=[1, 2, 3])
+        assert len(generate_requests(server)) == 4 and cache.stats()['entries'] == 2
+        print("✓ generate_text serves repeats from the cache; use_cache=False always generates")
+    finally:
+        client.close()
+        server.close()
+
+
+def main():
+    print("Testing response cache...")
+    test_entries_expire()
+    test_least_recently_used_is_evicted()
+    test_generate_text_uses_and_bypasses_cache()
+    print("\nResponse cache test completed successfully!")
+
+
+if __name__ == "__main__":
+    main()
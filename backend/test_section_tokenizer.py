@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Differential test of DocumentProcessor.extract_cv_sections against the implementation it
+replaced (one regex search per section and line), on handwritten and randomly generated CVs.
+"""
+import os
+import random
+import re
+import sys
+from typing import Dict
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.document_processor import DocumentProcessor, SECTION_KEYWORDS
+
+
+def reference_extract_cv_sections(text: str) -> Dict[str, str]:
+    """
+    extract_cv_sections before the precompiled scanner.
+    """
+    sections = {
+        'contact_info': '',
+        'summary': '',
+        'experience': '',
+        'education': '',
+        'skills': '',
+        'certifications': '',
+        'full_text': text
+    }
+    
+    text_lower = text.lower()
+    
+    # Try to split by common section headers first
+    section_patterns = {
+        'experience': r'\b(experience|work\s+history|employment|professional\s+experience)\b',
+        'education': r'\b(education|academic|qualification|academic\s+background)\b',
+        'skills': r'\b(skills|technical\s+skills|competencies|core\s+competencies)\b',
+        'summary': r'\b(summary|profile|objective|professional\s+summary)\b',
+        'certifications': r'\b(certification|certificate|license|certifications)\b'
+    }
+    
+    # If text has proper line breaks, use line-by-line processing
+    lines = text.split('\n')
+    if len(lines) > 5:  # Proper multi-line text
+        current_section = 'contact_info'
+        section_content = []
+        
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            
+            line_lower = line.lower()
+            
+            # Check if this line is a section header
+            section_found = None
+            for section_name, pattern in section_patterns.items():
+                if re.search(pattern, line_lower):
+                    section_found = section_name
+                    break
+            
+            if section_found:
+                if section_content:
+                    sections[current_section] = '\n'.join(section_content)
+                current_section = section_found
+                section_content = []
+                continue
+            
+            section_content.append(line)
+        
+        if section_content:
+            sections[current_section] = '\n'.join(section_content)
+    
+    else:  # Single line or few lines - use regex to extract sections
+        # Extract contact info (first part before any section keywords)
+        contact_match = re.search(r'^(.*?)(?=' + '|'.join(section_patterns.values()) + ')', text, re.IGNORECASE)
+        if contact_match:
+            sections['contact_info'] = contact_match.group(1).strip()
+        
+        # Extract each section using regex
+        for section_name, pattern in section_patterns.items():
+            # Find section start
+            start_match = re.search(pattern, text, re.IGNORECASE)
+            if start_match:
+                start_pos = start_match.end()
+                
+                # Find next section or end of text
+                next_patterns = [p for p in section_patterns.values() if p != pattern]
+                end_pos = len(text)
+                
+                for next_pattern in next_patterns:
+                    next_match = re.search(next_pattern, text[start_pos:], re.IGNORECASE)
+                    if next_match:
+                        end_pos = min(end_pos, start_pos + next_match.start())
+                
+                section_text = text[start_pos:end_pos].strip()
+                if section_text:
+                    sections[section_name] = section_text
+    
+    return sections
+
+
+HEADERS = ['Experience', 'WORK HISTORY', 'Employment', 'Professional  Experience', 'Education', 'academic',
+           'Qualifications', 'Academic\tBackground', 'SKILLS', 'Technical Skills', 'Competencies',
+           'Core Competencies', 'Summary', 'Profile', 'Objective', 'Professional Summary', 'Certifications',
+           'Certificate', 'License', 'Skills & Experience', 'Education / Certification']
+FILLER = ['Python', 'led a team', 'skillset', 'experienced', 'licensed', 'profiles', 'work', 'history',
+          'professional', 'academically', 'Ünïcode', 'İstanbul', 'ΣΟΦΊΑ', 'K', '2019-2023', '|', '-', 'summary:',
+          'e-mail: jane@example.com']
+WHITESPACE = [' ', ' ', ' ', '  ', '\t', '\n', '\r\n', ' \n ']
+
+
+def random_cv(rng: random.Random) -> str:
+    tokens = []
+    for _ in range(rng.randint(0, 60)):
+        tokens.append(rng.choice(HEADERS) if rng.random() < 0.2 else rng.choice(FILLER))
+        tokens.append(rng.choice(WHITESPACE))
+    text = ''.join(tokens)
+    if rng.random() < 0.5:
+        # Few lines: exercise the positional branch
+        text = text.replace('\n', ' ')
+        text = '\n'.join(text.split(' ', 4)) if rng.random() < 0.5 else text
+    return text
+
+
+def test_sample_cvs():
+    processor = DocumentProcessor()
+    samples = [
+        "",
+        "Jane Doe\njane@example.com\n\nSUMMARY\nBackend engineer\n\nEXPERIENCE\nAcme 2019-2023\n\nEDUCATION\nBSc\n\n"
+        "SKILLS\nPython, Go\n\nCERTIFICATIONS\nAWS",
+        "Jane Doe jane@example.com Summary Backend engineer Experience Acme Education BSc Skills Python",
+        "Skills and Experience: Python\nline\nline\nline\nline\nline",
+        "Professional Summary: builder. Work\nHistory: Acme. Skills: Python",
+    ]
+    for text in samples:
+        assert processor.extract_cv_sections(text) == reference_extract_cv_sections(text), repr(text)
+    print("✓ Sample CVs are split as before")
+
+
+def test_random_cvs():
+    processor = DocumentProcessor()
+    rng = random.Random(0)
+    for _ in range(5000):
+        text = random_cv(rng)
+        assert processor.extract_cv_sections(text) == reference_extract_cv_sections(text), repr(text)
+    print("✓ 5000 random CVs are split as before")
+
+
+def test_keywords_do_not_overlap():
+    # The scanner reports one keyword per match and continues after it, which finds the same
+    # headers as one search per section as long as no keyword of one section starts at or
+    # inside a keyword of another section
+    words = {section: [keyword.split(r'\s+') for keyword in keywords] for section, keywords in SECTION_KEYWORDS.items()}
+    for section, keywords in words.items():
+        for other, other_keywords in words.items():
+            if other == section:
+                continue
+            for keyword in keywords:
+                for start in range(len(keyword)):
+                    for other_keyword in other_keywords:
+                        overlap = min(len(keyword) - start, len(other_keyword))
+                        assert keyword[start:start + overlap] != other_keyword[:overlap], (keyword, other_keyword)
+    print("✓ Keywords of different sections never overlap")
+
+
+def main():
+    print("Testing the CV section tokenizer against the previous implementation...")
+    test_sample_cvs()
+    test_random_cvs()
+    test_keywords_do_not_overlap()
+    print("\nSection tokenizer test completed successfully!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Test script for the CV upload routes, run with FastAPI's TestClient against a local fake Ollama HTTP server.
+
+Authentication and the job lookup are overridden; the evaluation workers write to a temporary SQLite
+database. No Ollama instance is needed.
+"""
+import io
+import os
+import sys
+import asyncio
+import tempfile
+import time
+import zipfile
+from types import SimpleNamespace
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from test_ollama_client import FakeOllama
+from test_cv_store import CV_TEXT
+
+# The routes module creates its database engine, stores and Ollama client on import,
+# so they are pointed at a temporary directory and the fake server first
+DIRECTORY = tempfile.mkdtemp(prefix="cvalign-test-")
+SERVER = FakeOllama()
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{os.path.join(DIRECTORY, 'cvalign.db')}",
+    "VECTOR_DB_PATH": os.path.join(DIRECTORY, "vectors"),
+    "JOB_EMBEDDINGS_PATH": os.path.join(DIRECTORY, "jobs.db"),
+    "CV_STORE_PATH": os.path.join(DIRECTORY, "cvs.db"),
+    "PRESCREEN_STORE_PATH": os.path.join(DIRECTORY, "prescreen.db"),
+    "UPLOAD_DIR": os.path.join(DIRECTORY, "uploads"),
+    "OLLAMA_BASE_URL": SERVER.url,
+})
+
+from fastapi import FastAPI, HTTPException, UploadFile
+from fastapi.testclient import TestClient
+
+from app.auth.auth import get_current_user
+from app.database.config import create_tables, get_db
+from app.routes import evaluations
+
+JOB = SimpleNamespace(id=1, company_id=1, description="Backend engineer for the hiring platform",
+                      requirements="Python, PostgreSQL, 5+ years")
+USER = SimpleNamespace(id=1, email="recruiter@example.com", role="recruiter", company_id=1)
+
+
+class JobLookup:
+    """Request-scoped session stand-in; the upload routes only look up the job."""
+
+    def query(self, *entities):
+        return self
+
+    def filter(self, *criteria):
+        return self
+
+    def first(self):
+        return JOB
+
+
+def make_client() -> TestClient:
+    create_tables()
+    app = FastAPI()
+    app.include_router(evaluations.router, prefix="/api/evaluations")
+    app.dependency_overrides[get_current_user] = lambda: USER
+    app.dependency_overrides[get_db] = JobLookup
+    return TestClient(app)
+
+
+def uploaded_files():
+    return os.listdir(os.environ["UPLOAD_DIR"]) if os.path.isdir(os.environ["UPLOAD_DIR"]) else []
+
+
+class CountingReader(io.BytesIO):
+    def __init__(self, data: bytes):
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+def test_oversized_upload_is_rejected():
+    client = make_client()
+    os.environ["MAX_FILE_SIZE"] = "1024"
+    try:
+        response = client.post("/api/evaluations/1/upload",
+                               files={"file": ("cv.txt", b"x" * 4096, "text/plain")})
+        assert response.status_code == 413, response.text
+        assert response.json()["detail"] == "File size too large: cv.txt"
+
+        response = client.post("/api/evaluations/1/upload/batch",
+                               files=[("files", ("a.txt", CV_TEXT.encode(), "text/plain")),
+                                      ("files", ("b.txt", b"x" * 4096, "text/plain"))])
+        assert response.status_code == 413, response.text
+        # Files staged before the rejected one are removed
+        assert uploaded_files() == []
+    finally:
+        del os.environ["MAX_FILE_SIZE"]
+    print("✓ Uploads over MAX_FILE_SIZE are rejected with 413 and nothing is left in UPLOAD_DIR")
+
+
+def test_size_limit_is_enforced_while_streaming():
+    # Without a declared size the limit can only be checked as chunks arrive
+    chunk_size = evaluations.UPLOAD_CHUNK_SIZE
+    evaluations.UPLOAD_CHUNK_SIZE = 256
+    try:
+        source = CountingReader(b"x" * 100000)
+        try:
+            asyncio.run(evaluations._spool_upload(UploadFile(source, filename="cv.txt"), 1024))
+        except HTTPException as e:
+            assert e.status_code == 413
+        else:
+            raise AssertionError("an oversized upload should be rejected")
+        assert source.bytes_read <= 1024 + 256, source.bytes_read
+
+        spool = asyncio.run(evaluations._spool_upload(UploadFile(io.BytesIO(b"y" * 1000), filename="cv.txt"), 1024))
+        with spool:
+            assert spool.read() == b"y" * 1000
+    finally:
+        evaluations.UPLOAD_CHUNK_SIZE = chunk_size
+    print(f"✓ A 100000-byte upload was rejected after reading {source.bytes_read} bytes (limit 1024)")
+
+
+def wait_for_task(client: TestClient, task_id: str, timeout: float = 30.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while True:
+        task = client.get(f"/api/evaluations/tasks/{task_id}").json()
+        if task["status"] in ("completed", "failed"):
+            return task
+        assert time.monotonic() < deadline, task
+        time.sleep(0.05)
+
+
+def test_upload_is_evaluated():
+    client = make_client()
+    response = client.post("/api/evaluations/1/upload", files={"file": ("cv.txt", CV_TEXT.encode(), "text/plain")})
+    assert response.status_code == 202, response.text
+
+    task = wait_for_task(client, response.json()["task_id"])
+    assert task["status"] == "completed", task
+    assert task["evaluation_id"] is not None
+    print("✓ An upload within the limit is queued and evaluated")
+
+
+def test_batch_isolates_failing_files():
+    client = make_client()
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("cvs/jane.txt", CV_TEXT)
+        zf.writestr("cvs/broken.pdf", b"%PDF-1.4 truncated")
+        # Not CVs: skipped instead of failing the batch
+        zf.writestr("cvs/photo.png", b"\x89PNG")
+        zf.writestr("cvs/.DS_Store", b"")
+        zf.writestr("__MACOSX/", b"")
+    response = client.post("/api/evaluations/1/upload/batch", files=[
+        ("files", ("cvs.zip", archive.getvalue(), "application/zip")),
+        ("files", ("john.txt", CV_TEXT.replace("Jane", "John").encode(), "text/plain")),
+    ])
+    assert response.status_code == 202, response.text
+    body = response.json()
+    assert sorted(task["filename"] for task in body["tasks"]) == ["broken.pdf", "jane.txt", "john.txt"]
+
+    statuses = {task["filename"]: wait_for_task(client, task["task_id"]) for task in body["tasks"]}
+    assert statuses["broken.pdf"]["status"] == "failed", statuses["broken.pdf"]
+    for filename in ("jane.txt", "john.txt"):
+        assert statuses[filename]["status"] == "completed", statuses[filename]
+        assert statuses[filename]["evaluation_id"] is not None
+    assert wait_for_task(client, body["task_id"])["status"] == "completed"
+    assert uploaded_files() == []
+    print("✓ A corrupt file in a batch fails on its own task; the other CVs are evaluated and non-CV members skipped")
+
+
+def test_batch_rejects_archives_without_cvs():
+    client = make_client()
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("photo.png", b"\x89PNG")
+        zf.writestr("notes.md", "# notes")
+    response = client.post("/api/evaluations/1/upload/batch",
+                           files=[("files", ("cvs.zip", archive.getvalue(), "application/zip"))])
+    assert response.status_code == 400 and response.json()["detail"] == "No CV files found in upload", response.text
+
+    response = client.post("/api/evaluations/1/upload/batch",
+                           files=[("files", ("cvs.zip", b"not a zip", "application/zip"))])
+    assert response.status_code == 400 and response.json()["detail"] == "Invalid zip archive", response.text
+
+    response = client.post("/api/evaluations/1/upload/batch",
+                           files=[("files", ("photo.png", b"\x89PNG", "image/png"))])
+    assert response.status_code == 400, response.text
+    assert uploaded_files() == []
+    print("✓ Batches without CV files, with a broken archive or an unsupported file are rejected with 400")
+
+
+def main():
+    print("Testing upload routes...")
+    try:
+        test_oversized_upload_is_rejected()
+        test_size_limit_is_enforced_while_streaming()
+        test_upload_is_evaluated()
+        test_batch_isolates_failing_files()
+        test_batch_rejects_archives_without_cvs()
+    finally:
+        SERVER.close()
+    print("\nUpload routes test completed successfully!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Test script for deleting chunks from the vector store (tombstones and compaction).
+
+No Ollama instance is needed: vectors are random.
+"""
+import os
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ["VECTOR_STORE_FSYNC"] = "false"
+
+import numpy as np
+
+from app.services.vector_store import ShardKey, ShardedVectorStore, VectorShard
+
+DIMENSION = 16
+
+
+def add_candidates(shard: VectorShard, first: int, last: int, rng, chunks: int = 4):
+    documents = [{'text': f"candidate {c} chunk {j}", 'metadata': {'section': 'skills', 'candidate_id': f"c{c}"}}
+                 for c in range(first, last) for j in range(chunks)]
+    embeddings = rng.standard_normal((len(documents), DIMENSION)).astype('float32')
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    shard.add(embeddings, documents)
+    return embeddings
+
+
+def wait_for_compaction(shard: VectorShard):
+    while shard.compacting:
+        time.sleep(0.01)
+
+
+def found_candidates(shard: VectorShard, query: np.ndarray):
+    return {hit['metadata']['candidate_id'] for hit in shard.search(query, shard.ntotal)}
+
+
+def test_deleted_chunks_are_not_returned():
+    rng = np.random.default_rng(0)
+    path = tempfile.mkdtemp()
+    shard = VectorShard(path)
+    shard.load()
+    embeddings = add_candidates(shard, 0, 20, rng)
+    shard.compact()
+
+    assert shard.delete(["c1", "c2", "unknown"]) == 8
+    assert not shard.has_candidate("c1")
+    assert shard.search(embeddings[4], 3, candidate_id="c1") == []
+    assert not {"c1", "c2"} & found_candidates(shard, embeddings[4])
+
+    # The deletion is logged, so it survives a restart
+    reloaded = VectorShard(path)
+    reloaded.load()
+    assert reloaded.live_rows == 72
+    assert not {"c1", "c2"} & found_candidates(reloaded, embeddings[4])
+    print("✓ Deleted candidates are skipped by searches, before and after a restart")
+
+
+def test_compaction_drops_tombstones():
+    rng = np.random.default_rng(1)
+    path = tempfile.mkdtemp()
+    shard = VectorShard(path)
+    shard.load()
+    shard.tombstone_ratio = 0.25
+    add_candidates(shard, 0, 20, rng)
+    shard.compact()
+
+    shard.delete([f"c{c}" for c in range(10)])
+    wait_for_compaction(shard)
+    assert shard.ntotal == shard.live_rows == 40
+
+    # Remaining rows are renumbered; candidate lookups still find their own chunks
+    query = rng.standard_normal(DIMENSION).astype('float32')
+    for c in range(10, 20):
+        hits = shard.search(query, 10, candidate_id=f"c{c}")
+        assert len(hits) == 4 and all(hit['metadata']['candidate_id'] == f"c{c}" for hit in hits)
+    reloaded = VectorShard(path)
+    reloaded.load()
+    assert reloaded.ntotal == 40
+    assert found_candidates(reloaded, query) == {f"c{c}" for c in range(10, 20)}
+    print("✓ Compaction rebuilds the shard without deleted rows once the tombstone ratio is reached")
+
+
+def test_deleting_all_chunks_removes_the_shard():
+    rng = np.random.default_rng(2)
+    path = tempfile.mkdtemp()
+    shard = VectorShard(path)
+    shard.load()
+    add_candidates(shard, 0, 5, rng)
+
+    shard.delete()
+    wait_for_compaction(shard)
+    assert not os.path.exists(path)
+
+    # The shard stays usable
+    embeddings = add_candidates(shard, 5, 6, rng)
+    reloaded = VectorShard(path)
+    reloaded.load()
+    assert reloaded.ntotal == 4 and reloaded.search(embeddings[0], 1)[0]['metadata']['candidate_id'] == "c5"
+    print("✓ Deleting every chunk removes the shard's files")
+
+
+def test_emptying_the_root_shard_keeps_other_shards():
+    rng = np.random.default_rng(3)
+    path = tempfile.mkdtemp()
+    store = ShardedVectorStore(path)
+    job_shard, root_shard = store.get_shard(ShardKey(1, 1)), store.get_shard(ShardKey())
+    embeddings = add_candidates(job_shard, 0, 2, rng)
+    add_candidates(root_shard, 2, 3, rng)
+
+    # The unpartitioned shard lives at the store root, next to the company directories
+    assert root_shard.delete(["c2"]) == 4
+    wait_for_compaction(root_shard)
+    assert os.path.isdir(os.path.join(path, "company_1", "job_1"))
+    assert not any(name.startswith(("MANIFEST", "checkpoint-", "wal-")) for name in os.listdir(path))
+
+    reloaded = ShardedVectorStore(path)
+    assert reloaded.get_shard(ShardKey()).ntotal == 0
+    assert reloaded.get_shard(ShardKey(1, 1)).ntotal == 8
+    assert reloaded.search(ShardKey(1, 1), embeddings[0], 1)[0]['metadata']['candidate_id'] == "c0"
+    print("✓ Emptying the root shard removes only its own files, not the partitioned shards")
+
+
+def main():
+    print("Testing vector store deletion...")
+    test_deleted_chunks_are_not_returned()
+    test_compaction_drops_tombstones()
+    test_deleting_all_chunks_removes_the_shard()
+    test_emptying_the_root_shard_keeps_other_shards()
+    print("\nVector store deletion test completed successfully!")
+
+
+if __name__ == "__main__":
+    main()
@@ -67,7 +67,8 @@ function CVUpload({ jobId, onUploadSuccess }) {
 
     try {
       const response = await evaluationsAPI.uploadCV(jobId, file);
-      onUploadSuccess(response.data);
+      const task = await evaluationsAPI.waitForUploadTask(response.data.task_id);
+      onUploadSuccess(task);
       setFile(null);
     } catch (error) {
       setError(error.response?.data?.detail || 'Failed to upload CV');
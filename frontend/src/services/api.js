@@ -62,6 +62,22 @@ export const evaluationsAPI = {
       },
     });
   },
+  getUploadTask: (taskId) => api.get(`/evaluations/tasks/${taskId}`),
+  waitForUploadTask: async (taskId, intervalMs = 1000) => {
+    // Uploads are evaluated in the background; poll until the task finishes
+    for (;;) {
+      const { data } = await api.get(`/evaluations/tasks/${taskId}`);
+      if (data.status === 'completed') {
+        return data;
+      }
+      if (data.status === 'failed') {
+        const error = new Error(data.error || 'CV evaluation failed');
+        error.response = { data: { detail: data.error || 'CV evaluation failed' } };
+        throw error;
+      }
+      await new Promise((resolve) => setTimeout(resolve, intervalMs));
+    }
+  },
   getEvaluation: (id) => api.get(`/evaluations/${id}`),
   getJobCandidates: (jobId) => api.get(`/evaluations/job/${jobId}/candidates`),
   deleteEvaluation: (id) => api.delete(`/evaluations/${id}`),